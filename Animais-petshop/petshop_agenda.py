@@ -0,0 +1,192 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+SLOT_MINUTOS = 15
+ABERTURA = 8 * 60  # minutos desde a meia-noite
+FECHAMENTO = 18 * 60
+SLOTS_POR_DIA = (FECHAMENTO - ABERTURA) // SLOT_MINUTOS
+_DIA_INTEIRO = (1 << SLOTS_POR_DIA) - 1
+# profissionais de cada recurso por dia da semana (segunda = 0); domingo fechado
+CAPACIDADE = {
+    "banho_tosa": (2, 2, 2, 2, 2, 3, 0),
+    "veterinario": (1, 1, 1, 1, 1, 1, 0),
+}
+# serviço (minúsculo) -> (duração em minutos, recurso); o que não estiver aqui usa o padrão
+SERVICOS = {
+    "banho": (60, "banho_tosa"),
+    "tosa": (90, "banho_tosa"),
+    "hidratação": (45, "banho_tosa"),
+    "consulta": (30, "veterinario"),
+    "vacina": (15, "veterinario"),
+}
+DURACAO_PADRAO = (30, "banho_tosa")
+
+
+def _posicao(inicio: float) -> Tuple[date, int]:
+    quando = datetime.fromtimestamp(inicio)
+    minutos = quando.hour * 60 + quando.minute - ABERTURA
+    if quando.second or quando.microsecond or minutos % SLOT_MINUTOS:
+        raise ValueError(f"horário fora da grade de {SLOT_MINUTOS} minutos: {quando:%H:%M:%S}")
+    return quando.date(), minutos // SLOT_MINUTOS
+
+
+def _inicio_do_slot(dia: date, slot: int) -> datetime:
+    return datetime(dia.year, dia.month, dia.day) + timedelta(minutes=ABERTURA + slot * SLOT_MINUTOS)
+
+
+def _encaixes(livre: int, slots: int) -> int:
+    # bit i ligado = há `slots` slots livres seguidos a partir de i
+    encaixes = livre
+    for i in range(1, slots):
+        encaixes &= livre >> i
+    return encaixes & ((1 << (SLOTS_POR_DIA - slots + 1)) - 1) if slots <= SLOTS_POR_DIA else 0
+
+
+# Agendamentos em slots de 15 min. Cada profissional de cada recurso tem, por dia,
+# um inteiro com um bit por slot: conflito é um E bit a bit e o próximo horário
+# livre sai de deslocamentos e do bit menos significativo, sem varrer reservas
+class Agenda:
+    def __init__(self):
+        self.capacidade = {recurso: list(por_dia) for recurso, por_dia in CAPACIDADE.items()}
+        self.servicos = dict(SERVICOS)
+        # (dia, recurso) -> profissionais; sobrepõe a capacidade do dia da semana (folgas, feriados)
+        self.excecoes: Dict[Tuple[date, str], int] = {}
+        self.agendamentos: Dict[str, Dict[str, Any]] = {}
+        self._ocupacao: Dict[Tuple[date, str], List[int]] = {}
+        self._por_dia: Dict[date, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.agendamentos)
+
+    def vazia(self) -> "Agenda":
+        # mesma capacidade, serviços e exceções, sem nenhum agendamento
+        agenda = Agenda()
+        agenda.capacidade = {recurso: list(por_dia) for recurso, por_dia in self.capacidade.items()}
+        agenda.servicos = dict(self.servicos)
+        agenda.excecoes = dict(self.excecoes)
+        return agenda
+
+    def __contains__(self, agendamento_id: str) -> bool:
+        return agendamento_id in self.agendamentos
+
+    def carregar(self, registros: Iterable[Dict[str, Any]]):
+        self.agendamentos = {}
+        self._ocupacao = {}
+        self._por_dia = {}
+        for r in registros:
+            self.reservar(r)
+
+    def registros(self) -> List[Dict[str, Any]]:
+        return sorted(self.agendamentos.values(), key=lambda r: r["inicio"])
+
+    def duracao(self, servico: str) -> Tuple[int, str]:
+        minutos, recurso = self.servicos.get(servico.strip().lower(), DURACAO_PADRAO)
+        return -(-minutos // SLOT_MINUTOS), recurso
+
+    def profissionais(self, dia: date, recurso: str) -> int:
+        excecao = self.excecoes.get((dia, recurso))
+        if excecao is not None:
+            return excecao
+        por_dia = self.capacidade.get(recurso)
+        return por_dia[dia.weekday()] if por_dia else 0
+
+    @staticmethod
+    def _bits(slot: int, slots: int) -> int:
+        return ((1 << slots) - 1) << slot
+
+    def encaixe(self, servico: str, inicio: float) -> Optional[int]:
+        # primeiro profissional livre durante todo o serviço, ou None
+        slots, recurso = self.duracao(servico)
+        dia, slot = _posicao(inicio)
+        if slot < 0 or slot + slots > SLOTS_POR_DIA:
+            return None
+        bits = self._bits(slot, slots)
+        ocupacao = self._ocupacao.get((dia, recurso), [])
+        for p in range(self.profissionais(dia, recurso)):
+            if p >= len(ocupacao) or not ocupacao[p] & bits:
+                return p
+        return None
+
+    def conflito(self, dados: Dict[str, Any]) -> Optional[str]:
+        dia, slot = _posicao(dados["inicio"])
+        slots = -(-int(dados["duracao"]) // SLOT_MINUTOS)
+        p = dados["profissional"]
+        if p >= self.profissionais(dia, dados["recurso"]):
+            return f"sem profissional de {dados['recurso']} em {dia:%d/%m/%Y}"
+        ocupacao = self._ocupacao.get((dia, dados["recurso"]), [])
+        if p < len(ocupacao) and ocupacao[p] & self._bits(slot, slots):
+            return f"horário {_inicio_do_slot(dia, slot):%d/%m/%Y %H:%M} já ocupado"
+        return None
+
+    def reservar(self, dados: Dict[str, Any]):
+        dia, slot = _posicao(dados["inicio"])
+        slots = -(-int(dados["duracao"]) // SLOT_MINUTOS)
+        ocupacao = self._ocupacao.setdefault((dia, dados["recurso"]), [])
+        p = dados["profissional"]
+        if p >= len(ocupacao):
+            ocupacao.extend([0] * (p + 1 - len(ocupacao)))
+        ocupacao[p] |= self._bits(slot, slots)
+        self.agendamentos[dados["id"]] = dados
+        self._por_dia.setdefault(dia, set()).add(dados["id"])
+
+    def cancelar(self, agendamento_id: str) -> Optional[Dict[str, Any]]:
+        dados = self.agendamentos.pop(agendamento_id, None)
+        if dados is None:
+            return None
+        dia, slot = _posicao(dados["inicio"])
+        slots = -(-int(dados["duracao"]) // SLOT_MINUTOS)
+        self._ocupacao[(dia, dados["recurso"])][dados["profissional"]] &= ~self._bits(slot, slots)
+        ids = self._por_dia[dia]
+        ids.discard(agendamento_id)
+        if not ids:
+            del self._por_dia[dia]
+        return dados
+
+    def remover_animal(self, animal_id: str):
+        for agendamento_id in [i for i, d in self.agendamentos.items() if d["animal_id"] == animal_id]:
+            self.cancelar(agendamento_id)
+
+    def _encaixes_do_dia(self, dia: date, slots: int, recurso: str) -> List[int]:
+        ocupacao = self._ocupacao.get((dia, recurso), [])
+        return [_encaixes(_DIA_INTEIRO & ~(ocupacao[p] if p < len(ocupacao) else 0), slots)
+                for p in range(self.profissionais(dia, recurso))]
+
+    def livres(self, servico: str, dia: date) -> List[datetime]:
+        slots, recurso = self.duracao(servico)
+        todos = 0
+        for encaixes in self._encaixes_do_dia(dia, slots, recurso):
+            todos |= encaixes
+        return [_inicio_do_slot(dia, s) for s in range(SLOTS_POR_DIA) if todos >> s & 1]
+
+    def proximo_livre(self, servico: str, a_partir_de: datetime, dias: int = 60) -> Optional[Tuple[datetime, int]]:
+        slots, recurso = self.duracao(servico)
+        dia = a_partir_de.date()
+        # primeiro slot que começa em a_partir_de ou depois
+        minutos = a_partir_de.hour * 60 + a_partir_de.minute + (1 if a_partir_de.second or a_partir_de.microsecond else 0)
+        primeiro = max(0, -(-(minutos - ABERTURA) // SLOT_MINUTOS))
+        for _ in range(dias):
+            permitido = ~((1 << primeiro) - 1)
+            melhor: Optional[Tuple[int, int]] = None
+            for p, encaixes in enumerate(self._encaixes_do_dia(dia, slots, recurso)):
+                encaixes &= permitido
+                if encaixes:
+                    slot = (encaixes & -encaixes).bit_length() - 1
+                    if melhor is None or slot < melhor[0]:
+                        melhor = (slot, p)
+            if melhor is not None:
+                return _inicio_do_slot(dia, melhor[0]), melhor[1]
+            dia += timedelta(days=1)
+            primeiro = 0
+        return None
+
+    def do_dia(self, dia: date) -> List[Dict[str, Any]]:
+        return sorted((self.agendamentos[i] for i in self._por_dia.get(dia, ())), key=lambda r: (r["inicio"], r["recurso"]))
+
+    def ocupacao_do_dia(self, dia: date) -> Dict[str, float]:
+        # fração dos slots de cada recurso já reservada
+        taxa = {}
+        for recurso in self.capacidade:
+            total = self.profissionais(dia, recurso) * SLOTS_POR_DIA
+            ocupacao = self._ocupacao.get((dia, recurso), [])
+            taxa[recurso] = sum(bin(m).count("1") for m in ocupacao) / total if total else 0.0
+        return taxa
@@ -0,0 +1,173 @@
+import heapq
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from typing import Any, Dict, List, Iterable, Iterator, Optional, Tuple
+
+# (chave, quantidade, receita)
+Linha = Tuple[str, int, float]
+
+
+def _somar(contadores: Dict[str, List[float]], chave: str, quantidade: int, valor: float):
+    c = contadores.get(chave)
+    if c is None:
+        c = contadores[chave] = [0, 0.0]
+    c[0] += quantidade
+    c[1] += valor
+    if c[0] <= 0:
+        del contadores[chave]
+
+
+def _linhas(contadores: Dict[str, List[float]], top: Optional[int]) -> List[Linha]:
+    linhas = ((chave, int(c[0]), round(c[1], 2)) for chave, c in contadores.items())
+    if top is None:
+        return sorted(linhas, key=lambda l: (-l[2], l[0]))
+    return heapq.nlargest(top, linhas, key=lambda l: l[2])
+
+
+# fusos horários são deslocados em múltiplos de 15 min: dentro de um bloco de 15 min o mês local não muda
+_meses_por_bloco: Dict[int, str] = {}
+
+
+def mes(quando: float) -> str:
+    bloco = int(quando // 900)
+    m = _meses_por_bloco.get(bloco)
+    if m is None:
+        m = _meses_por_bloco[bloco] = time.strftime("%Y-%m", time.localtime(bloco * 900))
+    return m
+
+
+# Contadores de quantidade e receita mantidos incrementalmente: cada serviço
+# realizado soma uma vez em cada dimensão e as consultas não varrem históricos
+class Analise:
+    def __init__(self):
+        self.quantidade = 0
+        self.receita = 0.0
+        self.por_servico: Dict[str, List[float]] = {}
+        self.por_especie: Dict[str, List[float]] = {}
+        self.por_tutor: Dict[str, List[float]] = {}
+        # "AAAA-MM" -> serviço -> [quantidade, receita]; registros sem data ficam de fora
+        self.por_mes: Dict[str, Dict[str, List[float]]] = {}
+
+    @classmethod
+    def construir(cls, animais: Iterable) -> "Analise":
+        analise = cls()
+        for a in animais:
+            qtd = 0
+            soma = 0.0
+            servicos: Dict[str, List[float]] = {}
+            for nome, preco, quando in a.iterar_historico():
+                _somar(servicos, nome, 1, preco)
+                if quando:
+                    analise._somar_mes(quando, nome, 1, preco)
+                qtd += 1
+                soma += preco
+            if not qtd:
+                continue
+            for nome, (n, total) in servicos.items():
+                _somar(analise.por_servico, nome, n, total)
+            analise._somar_animal(a, qtd, soma)
+        return analise
+
+    def _somar_animal(self, animal, quantidade: int, valor: float):
+        self.quantidade += quantidade
+        self.receita += valor
+        _somar(self.por_especie, animal.especie, quantidade, valor)
+        _somar(self.por_tutor, animal.tutor_cpf, quantidade, valor)
+
+    def _somar_mes(self, quando: float, servico: str, quantidade: int, valor: float):
+        chave = mes(quando)
+        servicos = self.por_mes.get(chave)
+        if servicos is None:
+            servicos = self.por_mes[chave] = {}
+        _somar(servicos, servico, quantidade, valor)
+        if not servicos:
+            del self.por_mes[chave]
+
+    def registrar(self, animal, servico: str, preco: float, quando: float = 0.0):
+        _somar(self.por_servico, servico, 1, preco)
+        if quando:
+            self._somar_mes(quando, servico, 1, preco)
+        self._somar_animal(animal, 1, preco)
+
+    def remover_animal(self, animal):
+        qtd = 0
+        soma = 0.0
+        for nome, preco, quando in animal.iterar_historico():
+            _somar(self.por_servico, nome, -1, -preco)
+            if quando:
+                self._somar_mes(quando, nome, -1, -preco)
+            qtd += 1
+            soma += preco
+        if qtd:
+            self._somar_animal(animal, -qtd, -soma)
+
+    def servicos(self, top: int = None) -> List[Linha]:
+        return _linhas(self.por_servico, top)
+
+    def especies(self, top: int = None) -> List[Linha]:
+        return _linhas(self.por_especie, top)
+
+    def tutores(self, top: int = None) -> List[Linha]:
+        return _linhas(self.por_tutor, top)
+
+    def meses(self) -> List[str]:
+        return sorted(self.por_mes)
+
+    def servicos_do_mes(self, chave: str, top: int = None) -> List[Linha]:
+        return _linhas(self.por_mes.get(chave, {}), top)
+
+    def ticket_medio(self) -> float:
+        return self.receita / self.quantidade if self.quantidade else 0.0
+
+
+# Todos os serviços com data, em ordem cronológica, em colunas paralelas:
+# consultas por período são duas buscas binárias e uma fatia
+class LinhaDoTempo:
+    def __init__(self):
+        self.datas = array("d")
+        self.precos = array("d")
+        self.servicos: List[str] = []
+        self.animais: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self.datas)
+
+    @classmethod
+    def construir(cls, animais: Iterable) -> "LinhaDoTempo":
+        registros = [(quando, a, nome, preco) for a in animais for nome, preco, quando in a.iterar_historico() if quando]
+        registros.sort(key=itemgetter(0))
+        linha = cls()
+        linha.datas = array("d", map(itemgetter(0), registros))
+        linha.animais = list(map(itemgetter(1), registros))
+        linha.servicos = list(map(itemgetter(2), registros))
+        linha.precos = array("d", map(itemgetter(3), registros))
+        return linha
+
+    def registrar(self, quando: float, animal, servico: str, preco: float):
+        if not quando:
+            return
+        if not self.datas or quando >= self.datas[-1]:
+            pos = len(self.datas)
+        else:
+            pos = bisect_right(self.datas, quando)
+        self.datas.insert(pos, quando)
+        self.animais.insert(pos, animal)
+        self.servicos.insert(pos, servico)
+        self.precos.insert(pos, preco)
+
+    def _faixa(self, inicio: float, fim: float) -> Tuple[int, int]:
+        a = bisect_left(self.datas, inicio)
+        return a, bisect_left(self.datas, fim, a)
+
+    def entre(self, inicio: float, fim: float) -> Iterator[Tuple[float, Any, str, float]]:
+        a, b = self._faixa(inicio, fim)
+        return zip(self.datas[a:b], self.animais[a:b], self.servicos[a:b], self.precos[a:b])
+
+    def agregar_entre(self, inicio: float, fim: float) -> List[Linha]:
+        a, b = self._faixa(inicio, fim)
+        contadores: Dict[str, List[float]] = {}
+        for nome, preco in zip(self.servicos[a:b], self.precos[a:b]):
+            _somar(contadores, nome, 1, preco)
+        return _linhas(contadores, None)
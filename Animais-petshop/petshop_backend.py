@@ -1,14 +1,49 @@
+import argparse
 import json
-from typing import Dict, List, Any
-from pathlib import Path
+import re
+import shlex
+import sys
+import threading
+import time
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import ExitStack, contextmanager, redirect_stdout
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Callable, Dict, List, Any, Optional, Sequence, Set, Tuple, Iterable, Iterator
+
+from petshop_agenda import SLOT_MINUTOS, Agenda
+from petshop_analise import Analise, Linha, LinhaDoTempo
+from petshop_backup import BACKUP_SUFIXO, RepositorioBackup
+from petshop_busca import IndiceBusca
+from petshop_cache import CacheRelatorios
+from petshop_io import FORMATOS, exportar_arquivo, importar_arquivo
+from petshop_metricas import Histograma, Metricas, formatar, medido
+from petshop_precos import TabelaPrecos
+from petshop_storage import ArmazenamentoJSON, FORMATO_COLUNAR, FORMATOS_ARQUIVO, FRAGMENTOS_SUFIXO, criar_armazenamento
 
 DATA_FILE = "petshop_data.json"
+CAMPOS_AGENDAMENTO = ("id", "animal_id", "servico", "inicio", "duracao", "recurso", "profissional")
+# consultas só com dígitos e pontuação de telefone/CPF são tratadas como um número único
+_TELEFONE = re.compile(r"[\d\s()+./-]*\d[\d\s()+./-]*")
+CATEGORIA_PADRAO = "geral"
+CATEGORIAS_PADRAO = {"banho": "estetica", "tosa": "estetica", "hidratação": "estetica",
+                     "consulta": "veterinario", "vacina": "veterinario"}
+# linhas por página dos geradores de relatório e do menu do terminal
+PAGINA_RELATORIO = 500
+PAGINA_TERMINAL = 50
+AUTOSAVE_ESPERA_MAXIMA = 5
+# tecla de saída do menu principal: opções novas entram depois das existentes, sem mexer nela
+OPCAO_SAIR = "8"
 
 
 class Tutor:
+    __slots__ = ("_nome", "_cpf", "_telefone")
+
     def __init__(self, nome: str, cpf: str, telefone: str):
         self._nome = nome.strip()
-        self._cpf = cpf.strip()
+        self._cpf = sys.intern(cpf.strip())
         self._telefone = telefone.strip()
 
     @property
@@ -43,9 +78,14 @@ class Tutor:
 
 
 class Servico:
-    def __init__(self, nome: str, preco: float):
-        self._nome = nome.strip()
+    __slots__ = ("_nome", "_preco", "_categoria")
+
+    def __init__(self, nome: str, preco: float, categoria: str = ""):
+        self._nome = sys.intern(nome.strip())
         self._preco = float(preco)
+        # arquivos antigos não têm categoria: os serviços conhecidos recebem a sua
+        categoria = categoria.strip().lower() or CATEGORIAS_PADRAO.get(self._nome.lower(), CATEGORIA_PADRAO)
+        self._categoria = sys.intern(categoria)
 
     @property
     def nome(self) -> str:
@@ -55,25 +95,99 @@ class Servico:
     def preco(self) -> float:
         return self._preco
 
+    @property
+    def categoria(self) -> str:
+        return self._categoria
+
     def __str__(self) -> str:
         return f"{self._nome} (R$ {self._preco:.2f})"
 
     def to_dict(self) -> Dict[str, Any]:
-        return {"nome": self._nome, "preco": self._preco}
+        return {"nome": self._nome, "preco": self._preco, "categoria": self._categoria}
 
     @staticmethod
     def from_dict(d: Dict[str, Any]) -> "Servico":
-        return Servico(d["nome"], d["preco"])
+        return Servico(d["nome"], d["preco"], d.get("categoria") or "")
+
+
+# Tabela de serviços compartilhada pelos históricos de um PetShop: cada registro guarda
+# só o índice do serviço nesta tabela e o preço cobrado, em arrays compactos.
+class TabelaServicos:
+    __slots__ = ("servicos", "indice")
+
+    def __init__(self):
+        self.servicos: List[Servico] = []
+        self.indice: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.servicos)
+
+    def indice_servico(self, servico: Servico, substituir: bool = False) -> int:
+        idx = self.indice.get(servico.nome)
+        if idx is None:
+            idx = len(self.servicos)
+            self.indice[servico.nome] = idx
+            self.servicos.append(servico)
+        elif substituir:
+            self.servicos[idx] = servico
+        return idx
+
+    def indice_por_nome(self, nome: str, preco: float) -> int:
+        idx = self.indice.get(nome.strip())
+        return idx if idx is not None else self.indice_servico(Servico(nome, preco))
+
+    def do_registro(self, idx: int, preco: float) -> Servico:
+        s = self.servicos[idx]
+        return s if s.preco == preco else Servico(s.nome, preco, s.categoria)
+
+    def de_dict(self, d: Dict[str, Any]) -> Servico:
+        return self.do_registro(self.indice_por_nome(d["nome"], d["preco"]), float(d["preco"]))
+
+
+def _timestamp(valor) -> float:
+    # aceita epoch, datetime, date (meia-noite local) ou texto ISO 8601; vazio = sem data
+    if valor is None or valor == "":
+        return 0.0
+    if isinstance(valor, datetime):
+        return valor.timestamp()
+    if isinstance(valor, date):
+        return datetime(valor.year, valor.month, valor.day).timestamp()
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    try:
+        return float(valor)
+    except ValueError:
+        return datetime.fromisoformat(str(valor).strip()).timestamp()
+
+
+def _formatar_data(quando: float) -> str:
+    return datetime.fromtimestamp(quando).strftime("%d/%m/%Y %H:%M") if quando else "(sem data)"
 
 
 class Animal:
-    def __init__(self, nome: str, especie: str, raca: str, idade: int, tutor_cpf: str):
+    __slots__ = ("_id", "_nome", "_especie", "_raca", "_idade", "_tutor_cpf", "_tabela",
+                 "_hist_servicos", "_hist_precos", "_hist_datas", "_servicos_pendentes")
+
+    def __init__(self, nome: str, especie: str, raca: str, idade: int, tutor_cpf: str, animal_id: str = None,
+                 tabela: TabelaServicos = None):
+        self._id = animal_id or uuid.uuid4().hex
         self._nome = nome.strip()
-        self._especie = especie.strip().lower()
-        self._raca = raca.strip()
+        self._especie = sys.intern(especie.strip().lower())
+        self._raca = sys.intern(raca.strip())
         self._idade = int(idade)
-        self._tutor_cpf = tutor_cpf.strip()
-        self._servicos_realizados: List[Servico] = []
+        self._tutor_cpf = sys.intern(tutor_cpf.strip())
+        # tabela do PetShop dono do animal; um animal avulso tem a sua própria
+        self._tabela = tabela if tabela is not None else TabelaServicos()
+        self._hist_servicos = array("I")
+        self._hist_precos = array("d")
+        # momento de cada serviço (epoch, em ordem crescente); 0.0 = registro antigo, sem data
+        self._hist_datas = array("d")
+        # histórico ainda não materializado (modo preguiçoso): sequência de dicts fatiável
+        self._servicos_pendentes: Optional[Sequence[Dict[str, Any]]] = None
+
+    @property
+    def id(self) -> str:
+        return self._id
 
     @property
     def nome(self) -> str:
@@ -93,7 +207,7 @@ class Animal:
 
     @raca.setter
     def raca(self, valor: str):
-        self._raca = valor.strip()
+        self._raca = sys.intern(valor.strip())
 
     @property
     def idade(self) -> int:
@@ -109,12 +223,94 @@ class Animal:
 
     @property
     def servicos_realizados(self) -> List[Servico]:
-        return list(self._servicos_realizados)
+        self._materializar_servicos()
+        return [self._tabela.do_registro(i, p) for i, p in zip(self._hist_servicos, self._hist_precos)]
+
+    @property
+    def total_servicos(self) -> int:
+        if self._servicos_pendentes is not None:
+            return len(self._servicos_pendentes)
+        return len(self._hist_servicos)
 
-    def realizar_servico(self, servico: Servico):
+    @property
+    def historico_carregado(self) -> bool:
+        return self._servicos_pendentes is None
+
+    def servicos_pagina(self, inicio: int = 0, quantidade: int = None) -> List[Servico]:
+        fim = None if quantidade is None else inicio + quantidade
+        if self._servicos_pendentes is not None:
+            return [self._tabela.de_dict(d) for d in self._servicos_pendentes[inicio:fim]]
+        return [self._tabela.do_registro(i, p) for i, p in zip(self._hist_servicos[inicio:fim], self._hist_precos[inicio:fim])]
+
+    def historico_pagina(self, inicio: int = 0, quantidade: int = None) -> List[Tuple[float, Servico]]:
+        fim = None if quantidade is None else inicio + quantidade
+        if self._servicos_pendentes is not None:
+            return [(float(d.get("realizado_em") or 0.0), self._tabela.de_dict(d)) for d in self._servicos_pendentes[inicio:fim]]
+        return [(q, self._tabela.do_registro(i, p)) for q, i, p in
+                zip(self._hist_datas[inicio:fim], self._hist_servicos[inicio:fim], self._hist_precos[inicio:fim])]
+
+    def servicos_entre(self, inicio: float, fim: float) -> List[Tuple[float, Servico]]:
+        self._materializar_servicos()
+        datas = self._hist_datas
+        a = bisect_left(datas, inicio)
+        b = bisect_left(datas, fim, a)
+        return [(q, self._tabela.do_registro(i, p)) for q, i, p in
+                zip(datas[a:b], self._hist_servicos[a:b], self._hist_precos[a:b])]
+
+    def _materializar_servicos(self):
+        if self._servicos_pendentes is None:
+            return
+        pendentes = self._servicos_pendentes[:]
+        self._servicos_pendentes = None
+        self._carregar_historico(pendentes)
+
+    def _carregar_historico(self, registros: Sequence[Dict[str, Any]]):
+        indices = self._hist_servicos
+        precos = self._hist_precos
+        datas = self._hist_datas
+        indice_por_nome = self._tabela.indice_por_nome
+        for d in registros:
+            quando = float(d.get("realizado_em") or 0.0)
+            if datas and quando < datas[-1]:
+                self._inserir_registro(indice_por_nome(d["nome"], d["preco"]), float(d["preco"]), quando)
+                continue
+            indices.append(indice_por_nome(d["nome"], d["preco"]))
+            precos.append(float(d["preco"]))
+            datas.append(quando)
+
+    def _inserir_registro(self, idx: int, preco: float, quando: float):
+        # registro fora de ordem (importação, relógio ajustado): mantém o histórico ordenado por data
+        pos = bisect_right(self._hist_datas, quando)
+        self._hist_servicos.insert(pos, idx)
+        self._hist_precos.insert(pos, preco)
+        self._hist_datas.insert(pos, quando)
+
+    def iterar_historico(self, tamanho_pagina: int = 1000) -> Iterator[Tuple[str, float, float]]:
+        if self._servicos_pendentes is None:
+            tabela = self._tabela.servicos
+            for i, p, q in zip(self._hist_servicos, self._hist_precos, self._hist_datas):
+                yield tabela[i].nome, p, q
+            return
+        inicio = 0
+        while True:
+            pagina = self._servicos_pendentes[inicio:inicio + tamanho_pagina]
+            for d in pagina:
+                yield d["nome"].strip(), float(d["preco"]), float(d.get("realizado_em") or 0.0)
+            if len(pagina) < tamanho_pagina:
+                return
+            inicio += tamanho_pagina
+
+    def realizar_servico(self, servico: Servico, quando: float = None):
         if not isinstance(servico, Servico):
             raise TypeError("servico precisa ser uma instância de Servico")
-        self._servicos_realizados.append(servico)
+        self._materializar_servicos()
+        quando = time.time() if quando is None else float(quando)
+        if self._hist_datas and quando < self._hist_datas[-1]:
+            self._inserir_registro(self._tabela.indice_servico(servico), servico.preco, quando)
+            return
+        self._hist_servicos.append(self._tabela.indice_servico(servico))
+        self._hist_precos.append(servico.preco)
+        self._hist_datas.append(quando)
 
     def __str__(self) -> str:
         return f"{self._nome} - {self._especie.title()} / {self._raca} / {self._idade} anos (Tutor CPF: {self._tutor_cpf})"
@@ -122,189 +318,1158 @@ class Animal:
     def to_dict(self) -> Dict[str, Any]:
         return {
             "class": self.__class__.__name__,
+            "id": self._id,
             "nome": self._nome,
             "especie": self._especie,
             "raca": self._raca,
             "idade": self._idade,
             "tutor_cpf": self._tutor_cpf,
-            "servicos_realizados": [s.to_dict() for s in self._servicos_realizados],
+            "servicos_realizados": self._historico_dicts(),
         }
 
+    def _historico_dicts(self) -> List[Dict[str, Any]]:
+        if self._servicos_pendentes is not None:
+            return list(self._servicos_pendentes[:])
+        tabela = self._tabela.servicos
+        return [{"nome": tabela[i].nome, "preco": p, "realizado_em": q}
+                for i, p, q in zip(self._hist_servicos, self._hist_precos, self._hist_datas)]
+
     @staticmethod
-    def from_dict(d: Dict[str, Any]) -> "Animal":
+    def from_dict(d: Dict[str, Any], preguicoso: bool = False, tabela: TabelaServicos = None) -> "Animal":
         cls_name = d.get("class", "Animal")
         nome = d.get("nome", "")
         especie = d.get("especie", "outro")
         raca = d.get("raca", "")
         idade = d.get("idade", 0)
         tutor_cpf = d.get("tutor_cpf", "")
-        if cls_name == "Cachorro":
-            a = Cachorro(nome, raca, idade, tutor_cpf)
-        elif cls_name == "Gato":
-            a = Gato(nome, raca, idade, tutor_cpf)
-        else:
-            a = OutroAnimal(nome, raca, idade, tutor_cpf)
+        animal_id = d.get("id")
+        a = _CLASSES_ANIMAL.get(cls_name, OutroAnimal)(nome, raca, idade, tutor_cpf, animal_id, tabela)
         servs = d.get("servicos_realizados", [])
-        for sdict in servs:
-            a._servicos_realizados.append(Servico.from_dict(sdict))
+        if preguicoso:
+            a._servicos_pendentes = servs
+        else:
+            a._carregar_historico(servs)
         return a
 
 
 class Cachorro(Animal):
-    def __init__(self, nome: str, raca: str, idade: int, tutor_cpf: str):
-        super().__init__(nome, "cachorro", raca, idade, tutor_cpf)
+    __slots__ = ()
+
+    def __init__(self, nome: str, raca: str, idade: int, tutor_cpf: str, animal_id: str = None,
+                 tabela: TabelaServicos = None):
+        super().__init__(nome, "cachorro", raca, idade, tutor_cpf, animal_id, tabela)
 
     def late(self):
         return "Au au!"
 
 
 class Gato(Animal):
-    def __init__(self, nome: str, raca: str, idade: int, tutor_cpf: str):
-        super().__init__(nome, "gato", raca, idade, tutor_cpf)
+    __slots__ = ()
+
+    def __init__(self, nome: str, raca: str, idade: int, tutor_cpf: str, animal_id: str = None,
+                 tabela: TabelaServicos = None):
+        super().__init__(nome, "gato", raca, idade, tutor_cpf, animal_id, tabela)
 
     def miar(self):
         return "Miau!"
 
 
 class OutroAnimal(Animal):
-    def __init__(self, nome: str, raca: str, idade: int, tutor_cpf: str):
-        super().__init__(nome, "outro", raca, idade, tutor_cpf)
+    __slots__ = ()
+
+    def __init__(self, nome: str, raca: str, idade: int, tutor_cpf: str, animal_id: str = None,
+                 tabela: TabelaServicos = None):
+        super().__init__(nome, "outro", raca, idade, tutor_cpf, animal_id, tabela)
+
+
+_CLASSES_ANIMAL = {"Cachorro": Cachorro, "Gato": Gato, "OutroAnimal": OutroAnimal}
+
+
+def _array_de_coluna(tipo: str, coluna, ordem_bytes: str) -> array:
+    if isinstance(coluna, bytes):
+        arr = array(tipo)
+        arr.frombytes(coluna)
+        if ordem_bytes != sys.byteorder:
+            arr.byteswap()
+        return arr
+    return array(tipo, coluna)
+
+
+def _novo_animal(nome: str, especie: str, raca: str, idade: int, tutor_cpf: str, animal_id: str = None) -> Animal:
+    especie_clean = especie.strip().lower()
+    if especie_clean == "cachorro":
+        return Cachorro(nome, raca, idade, tutor_cpf, animal_id)
+    if especie_clean == "gato":
+        return Gato(nome, raca, idade, tutor_cpf, animal_id)
+    return OutroAnimal(nome, raca, idade, tutor_cpf, animal_id)
 
 
 class PetShop:
-    def __init__(self, data_file: str = DATA_FILE):
-        self.data_file = data_file
+    def __init__(self, data_file: str = DATA_FILE, journal: bool = False, compactar_a_cada: int = 1000, armazenamento=None,
+                 historico_preguicoso: bool = False, autosave_intervalo: float = None, formato: str = None,
+                 carregar: bool = True, agendar_flush: Callable[[], Any] = None, cache: bool = False,
+                 metricas: bool = False, backup_a_cada: int = 0, fragmentos: int = 0, sob_demanda: bool = False,
+                 paralelismo: int = 1, processos: bool = False):
+        self.metricas = Metricas(ativo=metricas)
+        self.armazenamento = armazenamento or criar_armazenamento(data_file, journal, compactar_a_cada, formato, cache,
+                                                                  fragmentos, sob_demanda, paralelismo, processos)
+        self.data_file = self.armazenamento.path
+        # armazenamento fragmentado sob demanda: consultas por tutor carregam só o fragmento dele
+        # e as que atravessam todos os tutores carregam o resto antes de rodar
+        self._sob_demanda = getattr(self.armazenamento, "sob_demanda", False)
+        self.backups = RepositorioBackup(self.data_file + BACKUP_SUFIXO)
+        # com backup_a_cada > 0, um snapshot é tirado depois de tantas operações gravadas
+        self.backup_a_cada = backup_a_cada
+        self._ops_desde_backup = 0
+        # só adia os históricos quando o armazenamento os pagina do disco: num arquivo JSON eles
+        # já foram lidos inteiros, e guardar os dicts crus custa mais memória que os arrays compactos
+        self.historico_preguicoso = historico_preguicoso and getattr(self.armazenamento, "historico_paginado", False)
+        self.autosave_intervalo = autosave_intervalo
+        # quem for dono de uma thread de I/O pode assumir a gravação: as mutações só
+        # acumulam operações e agendar_flush() é chamado para que flush() rode depois
+        self.agendar_flush = agendar_flush
+        self._lock = threading.RLock()
+        self._nivel_transacao = 0
+        self._ops_pendentes: List[Tuple[str, Dict[str, Any]]] = []
+        self._timer_autosave: Optional[threading.Timer] = None
+        self._autosave_desde = 0.0
         self.tutores: Dict[str, Tutor] = {}
         self.animais: List[Animal] = []
         self.servicos_catalogo: Dict[str, Servico] = {}
+        # tabela dos serviços referenciados pelos históricos deste PetShop
+        self._tabela_servicos = TabelaServicos()
+        self._animais_por_id: Dict[str, Animal] = {}
+        self._idx_nome: Dict[str, List[Animal]] = {}
+        self._idx_tutor: Dict[str, List[Animal]] = {}
+        self._idx_especie: Dict[str, List[Animal]] = {}
+        # montado na primeira busca e mantido incrementalmente a partir daí
+        self._busca: Optional[IndiceBusca] = None
+        self._analise: Optional[Analise] = None
+        self._linha_do_tempo: Optional[LinhaDoTempo] = None
+        self.agenda = Agenda()
+        # relatórios renderizados; cada mutação invalida só os que dependem do que ela mudou
+        self.relatorios = CacheRelatorios()
+        # alterações descartadas ao mesclar com gravações de outro processo
+        self.conflitos: List[str] = []
         self._inicializar_servicos_basicos()
-        self.load_from_file()
+        if carregar:
+            self.load_from_file()
+
+    @staticmethod
+    def _normalizar_nome(nome: str) -> str:
+        return nome.strip().lower()
+
+    def _indexar_animal(self, animal: Animal):
+        self._animais_por_id[animal.id] = animal
+        self._idx_nome.setdefault(self._normalizar_nome(animal.nome), []).append(animal)
+        self._idx_tutor.setdefault(animal.tutor_cpf, []).append(animal)
+        self._idx_especie.setdefault(animal.especie, []).append(animal)
+        if self._busca is not None:
+            self._busca.adicionar(("animal", animal.id), self._campos_busca_animal(animal))
+
+    def _desindexar_animal(self, animal: Animal):
+        self._animais_por_id.pop(animal.id, None)
+        if self._busca is not None:
+            self._busca.remover(("animal", animal.id))
+        for idx, chave in ((self._idx_nome, self._normalizar_nome(animal.nome)),
+                           (self._idx_tutor, animal.tutor_cpf),
+                           (self._idx_especie, animal.especie)):
+            lista = idx.get(chave)
+            if not lista:
+                continue
+            lista.remove(animal)
+            if not lista:
+                del idx[chave]
+
+    def _garantir_cpf(self, cpf: str):
+        if self._sob_demanda:
+            with self._lock:
+                self.armazenamento.garantir_cpf(self, cpf)
+
+    def _garantir_todos(self):
+        if self._sob_demanda and not self.armazenamento.todos_carregados():
+            with self._lock:
+                self.armazenamento.garantir_todos(self)
+
+    def _anexar_fragmento(self, raw: Dict[str, Any]):
+        # índices derivados são remontados na próxima consulta em vez de crescer registro a registro
+        self._busca = None
+        self._analise = None
+        self._linha_do_tempo = None
+        for td in raw.get("tutores", []):
+            t = Tutor.from_dict(td)
+            self.tutores[t.cpf] = t
+        for ad in raw.get("animais", []):
+            a = Animal.from_dict(ad, self.historico_preguicoso, self._tabela_servicos)
+            self.animais.append(a)
+            self._indexar_animal(a)
+        self.relatorios.limpar()
+
+    def _reconstruir_indices(self):
+        self._animais_por_id = {}
+        self._idx_nome = {}
+        self._idx_tutor = {}
+        self._idx_especie = {}
+        self._busca = None
+        self._analise = None
+        self._linha_do_tempo = None
+        self.relatorios.limpar()
+        for a in self.animais:
+            self._indexar_animal(a)
+
+    @staticmethod
+    def _campos_busca_animal(animal: Animal) -> List[Tuple[str, float]]:
+        return [(animal.nome, 1.0), (animal.raca, 0.6)]
+
+    @staticmethod
+    def _campos_busca_tutor(tutor: Tutor) -> List[Tuple[str, float]]:
+        # telefone e CPF entram só com os dígitos para casar com qualquer formatação digitada;
+        # o telefone também sem o DDD, que quase nunca é digitado no balcão
+        telefone = "".join(c for c in tutor.telefone if c.isdigit())
+        cpf = "".join(c for c in tutor.cpf if c.isdigit())
+        return [(tutor.nome, 1.0), (telefone, 0.8), (telefone[2:] if len(telefone) >= 10 else "", 0.8),
+                (cpf, 0.8)]
+
+    def preparar_busca(self):
+        # monta o índice de busca já, para a primeira busca não pagar por ele
+        with self._lock:
+            self._indice_busca()
+
+    def _indice_busca(self) -> IndiceBusca:
+        if self._busca is None:
+            documentos = [(("tutor", t.cpf), self._campos_busca_tutor(t)) for t in self.tutores.values()]
+            documentos.extend((("animal", a.id), self._campos_busca_animal(a)) for a in self.animais)
+            self._busca = IndiceBusca.construir(documentos)
+        return self._busca
 
     def _inicializar_servicos_basicos(self):
         if not self.servicos_catalogo:
-            self.adicionar_servico_catalogo(Servico("Banho", 40.0))
-            self.adicionar_servico_catalogo(Servico("Tosa", 60.0))
-            self.adicionar_servico_catalogo(Servico("Consulta", 80.0))
+            for s in (Servico("Banho", 40.0), Servico("Tosa", 60.0), Servico("Consulta", 80.0)):
+                self.servicos_catalogo[s.nome.lower()] = s
+                self._tabela_servicos.indice_servico(s, substituir=True)
 
     def to_dict(self) -> Dict[str, Any]:
+        self._garantir_todos()
         return {
             "tutores": [t.to_dict() for t in self.tutores.values()],
             "animais": [a.to_dict() for a in self.animais],
             "servicos_catalogo": [s.to_dict() for s in self.servicos_catalogo.values()],
+            "agendamentos": self.agenda.registros(),
         }
 
-    def save_to_file(self, path: str = None):
-        path = path or self.data_file
-        try:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Aviso: não foi possível salvar os dados em '{path}': {e}")
+    def to_colunas(self, binario: bool = False) -> Dict[str, Any]:
+        self._garantir_todos()
+        tutores = list(self.tutores.values())
+        catalogo = list(self.servicos_catalogo.values())
+        animais = self.animais
+        indices = array("I")
+        precos = array("d")
+        datas = array("d")
+        n_servicos = []
+        agendamentos = self.agenda.registros()
+        tabela = self._tabela_servicos.servicos
+        for a in animais:
+            if a._servicos_pendentes is not None:
+                pendentes = a._servicos_pendentes[:]
+                indices.extend(self._tabela_servicos.indice_por_nome(d["nome"], d["preco"]) for d in pendentes)
+                precos.extend(float(d["preco"]) for d in pendentes)
+                datas.extend(float(d.get("realizado_em") or 0.0) for d in pendentes)
+                n_servicos.append(len(pendentes))
+            else:
+                indices.extend(a._hist_servicos)
+                precos.extend(a._hist_precos)
+                datas.extend(a._hist_datas)
+                n_servicos.append(len(a._hist_servicos))
+        return {
+            "formato": FORMATO_COLUNAR,
+            "versao": 1,
+            "tutores": {
+                "nome": [t.nome for t in tutores],
+                "cpf": [t.cpf for t in tutores],
+                "telefone": [t.telefone for t in tutores],
+            },
+            "servicos_catalogo": {
+                "nome": [s.nome for s in catalogo],
+                "preco": [s.preco for s in catalogo],
+                "categoria": [s.categoria for s in catalogo],
+            },
+            "animais": {
+                "id": [a.id for a in animais],
+                "classe": [a.__class__.__name__ for a in animais],
+                "nome": [a.nome for a in animais],
+                "raca": [a.raca for a in animais],
+                "idade": [a.idade for a in animais],
+                "tutor_cpf": [a.tutor_cpf for a in animais],
+                "n_servicos": n_servicos,
+            },
+            "servicos": {
+                "tabela_nome": [s.nome for s in tabela],
+                "tabela_preco": [s.preco for s in tabela],
+                "ordem_bytes": sys.byteorder,
+                "servico": indices.tobytes() if binario else indices.tolist(),
+                "preco": precos.tobytes() if binario else precos.tolist(),
+                "realizado_em": datas.tobytes() if binario else datas.tolist(),
+            },
+            "agendamentos": {campo: [r[campo] for r in agendamentos] for campo in CAMPOS_AGENDAMENTO},
+        }
 
+    @medido("salvar")
+    def save_to_file(self, path: str = None):
+        with self._lock:
+            if path and path != self.data_file:
+                ArmazenamentoJSON(path).salvar(self)
+                return
+            with self.armazenamento.travar():
+                self.flush()
+                self._atualizar_antes_de_gravar()
+                self.armazenamento.salvar(self)
+
+    @medido("compactar")
+    def compactar(self):
+        with self._lock, self.armazenamento.travar():
+            self.flush()
+            self._atualizar_antes_de_gravar()
+            self.armazenamento.compactar(self)
+
+    def _atualizar_antes_de_gravar(self):
+        # sem operações pendentes, o estado em disco de outro processo é mais novo que o nosso:
+        # regravar a memória sem recarregar apagaria as alterações dele
+        if self.armazenamento.alterado():
+            self.armazenamento.carregar(self)
+
+    @medido("carregar")
     def load_from_file(self, path: str = None):
-        path = path or self.data_file
-        p = Path(path)
-        if not p.is_file():
-            return  
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                raw = json.load(f)
-            self.tutores = {}
-            for td in raw.get("tutores", []):
-                t = Tutor.from_dict(td)
-                self.tutores[t.cpf] = t
-            self.servicos_catalogo = {}
-            for sd in raw.get("servicos_catalogo", []):
+        with self._lock:
+            if path and path != self.data_file:
+                ArmazenamentoJSON(path).carregar(self)
+                return
+            self.flush()
+            self.armazenamento.carregar(self)
+
+    def flush(self):
+        # a gravação de um snapshot inteiro roda ao fechar a pilha, já fora de self._lock:
+        # mutações de outros threads não esperam a serialização e o fsync
+        with ExitStack() as adiadas, self._lock:
+            # o timer sai antes de qualquer retorno: um autosave disparado dentro de uma
+            # transação não pode deixar a referência presa e bloquear os próximos
+            if self._timer_autosave:
+                self._timer_autosave.cancel()
+                self._timer_autosave = None
+            if self._nivel_transacao or not self._ops_pendentes:
+                return
+            ops, self._ops_pendentes = self._ops_pendentes, []
+            self._persistir(ops, adiadas)
+
+    def fechar(self):
+        self.flush()
+        self.armazenamento.fechar()
+
+    @contextmanager
+    def transacao(self):
+        with self._lock:
+            if self._nivel_transacao == 0:
+                self.flush()
+            ponto = len(self._ops_pendentes)
+            self._nivel_transacao += 1
+            try:
+                yield self
+            except BaseException:
+                self._nivel_transacao -= 1
+                self._desfazer_ate(ponto)
+                raise
+            self._nivel_transacao -= 1
+            if self._nivel_transacao == 0:
+                self.flush()
+
+    @contextmanager
+    def leitura(self):
+        # para quem lê de outro thread: dentro do bloco nenhuma mutação muda o estado
+        with self._lock:
+            yield self
+
+    def _desfazer_ate(self, ponto: int):
+        # o armazenamento só contém o estado anterior à transação mais externa:
+        # recarrega e reaplica as operações que ficaram antes do ponto de salvamento
+        mantidas = self._ops_pendentes[:ponto]
+        self._ops_pendentes = []
+        self.servicos_catalogo = {}
+        self._inicializar_servicos_basicos()
+        self.armazenamento.carregar(self)
+        for op, dados in mantidas:
+            self._aplicar_operacao(op, dados)
+        self._ops_pendentes = mantidas
+
+    def _agendar_autosave(self):
+        # debounce: cada mutação adia a gravação para autosave_intervalo depois dela; uma
+        # sequência sem pausa ainda grava depois de AUTOSAVE_ESPERA_MAXIMA intervalos
+        agora = time.monotonic()
+        if self._timer_autosave is None:
+            self._autosave_desde = agora
+        elif agora - self._autosave_desde >= self.autosave_intervalo * AUTOSAVE_ESPERA_MAXIMA:
+            return
+        else:
+            self._timer_autosave.cancel()
+        self._timer_autosave = threading.Timer(self.autosave_intervalo, self.flush)
+        self._timer_autosave.daemon = True
+        self._timer_autosave.start()
+
+    def _restaurar_colunas(self, cols: Dict[str, Any]):
+        t = cols["tutores"]
+        tutores = {cpf: Tutor(nome, cpf, tel) for nome, cpf, tel in zip(t["nome"], t["cpf"], t["telefone"])}
+        c = cols["servicos_catalogo"]
+        catalogo = {}
+        for nome, preco, categoria in zip(c["nome"], c["preco"], c.get("categoria") or [""] * len(c["nome"])):
+            s = Servico(nome, preco, categoria)
+            catalogo[s.nome.lower()] = s
+            self._tabela_servicos.indice_servico(s, substituir=True)
+        self.servicos_catalogo = catalogo
+        sv = cols["servicos"]
+        indices = _array_de_coluna("I", sv["servico"], sv["ordem_bytes"])
+        precos = _array_de_coluna("d", sv["preco"], sv["ordem_bytes"])
+        if "realizado_em" in sv:
+            datas = _array_de_coluna("d", sv["realizado_em"], sv["ordem_bytes"])
+        else:
+            datas = array("d", bytes(precos.itemsize * len(precos)))
+        # os índices do arquivo referem-se à tabela de quem gravou: traduz para a tabela deste PetShop
+        tabela = self._tabela_servicos
+        mapa = [tabela.indice_por_nome(nome, preco) for nome, preco in zip(sv["tabela_nome"], sv["tabela_preco"])]
+        identidade = all(i == j for i, j in enumerate(mapa))
+        a = cols["animais"]
+        animais: List[Animal] = []
+        pos = 0
+        for animal_id, classe, nome, raca, idade, cpf, n in zip(a["id"], a["classe"], a["nome"], a["raca"],
+                                                                 a["idade"], a["tutor_cpf"], a["n_servicos"]):
+            animal = _CLASSES_ANIMAL.get(classe, OutroAnimal)(nome, raca, idade, cpf, animal_id, tabela)
+            if n:
+                fatia = indices[pos:pos + n]
+                animal._hist_servicos = fatia if identidade else array("I", [mapa[i] for i in fatia])
+                animal._hist_precos = precos[pos:pos + n]
+                animal._hist_datas = datas[pos:pos + n]
+                pos += n
+            animais.append(animal)
+        self.tutores = tutores
+        self.animais = animais
+        ag = cols.get("agendamentos", {})
+        self.agenda.carregar(dict(zip(CAMPOS_AGENDAMENTO, valores))
+                             for valores in zip(*(ag.get(campo, []) for campo in CAMPOS_AGENDAMENTO)))
+        self._reconstruir_indices()
+
+    def _restaurar(self, raw: Dict[str, Any]):
+        tutores: Dict[str, Tutor] = {}
+        for td in raw.get("tutores", []):
+            t = Tutor.from_dict(td)
+            tutores[t.cpf] = t
+        if "servicos_catalogo" in raw:
+            catalogo = {}
+            for sd in raw["servicos_catalogo"]:
                 s = Servico.from_dict(sd)
-                self.servicos_catalogo[s.nome.lower()] = s
-            self.animais = []
-            for ad in raw.get("animais", []):
-                a = Animal.from_dict(ad)
-                servs_restored: List[Servico] = []
-                for sdict in ad.get("servicos_realizados", []):
-                    nome_s = sdict.get("nome", "").strip().lower()
-                    serv_cat = self.servicos_catalogo.get(nome_s)
-                    if serv_cat:
-                        servs_restored.append(serv_cat)
-                    else:
-                        servs_restored.append(Servico.from_dict(sdict))
-                a._servicos_realizados = servs_restored
-                self.animais.append(a)
-        except Exception as e:
-            print(f"Aviso: falha ao carregar dados de '{path}': {e}")
+                catalogo[s.nome.lower()] = s
+                self._tabela_servicos.indice_servico(s, substituir=True)
+            self.servicos_catalogo = catalogo
+        animais: List[Animal] = []
+        for i, ad in enumerate(raw.get("animais", [])):
+            # arquivos antigos não têm id: usa um id determinístico para que o journal continue válido
+            ad.setdefault("id", f"legado-{i}")
+            animais.append(Animal.from_dict(ad, self.historico_preguicoso, self._tabela_servicos))
+        self.tutores = tutores
+        self.animais = animais
+        self.agenda.carregar(raw.get("agendamentos", []))
+        self._reconstruir_indices()
+
+    def _aplicar_operacao(self, op: str, dados: Dict[str, Any]):
+        # servico_realizado é de longe a operação mais frequente: testada primeiro
+        if op == "servico_realizado":
+            a = self._animais_por_id.get(dados.get("animal_id"))
+            if a is None and "animal" in dados:
+                matches = self.encontrar_animal_por_nome(dados["animal"])
+                a = matches[0] if matches else None
+            servico = self.obter_servico_por_nome(dados["servico"])
+            if "preco" in dados and (servico is None or servico.preco != dados["preco"]):
+                servico = Servico(dados["servico"], dados["preco"])
+            if a and servico:
+                # operações antigas não têm data: ficam como registro sem data, não como "agora"
+                quando = float(dados.get("realizado_em") or 0.0)
+                a.realizar_servico(servico, quando)
+                if self._analise is not None:
+                    self._analise.registrar(a, servico.nome, servico.preco, quando)
+                if self._linha_do_tempo is not None:
+                    self._linha_do_tempo.registrar(quando, a, servico.nome, servico.preco)
+                self.relatorios.invalidar(("historico", a.id), "servicos")
+        elif op == "tutor":
+            t = Tutor.from_dict(dados)
+            self.tutores[t.cpf] = t
+            self.relatorios.invalidar("tutores")
+            if self._busca is not None:
+                self._busca.adicionar(("tutor", t.cpf), self._campos_busca_tutor(t))
+        elif op == "animal":
+            a = Animal.from_dict(dados, tabela=self._tabela_servicos)
+            self.animais.append(a)
+            self._indexar_animal(a)
+            self.relatorios.invalidar("animais")
+        elif op == "servico_catalogo":
+            s = Servico.from_dict(dados)
+            self.servicos_catalogo[s.nome.lower()] = s
+            self._tabela_servicos.indice_servico(s, substituir=True)
+        elif op == "animal_atualizado":
+            a = self._animais_por_id.get(dados["id"])
+            if a is None:
+                return
+            self._desindexar_animal(a)
+            if "nome" in dados:
+                a.nome = dados["nome"]
+            if "raca" in dados:
+                a.raca = dados["raca"]
+            if "idade" in dados:
+                a.idade = dados["idade"]
+            self._indexar_animal(a)
+            self.relatorios.invalidar("animais")
+        elif op == "animal_removido":
+            a = self._animais_por_id.get(dados["id"])
+            if a is None:
+                return
+            if self._analise is not None:
+                self._analise.remover_animal(a)
+            self._linha_do_tempo = None
+            self._desindexar_animal(a)
+            self.animais.remove(a)
+            self.agenda.remover_animal(a.id)
+            self.relatorios.invalidar("animais", ("historico", a.id), "servicos")
+        elif op == "agendamento":
+            self.agenda.reservar(dados)
+        elif op == "agendamento_removido":
+            self.agenda.cancelar(dados["id"])
+        else:
+            raise ValueError(f"operação desconhecida no journal: {op}")
+
+    def _executar(self, op: str, dados: Dict[str, Any]) -> bool:
+        if self.metricas.ativo:
+            self.metricas.somar(f"operacoes.{op}")
+        with self._lock:
+            self._aplicar_operacao(op, dados)
+            if self._nivel_transacao:
+                self._ops_pendentes.append((op, dados))
+            elif self.agendar_flush:
+                self._ops_pendentes.append((op, dados))
+                if len(self._ops_pendentes) == 1:
+                    self.agendar_flush()
+            elif self.autosave_intervalo:
+                self._ops_pendentes.append((op, dados))
+                self._agendar_autosave()
+            else:
+                return not self._persistir([(op, dados)])
+            return True
+
+    @medido("persistir")
+    def _persistir(self, ops: List[Tuple[str, Dict[str, Any]]], adiadas: ExitStack = None) -> List[str]:
+        # otimista: só mescla se outro processo gravou desde a nossa última leitura ou escrita.
+        # Com adiadas, a trava do arquivo e a gravação do snapshot ficam nessa pilha, para quem
+        # chama fechá-la depois de soltar self._lock
+        escrita = None
+        trava = self.armazenamento.travar()
+        if adiadas is not None:
+            # registrado antes da trava, o snapshot automático roda depois de soltá-la: ele pega
+            # self._lock e depois a trava, a mesma ordem das outras escritas
+            adiadas.callback(self._snapshot_se_devido)
+            adiadas.enter_context(trava)
+        with ExitStack() as local:
+            if adiadas is None:
+                local.enter_context(trava)
+            conflitos: List[str] = []
+            if getattr(self.armazenamento, "verifica_conflitos", False):
+                # o banco confere cada operação na própria transação: nada de recarregar tudo
+                ops, rejeitadas = self.armazenamento.registrar_verificado(self, ops)
+                if rejeitadas:
+                    conflitos = [motivo for _, _, motivo in rejeitadas]
+                    self._recarregar_registros(rejeitadas)
+            else:
+                if self.armazenamento.alterado():
+                    ops, conflitos = self._mesclar(ops)
+                preparar = getattr(self.armazenamento, "preparar_lote", None)
+                if adiadas is not None and preparar is not None:
+                    escrita = preparar(self, ops)
+                else:
+                    self.armazenamento.registrar_lote(self, ops)
+        self.metricas.somar("operacoes_gravadas", len(ops))
+        self.metricas.somar("conflitos", len(conflitos))
+        for motivo in conflitos:
+            print(f"Aviso: alteração descartada: {motivo}")
+        self.conflitos.extend(conflitos)
+        if self.backup_a_cada:
+            self._ops_desde_backup += len(ops)
+        if escrita is not None:
+            adiadas.callback(escrita)
+        elif adiadas is None:
+            self._snapshot_se_devido()
+        return conflitos
+
+    def _snapshot_se_devido(self):
+        if not self.backup_a_cada or self._ops_desde_backup < self.backup_a_cada:
+            return
+        try:
+            self.criar_snapshot(f"automático após {self._ops_desde_backup} operações")
+        except OSError as e:
+            self.metricas.falha("snapshot", e)
+            print(f"Aviso: não foi possível criar o snapshot automático: {e}")
+
+    @medido("snapshot")
+    def criar_snapshot(self, descricao: str = "") -> Dict[str, Any]:
+        # só a leitura dos arquivos segura as travas; dividir e gravar os pedaços roda fora delas
+        with self._lock, self.armazenamento.travar():
+            self.flush()
+            arquivos = self.armazenamento.ler_para_backup()
+            self._ops_desde_backup = 0
+        return self.backups.criar(arquivos, descricao)
+
+    @medido("restaurar_snapshot")
+    def restaurar_snapshot(self, snapshot_id: str) -> bool:
+        manifesto = self.backups.obter(snapshot_id)
+        if manifesto is None:
+            return False
+        arquivos = self.backups.ler(manifesto)
+        with self._lock:
+            if self._nivel_transacao:
+                return False
+            with self.armazenamento.travar():
+                self.flush()
+                self.armazenamento.restaurar_backup(arquivos)
+                self.servicos_catalogo = {}
+                self._inicializar_servicos_basicos()
+                self.armazenamento.carregar(self)
+        return True
 
+    def _mesclar(self, ops: List[Tuple[str, Dict[str, Any]]]) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[str]]:
+        # parte do estado gravado pelo outro processo e reaplica as nossas operações,
+        # descartando as que deixaram de fazer sentido sobre ele
+        self.servicos_catalogo = {}
+        self._inicializar_servicos_basicos()
+        self.armazenamento.carregar(self)
+        aceitas = []
+        conflitos = []
+        for op, dados in ops:
+            motivo = self._conflito(op, dados)
+            if motivo:
+                conflitos.append(motivo)
+                continue
+            self._aplicar_operacao(op, dados)
+            aceitas.append((op, dados))
+        return aceitas, conflitos
+
+    def _recarregar_registros(self, rejeitadas: List[Tuple[str, Dict[str, Any], str]]):
+        # desfaz na memória as operações que o banco rejeitou relendo só as linhas que elas tocaram
+        cpfs: Set[str] = set()
+        animal_ids: Set[str] = set()
+        dias: Set[date] = set()
+        for op, dados, _ in rejeitadas:
+            if op == "tutor":
+                cpfs.add(dados["cpf"])
+            elif op == "animal":
+                cpfs.add(dados["tutor_cpf"])
+                animal_ids.add(dados["id"])
+            elif op in ("servico_realizado", "agendamento"):
+                if dados.get("animal_id"):
+                    animal_ids.add(dados["animal_id"])
+                if op == "agendamento":
+                    dias.add(datetime.fromtimestamp(dados["inicio"]).date())
+            elif op in ("animal_atualizado", "animal_removido"):
+                animal_ids.add(dados["id"])
+        raw = self.armazenamento.ler_registros(cpfs, animal_ids, dias, self.historico_preguicoso)
+        for cpf in cpfs:
+            self.tutores.pop(cpf, None)
+        for td in raw["tutores"]:
+            t = Tutor.from_dict(td)
+            self.tutores[t.cpf] = t
+        for animal_id in animal_ids:
+            a = self._animais_por_id.get(animal_id)
+            if a is not None:
+                self._desindexar_animal(a)
+                self.animais.remove(a)
+                self.agenda.remover_animal(animal_id)
+        for dia in dias:
+            for ag in self.agenda.do_dia(dia):
+                self.agenda.cancelar(ag["id"])
+        for ad in raw["animais"]:
+            a = Animal.from_dict(ad, self.historico_preguicoso, self._tabela_servicos)
+            self.animais.append(a)
+            self._indexar_animal(a)
+        for ag in raw["agendamentos"]:
+            if ag["id"] not in self.agenda:
+                self.agenda.reservar(ag)
+        self._busca = None
+        self._analise = None
+        self._linha_do_tempo = None
+        self.relatorios.limpar()
+
+    def _conflito(self, op: str, dados: Dict[str, Any]) -> Optional[str]:
+        if op == "tutor" and dados["cpf"] in self.tutores:
+            return f"CPF {dados['cpf']} já foi cadastrado em outra estação"
+        if op == "animal":
+            if dados["tutor_cpf"] not in self.tutores:
+                return f"tutor {dados['tutor_cpf']} não existe mais"
+            if dados.get("id") in self._animais_por_id:
+                return f"animal {dados['id']} já foi cadastrado em outra estação"
+        if op == "servico_realizado" and "animal_id" in dados and dados["animal_id"] not in self._animais_por_id:
+            return f"animal {dados['animal_id']} foi removido em outra estação"
+        if op in ("animal_atualizado", "animal_removido") and dados["id"] not in self._animais_por_id:
+            return f"animal {dados['id']} foi removido em outra estação"
+        if op == "agendamento":
+            if dados["animal_id"] not in self._animais_por_id:
+                return f"animal {dados['animal_id']} foi removido em outra estação"
+            motivo = self.agenda.conflito(dados)
+            if motivo:
+                return f"agendamento de {dados['servico']}: {motivo} em outra estação"
+        if op == "agendamento_removido" and dados["id"] not in self.agenda:
+            return f"agendamento {dados['id']} já foi cancelado ou concluído em outra estação"
+        return None
+
+    def consumir_conflitos(self) -> List[str]:
+        with self._lock:
+            conflitos, self.conflitos = self.conflitos, []
+            return conflitos
+
+    def recarregar_se_alterado(self) -> bool:
+        with self._lock:
+            if self._nivel_transacao or not self.armazenamento.alterado():
+                return False
+            self.flush()
+            if self.armazenamento.alterado():
+                self.armazenamento.carregar(self)
+            return True
+
+    @medido("cadastrar_tutor")
     def cadastrar_tutor(self, nome: str, cpf: str, telefone: str) -> bool:
         cpf = cpf.strip()
+        self._garantir_cpf(cpf)
         if cpf in self.tutores:
             return False
-        self.tutores[cpf] = Tutor(nome, cpf, telefone)
-        self.save_to_file()
-        return True
+        return self._executar("tutor", Tutor(nome, cpf, telefone).to_dict())
 
     def buscar_tutor(self, cpf: str) -> Tutor:
+        self._garantir_cpf(cpf.strip())
         return self.tutores.get(cpf.strip())
 
+    @medido("cadastrar_animal")
     def cadastrar_animal(self, nome: str, especie: str, raca: str, idade: int, tutor_cpf: str) -> bool:
         tutor_cpf = tutor_cpf.strip()
+        self._garantir_cpf(tutor_cpf)
         if tutor_cpf not in self.tutores:
             return False
-        especie_clean = especie.strip().lower()
-        if especie_clean == "cachorro":
-            animal = Cachorro(nome, raca, idade, tutor_cpf)
-        elif especie_clean == "gato":
-            animal = Gato(nome, raca, idade, tutor_cpf)
-        else:
-            animal = OutroAnimal(nome, raca, idade, tutor_cpf)
-        self.animais.append(animal)
-        self.save_to_file()
-        return True
+        return self._executar("animal", _novo_animal(nome, especie, raca, idade, tutor_cpf).to_dict())
+
+    def obter_animal(self, animal_id: str) -> Optional[Animal]:
+        animal = self._animais_por_id.get(animal_id.strip())
+        if animal is None and self._sob_demanda and not self.armazenamento.todos_carregados():
+            # o id não diz de qual tutor é o animal
+            self._garantir_todos()
+            animal = self._animais_por_id.get(animal_id.strip())
+        return animal
+
+    def _resolver_animal(self, referencia: str) -> Optional[Animal]:
+        animal = self.obter_animal(referencia)
+        if animal:
+            return animal
+        matches = self.encontrar_animal_por_nome(referencia)
+        # nomes repetidos são ambíguos: o chamador precisa informar o id
+        return matches[0] if len(matches) == 1 else None
+
+    @medido("atualizar_animal")
+    def atualizar_animal(self, animal_id: str, nome: str = None, raca: str = None, idade: int = None) -> bool:
+        animal = self.obter_animal(animal_id)
+        if not animal:
+            return False
+        dados: Dict[str, Any] = {"id": animal.id}
+        if nome is not None:
+            dados["nome"] = nome.strip()
+        if raca is not None:
+            dados["raca"] = raca.strip()
+        if idade is not None:
+            dados["idade"] = int(idade)
+        return self._executar("animal_atualizado", dados)
+
+    @medido("remover_animal")
+    def remover_animal(self, animal_id: str) -> bool:
+        animal = self.obter_animal(animal_id)
+        if not animal:
+            return False
+        return self._executar("animal_removido", {"id": animal.id})
 
     def encontrar_animal_por_nome(self, nome: str) -> List[Animal]:
-        nome = nome.strip().lower()
-        return [a for a in self.animais if a.nome.strip().lower() == nome]
+        self._garantir_todos()
+        return list(self._idx_nome.get(self._normalizar_nome(nome), []))
+
+    def animais_do_tutor(self, cpf: str) -> List[Animal]:
+        self._garantir_cpf(cpf.strip())
+        return list(self._idx_tutor.get(cpf.strip(), []))
+
+    def animais_por_especie(self, especie: str) -> List[Animal]:
+        self._garantir_todos()
+        return list(self._idx_especie.get(especie.strip().lower(), []))
+
+    @medido("buscar")
+    def buscar(self, texto: str, limite: int = 20, tipos: Sequence[str] = ("animal", "tutor"),
+               aproximado: bool = True) -> List[Tuple[str, Any]]:
+        if _TELEFONE.fullmatch(texto):
+            texto = "".join(c for c in texto if c.isdigit())
+        self._garantir_todos()
+        with self._lock:
+            aceitar = None if {"animal", "tutor"} <= set(tipos) else (lambda doc: doc[0] in tipos)
+            resultados = []
+            for (tipo, chave), _ in self._indice_busca().buscar(texto, limite, aproximado, aceitar):
+                obj = self._animais_por_id.get(chave) if tipo == "animal" else self.tutores.get(chave)
+                if obj is not None:
+                    resultados.append((tipo, obj))
+            return resultados
 
     def adicionar_servico_catalogo(self, servico: Servico):
-        self.servicos_catalogo[servico.nome.lower()] = servico
-
-        self.save_to_file()
+        self._executar("servico_catalogo", servico.to_dict())
 
     def obter_servico_por_nome(self, nome: str) -> Servico:
         return self.servicos_catalogo.get(nome.strip().lower())
 
-    def agendar_servico_para_animal(self, nome_animal: str, nome_servico: str) -> bool:
-        matches = self.encontrar_animal_por_nome(nome_animal)
-        if not matches:
+    def agendar_servico_para_animal(self, nome_animal: str, nome_servico: str, quando=None) -> bool:
+        animal = self._resolver_animal(nome_animal)
+        if not animal:
+            return False
+        return self.agendar_servico_por_id(animal.id, nome_servico, quando)
+
+    @medido("agendar_servico")
+    def agendar_servico_por_id(self, animal_id: str, nome_servico: str, quando=None) -> bool:
+        animal = self.obter_animal(animal_id)
+        if not animal:
             return False
         servico = self.obter_servico_por_nome(nome_servico)
         if not servico:
             return False
-        animal = matches[0]
-        animal.realizar_servico(servico)
-        self.save_to_file()
-        return True
-
-    def listar_todos_animais(self) -> List[str]:
-        return [str(a) for a in self.animais]
-
-    def listar_servicos_do_animal(self, nome_animal: str) -> List[str]:
-        matches = self.encontrar_animal_por_nome(nome_animal)
-        if not matches:
-            return []
-        animal = matches[0]
-        return [str(s) for s in animal.servicos_realizados]
+        return self._executar("servico_realizado", {"animal_id": animal.id, "servico": servico.nome, "preco": servico.preco,
+                                                    "realizado_em": _timestamp(quando) if quando is not None else time.time()})
+
+    @medido("agendar_horario")
+    def agendar_horario(self, referencia_animal: str, nome_servico: str, inicio=None) -> Optional[Dict[str, Any]]:
+        # sem horário, reserva o primeiro livre a partir de agora
+        with self._lock:
+            animal = self._resolver_animal(referencia_animal)
+            servico = self.obter_servico_por_nome(nome_servico)
+            if not animal or not servico:
+                return None
+            slots, recurso = self.agenda.duracao(servico.nome)
+            if inicio is None:
+                encontrado = self.agenda.proximo_livre(servico.nome, datetime.now())
+                if encontrado is None:
+                    return None
+                quando, profissional = encontrado
+                inicio = quando.timestamp()
+            else:
+                inicio = _timestamp(inicio)
+                profissional = self.agenda.encaixe(servico.nome, inicio)
+                if profissional is None:
+                    return None
+            dados = {"id": uuid.uuid4().hex, "animal_id": animal.id, "servico": servico.nome, "inicio": inicio,
+                     "duracao": slots * SLOT_MINUTOS, "recurso": recurso, "profissional": profissional}
+            return dados if self._executar("agendamento", dados) else None
+
+    def cancelar_agendamento(self, agendamento_id: str) -> bool:
+        if agendamento_id not in self.agenda:
+            return False
+        return self._executar("agendamento_removido", {"id": agendamento_id})
+
+    def concluir_agendamento(self, agendamento_id: str) -> bool:
+        # o serviço entra no histórico do animal com a data marcada e o horário é liberado
+        with self._lock:
+            dados = self.agenda.agendamentos.get(agendamento_id)
+            if dados is None:
+                return False
+            with self.transacao():
+                if not self.agendar_servico_por_id(dados["animal_id"], dados["servico"], dados["inicio"]):
+                    return False
+                self._executar("agendamento_removido", {"id": agendamento_id})
+            return True
+
+    def horarios_livres(self, nome_servico: str, dia: date = None) -> List[datetime]:
+        with self._lock:
+            return self.agenda.livres(nome_servico, dia or date.today())
+
+    def proximo_horario_livre(self, nome_servico: str, a_partir_de: datetime = None) -> Optional[datetime]:
+        with self._lock:
+            encontrado = self.agenda.proximo_livre(nome_servico, a_partir_de or datetime.now())
+            return encontrado[0] if encontrado else None
+
+    def agendamentos_do_dia(self, dia: date = None) -> List[Tuple[datetime, Animal, Dict[str, Any]]]:
+        self._garantir_todos()
+        with self._lock:
+            return [(datetime.fromtimestamp(r["inicio"]), self._animais_por_id[r["animal_id"]], r)
+                    for r in self.agenda.do_dia(dia or date.today()) if r["animal_id"] in self._animais_por_id]
+
+    def listar_todos_animais(self, inicio: int = 0, quantidade: int = None) -> List[str]:
+        self._garantir_todos()
+        with self._lock:
+            return self.relatorios.obter(("animais", inicio, quantidade), ("animais",),
+                                         lambda: self.iterar_animais(inicio, quantidade))
+
+    def iterar_animais(self, inicio: int = 0, quantidade: int = None) -> Iterator[str]:
+        # gera uma linha por vez, sem montar a listagem inteira
+        self._garantir_todos()
+        fim = None if quantidade is None else inicio + quantidade
+        for a in self.animais[inicio:fim]:
+            yield str(a)
+
+    def listar_servicos_do_animal(self, nome_animal: str, inicio: int = 0, quantidade: int = None) -> List[str]:
+        with self._lock:
+            animal = self._resolver_animal(nome_animal)
+            if not animal:
+                return []
+            return self.relatorios.obter(
+                ("servicos_do_animal", animal.id, inicio, quantidade), (("historico", animal.id),),
+                lambda: [f"{_formatar_data(q)} - {s}" for q, s in animal.historico_pagina(inicio, quantidade)])
+
+    def iterar_servicos_do_animal(self, nome_animal: str, tamanho_pagina: int = PAGINA_RELATORIO) -> Iterator[str]:
+        animal = self._resolver_animal(nome_animal)
+        if not animal:
+            return
+        inicio = 0
+        while True:
+            with self._lock:
+                pagina = animal.historico_pagina(inicio, tamanho_pagina)
+            if not pagina:
+                return
+            for q, s in pagina:
+                yield f"{_formatar_data(q)} - {s}"
+            inicio += len(pagina)
+
+    def _linha(self) -> LinhaDoTempo:
+        self._garantir_todos()
+        if self._linha_do_tempo is None:
+            self._linha_do_tempo = LinhaDoTempo.construir(self.animais)
+        return self._linha_do_tempo
+
+    @medido("servicos_entre")
+    def servicos_entre(self, inicio, fim, animal_id: str = None) -> List[Tuple[datetime, Animal, Servico]]:
+        inicio, fim = _timestamp(inicio), _timestamp(fim)
+        with self._lock:
+            if animal_id is not None:
+                animal = self.obter_animal(animal_id)
+                if not animal:
+                    return []
+                return [(datetime.fromtimestamp(q), animal, s) for q, s in animal.servicos_entre(inicio, fim)]
+            tabela = self._tabela_servicos
+            return [(datetime.fromtimestamp(q), a, tabela.do_registro(tabela.indice_por_nome(nome, preco), preco))
+                    for q, a, nome, preco in self._linha().entre(inicio, fim)]
+
+    def agenda_do_dia(self, dia: date = None) -> List[Tuple[datetime, Animal, Servico]]:
+        dia = dia or date.today()
+        return self.servicos_entre(dia, dia + timedelta(days=1))
+
+    @medido("receita_entre")
+    def receita_entre(self, inicio, fim) -> List[Linha]:
+        with self._lock:
+            return self._linha().agregar_entre(_timestamp(inicio), _timestamp(fim))
 
     def listar_tutores_e_animais(self) -> List[str]:
-        linhas = []
-        for cpf, tutor in self.tutores.items():
-            linhas.append(str(tutor))
-            animais_do_tutor = [a for a in self.animais if a.tutor_cpf == cpf]
+        self._garantir_todos()
+        with self._lock:
+            return self.relatorios.obter(("tutores_e_animais",), ("tutores", "animais"), self.iterar_tutores_e_animais)
+
+    def iterar_tutores_e_animais(self) -> Iterator[str]:
+        self._garantir_todos()
+        for cpf, tutor in list(self.tutores.items()):
+            yield str(tutor)
+            animais_do_tutor = list(self._idx_tutor.get(cpf, []))
             if animais_do_tutor:
                 for a in animais_do_tutor:
-                    linhas.append(f"  - {a.nome} ({a.especie.title()}, {a.raca}, {a.idade} anos)")
+                    yield f"  - {a.nome} ({a.especie.title()}, {a.raca}, {a.idade} anos)"
+            else:
+                yield "  - (sem animais cadastrados)"
+            yield ""
+
+    def analise(self) -> Analise:
+        # montada na primeira consulta; depois cada operação só atualiza os contadores
+        self._garantir_todos()
+        with self._lock:
+            if self._analise is None:
+                self._analise = Analise.construir(self.animais)
+            return self._analise
+
+    @medido("relatorio_receita")
+    def relatorio_receita(self, top: int = 10) -> List[str]:
+        self._garantir_todos()
+        with self._lock:
+            return self.relatorios.obter(("receita", top), ("servicos", "animais", "tutores"),
+                                         lambda: self._linhas_receita(top))
+
+    def _linhas_receita(self, top: int) -> List[str]:
+        with self._lock:
+            analise = self.analise()
+            linhas = [f"Total: {analise.quantidade} serviço(s), R$ {analise.receita:.2f} "
+                      f"(ticket médio R$ {analise.ticket_medio():.2f})", "", "Por serviço:"]
+            linhas.extend(f"  - {nome}: {qtd} x, R$ {receita:.2f}" for nome, qtd, receita in analise.servicos())
+            linhas.append("Por espécie:")
+            linhas.extend(f"  - {especie.title()}: {qtd} x, R$ {receita:.2f}" for especie, qtd, receita in analise.especies())
+            linhas.append("Por mês (últimos 12):")
+            for chave in analise.meses()[-12:]:
+                servicos = analise.servicos_do_mes(chave)
+                linhas.append(f"  - {chave}: {sum(q for _, q, _ in servicos)} x, R$ {sum(v for _, _, v in servicos):.2f} "
+                              f"({', '.join(f'{nome} R$ {v:.2f}' for nome, _, v in servicos)})")
+            linhas.append(f"Principais tutores (top {top}):")
+            for cpf, qtd, receita in analise.tutores(top):
+                tutor = self.tutores.get(cpf)
+                linhas.append(f"  - {tutor.nome if tutor else '?'} (CPF: {cpf}): {qtd} x, R$ {receita:.2f}")
+            return linhas
+
+    def tabela_precos(self, com_historico: bool = True) -> TabelaPrecos:
+        # com_historico=False basta para reajustar o catálogo e não materializa históricos preguiçosos
+        if com_historico:
+            self._garantir_todos()
+        with self._lock:
+            # preço e categoria vêm do catálogo deste PetShop; da tabela só sai a posição usada nos históricos
+            # a consulta não pode inserir na tabela: um serviço do catálogo que nenhum histórico usa
+            # ganha uma linha só nesta cópia, depois das que os históricos referenciam
+            tabela = self._tabela_servicos
+            catalogo: Dict[int, Servico] = {}
+            novos: List[Servico] = []
+            for s in self.servicos_catalogo.values():
+                i = tabela.indice.get(s.nome)
+                if i is None:
+                    novos.append(s)
+                else:
+                    catalogo[i] = s
+            servicos = []
+            for i, s in enumerate(tabela.servicos):
+                c = catalogo.get(i)
+                servicos.append((s.nome, s.categoria, s.preco, False) if c is None else (c.nome, c.categoria, c.preco, True))
+            servicos.extend((s.nome, s.categoria, s.preco, True) for s in novos)
+            if not com_historico:
+                return TabelaPrecos(servicos)
+            for a in self.animais:
+                a._materializar_servicos()
+            return TabelaPrecos(servicos, [(a._hist_servicos, a._hist_precos) for a in self.animais])
+
+    @medido("reajustar_precos")
+    def reajustar_precos(self, percentual: float, categorias: Iterable[str] = None,
+                         servicos: Iterable[str] = None) -> Dict[str, float]:
+        # todos os novos preços são gravados juntos, numa única operação de persistência
+        with self._lock:
+            novos = self.tabela_precos(com_historico=False).reajustar(percentual, categorias, servicos)
+            with self.transacao():
+                for nome, preco in novos.items():
+                    s = self.servicos_catalogo[nome.lower()]
+                    self._executar("servico_catalogo", Servico(s.nome, preco, s.categoria).to_dict())
+            return novos
+
+    @medido("simular_precos")
+    def simular_precos(self, percentual: float, categorias: Iterable[str] = None,
+                       servicos: Iterable[str] = None) -> Dict[str, Any]:
+        # quanto o histórico inteiro teria rendido com o reajuste, sem alterar nada
+        tabela = self.tabela_precos()
+        novos = tabela.reajustar(percentual, categorias, servicos)
+        simulacao = tabela.simular(novos)
+        simulacao["precos"] = novos
+        return simulacao
+
+    @medido("faturamento_por_animal")
+    def faturamento_por_animal(self) -> Dict[str, float]:
+        with self._lock:
+            tabela = self.tabela_precos()
+            return dict(zip((a.id for a in self.animais), tabela.totais()))
+
+    def estatisticas(self) -> Dict[str, Any]:
+        resumo = self.metricas.resumo()
+        with self._lock:
+            registros = {"tutores": len(self.tutores), "animais": len(self.animais),
+                         "servicos_catalogo": len(self.servicos_catalogo), "operacoes_pendentes": len(self._ops_pendentes)}
+            cache = self.relatorios.resumo()
+            registros.update({f"relatorios_{nome}": valor for nome, valor in cache.items()})
+            # contar o histórico exigiria materializá-lo: só entra se a análise já foi montada
+            if self._analise is not None:
+                registros["servicos_realizados"] = self._analise.quantidade
+        resumo["registros"] = registros
+        return resumo
+
+    def exportar_registros(self) -> Iterator[Dict[str, Any]]:
+        self._garantir_todos()
+        for s in list(self.servicos_catalogo.values()):
+            yield {"tipo": "catalogo", "nome": s.nome, "preco": s.preco, "categoria": s.categoria}
+        for t in list(self.tutores.values()):
+            yield {"tipo": "tutor", "nome": t.nome, "cpf": t.cpf, "telefone": t.telefone}
+        animais = list(self.animais)
+        for a in animais:
+            yield {"tipo": "animal", "id": a.id, "nome": a.nome, "especie": a.especie, "raca": a.raca,
+                   "idade": a.idade, "tutor_cpf": a.tutor_cpf}
+        for a in animais:
+            for nome, preco, quando in a.iterar_historico():
+                yield {"tipo": "servico", "animal_id": a.id, "servico": nome, "preco": preco, "realizado_em": quando}
+
+    @medido("importar")
+    def importar_registros(self, registros: Iterable[Dict[str, Any]], lote: int = 10000) -> Dict[str, Any]:
+        resultado: Dict[str, Any] = {"catalogo": 0, "tutor": 0, "animal": 0, "servico": 0, "rejeitados": 0, "erros": []}
+        registros = iter(registros)
+        # duplicados são detectados contra tudo o que já existe
+        self._garantir_todos()
+        with self._lock:
+            self.flush()
+            if getattr(self.armazenamento, "importacao_em_lotes", True):
+                # cada lote vira uma transação: memória constante e uma escrita por lote
+                while True:
+                    grupo = list(islice(registros, lote))
+                    if not grupo:
+                        break
+                    with self.transacao():
+                        for r in grupo:
+                            self._importar_registro(r, resultado, self._executar)
             else:
-                linhas.append("  - (sem animais cadastrados)")
-            linhas.append("")
-        return linhas
+                # armazenamento em arquivo: aplica tudo em memória e grava um único snapshot,
+                # com a trava obtida do início ao fim para nenhuma outra estação gravar no meio
+                with self.armazenamento.travar():
+                    self._atualizar_antes_de_gravar()
+                    try:
+                        for r in registros:
+                            self._importar_registro(r, resultado, self._aplicar_operacao)
+                    except BaseException:
+                        self._desfazer_ate(0)
+                        raise
+                    self.armazenamento.salvar(self)
+        return resultado
+
+    def _importar_registro(self, r: Dict[str, Any], resultado: Dict[str, Any], aplicar):
+        tipo = r.get("tipo")
+        try:
+            if tipo == "servico":
+                animal_id = str(r.get("animal_id", "")).strip()
+                if animal_id not in self._animais_por_id:
+                    raise ValueError(f"animal {animal_id} não encontrado")
+                servico = self.obter_servico_por_nome(str(r.get("servico", "")))
+                if not servico:
+                    raise ValueError(f"serviço '{r.get('servico')}' fora do catálogo")
+                preco = float(r["preco"]) if r.get("preco") is not None else servico.preco
+                aplicar("servico_realizado", {"animal_id": animal_id, "servico": servico.nome, "preco": preco,
+                                              "realizado_em": _timestamp(r.get("realizado_em"))})
+            elif tipo == "catalogo":
+                dados = {"nome": str(r["nome"]).strip(), "preco": float(r["preco"])}
+                if not dados["nome"]:
+                    raise ValueError("nome do serviço vazio")
+                aplicar("servico_catalogo", Servico(dados["nome"], dados["preco"], str(r.get("categoria") or "")).to_dict())
+            elif tipo == "tutor":
+                cpf = str(r.get("cpf", "")).strip()
+                if not cpf:
+                    raise ValueError("CPF vazio")
+                if cpf in self.tutores:
+                    raise ValueError(f"CPF {cpf} já cadastrado")
+                aplicar("tutor", Tutor(str(r.get("nome", "")), cpf, str(r.get("telefone", ""))).to_dict())
+            elif tipo == "animal":
+                tutor_cpf = str(r.get("tutor_cpf", "")).strip()
+                if tutor_cpf not in self.tutores:
+                    raise ValueError(f"tutor {tutor_cpf} não encontrado")
+                animal_id = str(r.get("id") or "").strip() or None
+                if animal_id and animal_id in self._animais_por_id:
+                    raise ValueError(f"animal {animal_id} já cadastrado")
+                animal = _novo_animal(str(r.get("nome", "")), str(r.get("especie", "outro")), str(r.get("raca", "")),
+                                      int(r.get("idade", 0)), tutor_cpf, animal_id)
+                aplicar("animal", animal.to_dict())
+            else:
+                raise ValueError(f"tipo de registro desconhecido: {tipo!r}")
+        except (KeyError, TypeError, ValueError) as e:
+            resultado["rejeitados"] += 1
+            if len(resultado["erros"]) < 20:
+                resultado["erros"].append(f"{tipo}: {e}")
+            return
+        resultado[tipo] += 1
 
 
 def menu_principal():
@@ -316,7 +1481,36 @@ def menu_principal():
     print("5 - Ver Catálogo de Serviços")
     print("6 - Adicionar Serviço ao Catálogo")
     print("7 - Salvar dados agora")
-    print("8 - Sair\n")
+    print(f"{OPCAO_SAIR} - Sair")
+    print("9 - Métricas de desempenho")
+    print("10 - Agenda de horários\n")
+
+
+def menu_agenda():
+    print("\n--- AGENDA ---")
+    print("1 - Reservar horário")
+    print("2 - Horários livres de um serviço")
+    print("3 - Agenda de um dia")
+    print("4 - Concluir atendimento")
+    print("5 - Cancelar agendamento")
+    print("6 - Voltar\n")
+
+
+def _ler_dia(texto: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(texto) if texto else date.today()
+    except ValueError:
+        print("Data inválida.")
+        return None
+
+
+def menu_metricas(petshop: PetShop):
+    print("\n--- MÉTRICAS ---")
+    print("1 - Mostrar métricas")
+    print(f"2 - {'Desligar' if petshop.metricas.ativo else 'Ligar'} coleta")
+    print(f"3 - {'Encerrar' if petshop.metricas.capturando() else 'Iniciar'} captura de perfil (cProfile/tracemalloc)")
+    print("4 - Zerar métricas")
+    print("5 - Voltar\n")
 
 
 def menu_relatorios():
@@ -324,11 +1518,388 @@ def menu_relatorios():
     print("1 - Listar todos os animais cadastrados")
     print("2 - Listar serviços realizados por um animal")
     print("3 - Listar tutores e seus respectivos animais")
-    print("4 - Voltar\n")
-
-
-def main():
-    petshop = PetShop()
+    print("4 - Receita por serviço, espécie e tutor")
+    print("5 - Serviços de um dia")
+    print("6 - Voltar\n")
+
+
+def escolher_animal(petshop: PetShop, nome_animal: str) -> str:
+    matches = petshop.encontrar_animal_por_nome(nome_animal)
+    if len(matches) <= 1:
+        return nome_animal
+    print(f"Há {len(matches)} animais chamados '{nome_animal}':")
+    for a in matches:
+        print(f" [{a.id}] {a}")
+    return input("Informe o id do animal: ").strip() or nome_animal
+
+
+def imprimir_paginado(linhas: Iterable[str], prefixo: str = "", tamanho: int = PAGINA_TERMINAL) -> int:
+    # pausa a cada página para listagens longas não rolarem direto pelo terminal
+    n = 0
+    for linha in linhas:
+        if n and n % tamanho == 0:
+            if input(f"-- {n} linha(s); Enter para continuar, 'q' para parar -- ").strip().lower() == "q":
+                break
+        print(prefixo + linha)
+        n += 1
+    return n
+
+
+# Ações sem interação: valem como subcomando da linha de comando e como linha de um lote
+ACOES = ("tutor", "animal", "atualizar", "remover", "servico", "catalogo", "reajustar", "agendar", "cancelar",
+         "concluir", "livres", "listar", "buscar", "estatisticas")
+
+
+def _adicionar_acoes(sub):
+    p = sub.add_parser("tutor", help="cadastra um tutor")
+    p.add_argument("nome")
+    p.add_argument("cpf")
+    p.add_argument("telefone", nargs="?", default="")
+    p = sub.add_parser("animal", help="cadastra um animal")
+    p.add_argument("nome")
+    p.add_argument("especie")
+    p.add_argument("raca")
+    p.add_argument("idade", type=int)
+    p.add_argument("tutor_cpf")
+    p = sub.add_parser("atualizar", help="altera nome, raça ou idade de um animal")
+    p.add_argument("id")
+    p.add_argument("--nome")
+    p.add_argument("--raca")
+    p.add_argument("--idade", type=int)
+    p = sub.add_parser("remover", help="remove um animal")
+    p.add_argument("id")
+    p = sub.add_parser("servico", help="registra um serviço realizado para um animal (nome ou id)")
+    p.add_argument("animal")
+    p.add_argument("servico")
+    p.add_argument("--quando", help="data/hora ISO 8601 (padrão: agora)")
+    p = sub.add_parser("catalogo", help="adiciona ou altera um serviço do catálogo")
+    p.add_argument("nome")
+    p.add_argument("preco", type=float)
+    p.add_argument("--categoria", default="")
+    p = sub.add_parser("reajustar", help="reajusta em PERCENTUAL os preços do catálogo")
+    p.add_argument("percentual", type=float)
+    p.add_argument("--categoria", action="append", help="só esta categoria (pode repetir)")
+    p.add_argument("--simular", action="store_true", help="só calcula o efeito sobre o histórico")
+    p = sub.add_parser("agendar", help="reserva um horário (o próximo livre sem --inicio)")
+    p.add_argument("animal")
+    p.add_argument("servico")
+    p.add_argument("--inicio", help="data/hora ISO 8601 na grade de 15 minutos")
+    p = sub.add_parser("cancelar", help="cancela um agendamento")
+    p.add_argument("id")
+    p = sub.add_parser("concluir", help="conclui um agendamento e registra o serviço")
+    p.add_argument("id")
+    p = sub.add_parser("livres", help="horários livres de um serviço num dia")
+    p.add_argument("servico")
+    p.add_argument("--dia", type=date.fromisoformat, help="AAAA-MM-DD (padrão: hoje)")
+    p = sub.add_parser("listar", help="relatórios em JSON")
+    p.add_argument("relatorio", choices=("animais", "tutores", "servicos", "receita"))
+    p.add_argument("animal", nargs="?", help="animal (nome ou id) do relatório de serviços")
+    p.add_argument("--inicio", type=int, default=0)
+    p.add_argument("--quantidade", type=int)
+    p = sub.add_parser("buscar", help="busca tutores e animais")
+    p.add_argument("texto")
+    p.add_argument("--limite", type=int, default=20)
+    sub.add_parser("estatisticas", help="métricas e contagem de registros")
+
+
+class _ParserLote(argparse.ArgumentParser):
+    # no lote, uma linha inválida vira falha daquela linha em vez de encerrar o processo;
+    # vale também para os subcomandos, que add_subparsers cria com esta mesma classe
+    def __init__(self, *args, **kwargs):
+        kwargs["add_help"] = False
+        super().__init__(*args, **kwargs)
+
+    def error(self, message):
+        raise ValueError(message)
+
+    def exit(self, status=0, message=None):
+        raise ValueError((message or "").strip() or f"saída com código {status}")
+
+
+def _parser_lote() -> argparse.ArgumentParser:
+    parser = _ParserLote(prog="lote")
+    _adicionar_acoes(parser.add_subparsers(dest="comando", required=True))
+    return parser
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="PetShop - cadastro de tutores, animais e serviços.")
+    parser.add_argument("--dados", default=DATA_FILE, help=f"arquivo de dados (.json, .db, .shards) (padrão: {DATA_FILE})")
+    parser.add_argument("--journal", action="store_true", help="grava as alterações em journal incremental")
+    parser.add_argument("--formato-dados", choices=FORMATOS_ARQUIVO,
+                        help="formato do arquivo de dados JSON (padrão: indentado; binario para .bin)")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="não usa o cache binário de inicialização (<dados>.cache)")
+    parser.add_argument("--metricas", action="store_true", help="liga a coleta de métricas de desempenho")
+    parser.add_argument("--limite-lento", type=float, metavar="MS",
+                        help="avisa operações mais lentas que MS milissegundos (padrão: 500)")
+    parser.add_argument("--backup-a-cada", type=int, default=0, metavar="N",
+                        help=f"tira um snapshot em <dados>{BACKUP_SUFIXO} a cada N alterações gravadas")
+    parser.add_argument("--fragmentos", type=int, default=0, metavar="N",
+                        help=f"divide os dados por tutor em N arquivos em <dados>{FRAGMENTOS_SUFIXO} "
+                             "(migra o arquivo único na primeira vez)")
+    parser.add_argument("--sob-demanda", action="store_true",
+                        help="com dados fragmentados, só carrega o fragmento de um tutor quando ele é consultado")
+    parser.add_argument("--paralelismo", type=int, default=1, metavar="N",
+                        help="com dados fragmentados, lê e grava até N fragmentos ao mesmo tempo")
+    parser.add_argument("--processos", action="store_true",
+                        help="com --paralelismo, interpreta os fragmentos em processos em vez de threads")
+    sub = parser.add_subparsers(dest="comando")
+    p_imp = sub.add_parser("importar", help="importa tutores, animais e serviços de um arquivo CSV ou JSON Lines")
+    p_imp.add_argument("arquivo")
+    p_imp.add_argument("--formato", choices=FORMATOS)
+    p_imp.add_argument("--lote", type=int, default=10000, help="registros por transação")
+    p_exp = sub.add_parser("exportar", help="exporta todos os dados para CSV ou JSON Lines")
+    p_exp.add_argument("arquivo")
+    p_exp.add_argument("--formato", choices=FORMATOS)
+    p_snap = sub.add_parser("snapshot", help="cria, lista, verifica, restaura ou poda snapshots dos dados")
+    p_snap.add_argument("acao", choices=("criar", "listar", "verificar", "restaurar", "podar"))
+    p_snap.add_argument("id", nargs="?", help="snapshot a restaurar (id, prefixo único ou 'ultimo')")
+    p_snap.add_argument("--descricao", default="")
+    p_snap.add_argument("--manter", type=int, default=10, help="snapshots mantidos ao podar")
+    _adicionar_acoes(sub)
+    p_lote = sub.add_parser("lote", help="executa ações de um arquivo (uma por linha, como na linha de comando) "
+                                         "numa única carga e gravação, com saída em JSON Lines")
+    p_lote.add_argument("arquivo", nargs="?", default="-", help="arquivo de comandos ('-' ou vazio = entrada padrão)")
+    p_lote.add_argument("--saida", help="grava o JSON em arquivo em vez da saída padrão")
+    p_lote.add_argument("--atomico", action="store_true", help="qualquer falha descarta todas as alterações do lote")
+    p_lote.add_argument("--so-resumo", action="store_true", help="omite o resultado de cada comando")
+    return parser
+
+
+def executar_snapshot(petshop: PetShop, args: argparse.Namespace) -> int:
+    if args.acao == "criar":
+        m = petshop.criar_snapshot(args.descricao)
+        tamanho = sum(info["tamanho"] for info in m["arquivos"].values())
+        print(f"Snapshot {m['id']} criado: {tamanho} bytes, {m['pedacos_novos']} pedaço(s) novo(s) "
+              f"({m['bytes_novos']} bytes gravados).")
+    elif args.acao == "listar":
+        snapshots = petshop.backups.listar()
+        if not snapshots:
+            print("(nenhum snapshot)")
+        for m in snapshots:
+            tamanho = sum(info["tamanho"] for info in m["arquivos"].values())
+            quando = datetime.fromtimestamp(m["criado_em"]).strftime("%d/%m/%Y %H:%M:%S")
+            print(f"{m['id']}  {quando}  {tamanho:>12} bytes  {m.get('descricao', '')}")
+    elif args.acao == "verificar":
+        problemas = petshop.backups.verificar()
+        for p in problemas:
+            print(f"  - {p}")
+        print(f"{len(petshop.backups.listar())} snapshot(s) verificados, {len(problemas)} problema(s).")
+        return 1 if problemas else 0
+    elif args.acao == "restaurar":
+        if not args.id:
+            print("Informe o snapshot a restaurar.")
+            return 2
+        if not petshop.restaurar_snapshot(args.id):
+            print(f"Snapshot '{args.id}' não encontrado (ou prefixo ambíguo).")
+            return 1
+        print(f"Dados restaurados do snapshot '{args.id}': {len(petshop.tutores)} tutores, {len(petshop.animais)} animais.")
+    else:
+        r = petshop.backups.podar(args.manter)
+        print(f"Removidos {r['snapshots']} snapshot(s) e {r['pedacos']} pedaço(s) sem uso.")
+    return 0
+
+
+def _para_json(valor: Any) -> Any:
+    if isinstance(valor, Animal):
+        return {"id": valor.id, "nome": valor.nome, "especie": valor.especie, "raca": valor.raca,
+                "idade": valor.idade, "tutor_cpf": valor.tutor_cpf}
+    if isinstance(valor, (Tutor, Servico)):
+        return valor.to_dict()
+    if isinstance(valor, datetime):
+        return valor.isoformat(timespec="minutes")
+    if isinstance(valor, dict):
+        return {k: _para_json(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_para_json(v) for v in valor]
+    return valor
+
+
+def executar_acao(petshop: PetShop, args: argparse.Namespace) -> Any:
+    # False ou None indicam que a ação não foi feita, como nos métodos do PetShop
+    c = args.comando
+    if c == "tutor":
+        return petshop.cadastrar_tutor(args.nome, args.cpf, args.telefone)
+    if c == "animal":
+        return petshop.cadastrar_animal(args.nome, args.especie, args.raca, args.idade, args.tutor_cpf)
+    if c == "atualizar":
+        return petshop.atualizar_animal(args.id, args.nome, args.raca, args.idade)
+    if c == "remover":
+        return petshop.remover_animal(args.id)
+    if c == "servico":
+        return petshop.agendar_servico_para_animal(args.animal, args.servico, args.quando)
+    if c == "catalogo":
+        if not args.nome.strip():
+            raise ValueError("nome do serviço vazio")
+        petshop.adicionar_servico_catalogo(Servico(args.nome, args.preco, args.categoria))
+        return True
+    if c == "reajustar":
+        if args.simular:
+            return petshop.simular_precos(args.percentual, args.categoria)
+        return petshop.reajustar_precos(args.percentual, args.categoria)
+    if c == "agendar":
+        return petshop.agendar_horario(args.animal, args.servico, args.inicio)
+    if c == "cancelar":
+        return petshop.cancelar_agendamento(args.id)
+    if c == "concluir":
+        return petshop.concluir_agendamento(args.id)
+    if c == "livres":
+        return petshop.horarios_livres(args.servico, args.dia)
+    if c == "listar":
+        if args.relatorio == "servicos":
+            if not args.animal or not petshop._resolver_animal(args.animal):
+                return None
+            return petshop.listar_servicos_do_animal(args.animal, args.inicio, args.quantidade)
+        if args.relatorio == "animais":
+            return petshop.listar_todos_animais(args.inicio, args.quantidade)
+        linhas = petshop.listar_tutores_e_animais() if args.relatorio == "tutores" else petshop.relatorio_receita()
+        return linhas[args.inicio:None if args.quantidade is None else args.inicio + args.quantidade]
+    if c == "buscar":
+        return petshop.buscar(args.texto, args.limite)
+    if c == "estatisticas":
+        return petshop.estatisticas()
+    raise ValueError(f"ação desconhecida: {c}")
+
+
+class LoteAbortado(Exception):
+    pass
+
+
+def executar_lote(petshop: PetShop, linhas: Iterable[str], saida, atomico: bool = False,
+                  so_resumo: bool = False, carga_ms: float = None) -> Dict[str, Any]:
+    # todas as ações rodam numa transação: a gravação acontece uma vez, no fim
+    parser = _parser_lote()
+    tempos: Dict[str, Histograma] = {}
+    resumo: Dict[str, Any] = {"comandos": 0, "ok": 0, "falhas": 0, "abortado": False}
+    inicio = time.perf_counter()
+    fim_execucao = None
+    try:
+        with petshop.transacao():
+            for n, linha in enumerate(linhas, 1):
+                linha = linha.strip()
+                if not linha or linha.startswith("#"):
+                    continue
+                t0 = time.perf_counter()
+                nome, erro, resultado = "invalido", None, None
+                try:
+                    tokens = shlex.split(linha)
+                    if tokens and tokens[0] in ACOES:
+                        nome = tokens[0]
+                    args = parser.parse_args(tokens)
+                    resultado = executar_acao(petshop, args)
+                except Exception as e:
+                    # uma ação que quebra não pode levar junto, pela transação, as linhas anteriores
+                    erro = str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}"
+                ok = erro is None and resultado is not False and resultado is not None
+                segundos = time.perf_counter() - t0
+                tempos.setdefault(nome, Histograma()).registrar(segundos)
+                resumo["comandos"] += 1
+                resumo["ok" if ok else "falhas"] += 1
+                if not so_resumo:
+                    registro = {"linha": n, "comando": nome, "ok": ok, "ms": round(segundos * 1000, 3)}
+                    if erro is not None:
+                        registro["erro"] = erro
+                    elif resultado is not True and resultado is not False:
+                        registro["resultado"] = _para_json(resultado)
+                    saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                if not ok and atomico:
+                    raise LoteAbortado(f"linha {n}: {erro or 'ação não realizada'}")
+            fim_execucao = time.perf_counter()
+    except LoteAbortado as e:
+        resumo["abortado"] = True
+        resumo["erro"] = str(e)
+    fim = time.perf_counter()
+    if fim_execucao is None:
+        fim_execucao = fim
+    if carga_ms is not None:
+        resumo["carga_ms"] = carga_ms
+    resumo["execucao_ms"] = round((fim_execucao - inicio) * 1000, 3)
+    resumo["gravacao_ms"] = round((fim - fim_execucao) * 1000, 3)
+    resumo["comandos_por_s"] = round(resumo["comandos"] / (fim - inicio), 1) if fim > inicio else 0.0
+    resumo["por_comando"] = {nome: h.resumo() for nome, h in sorted(tempos.items())}
+    saida.write(json.dumps({"resumo": resumo}, ensure_ascii=False) + "\n")
+    return resumo
+
+
+def _executar_json(args: argparse.Namespace, saida) -> int:
+    inicio = time.perf_counter()
+    petshop = PetShop(args.dados, journal=args.journal, historico_preguicoso=True, formato=args.formato_dados,
+                      cache=not args.sem_cache, fragmentos=args.fragmentos, sob_demanda=args.sob_demanda,
+                      paralelismo=args.paralelismo, processos=args.processos, metricas=args.metricas,
+                      backup_a_cada=args.backup_a_cada)
+    carga_ms = round((time.perf_counter() - inicio) * 1000, 3)
+    try:
+        if args.comando == "lote":
+            entrada = sys.stdin if args.arquivo == "-" else open(args.arquivo, encoding="utf-8")
+            if args.saida:
+                saida = open(args.saida, "w", encoding="utf-8")
+            try:
+                resumo = executar_lote(petshop, entrada, saida, args.atomico, args.so_resumo, carga_ms)
+            finally:
+                if entrada is not sys.stdin:
+                    entrada.close()
+                if args.saida:
+                    saida.close()
+            return 1 if resumo["falhas"] else 0
+        inicio = time.perf_counter()
+        resultado = executar_acao(petshop, args)
+        ok = resultado is not False and resultado is not None
+        registro = {"comando": args.comando, "ok": ok, "carga_ms": carga_ms,
+                    "ms": round((time.perf_counter() - inicio) * 1000, 3)}
+        if resultado is not True and resultado is not False:
+            registro["resultado"] = _para_json(resultado)
+        saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        return 0 if ok else 1
+    finally:
+        petshop.fechar()
+
+
+def executar_comando(args: argparse.Namespace) -> int:
+    if args.comando == "lote" or args.comando in ACOES:
+        # avisos do backend vão para a saída de erro: a saída padrão fica só com JSON
+        saida = sys.stdout
+        with redirect_stdout(sys.stderr):
+            return _executar_json(args, saida)
+    petshop = PetShop(args.dados, journal=args.journal, historico_preguicoso=True, formato=args.formato_dados,
+                      cache=not args.sem_cache, fragmentos=args.fragmentos, sob_demanda=args.sob_demanda,
+                      paralelismo=args.paralelismo, processos=args.processos)
+    inicio = time.perf_counter()
+    try:
+        if args.comando == "snapshot":
+            return executar_snapshot(petshop, args)
+        if args.comando == "importar":
+            r = importar_arquivo(petshop, args.arquivo, args.formato, args.lote)
+            total = r["catalogo"] + r["tutor"] + r["animal"] + r["servico"]
+            print(f"Importados {total} registros de '{args.arquivo}' em {time.perf_counter() - inicio:.2f}s "
+                  f"(catálogo: {r['catalogo']}, tutores: {r['tutor']}, animais: {r['animal']}, serviços: {r['servico']}).")
+            if r["rejeitados"]:
+                print(f"{r['rejeitados']} registro(s) rejeitado(s):")
+                for erro in r["erros"]:
+                    print(f"  - {erro}")
+            return 1 if r["rejeitados"] else 0
+        total = exportar_arquivo(petshop, args.arquivo, args.formato)
+        print(f"Exportados {total} registros para '{args.arquivo}' em {time.perf_counter() - inicio:.2f}s.")
+        return 0
+    finally:
+        petshop.fechar()
+
+
+def main(argv: List[str] = None):
+    args = criar_parser().parse_args(argv)
+    if args.comando:
+        try:
+            sys.exit(executar_comando(args))
+        except (OSError, ValueError) as e:
+            print(f"Erro: {e}")
+            sys.exit(2)
+
+    petshop = PetShop(args.dados, journal=args.journal, historico_preguicoso=True, formato=args.formato_dados,
+                      cache=not args.sem_cache, metricas=args.metricas, backup_a_cada=args.backup_a_cada,
+                      fragmentos=args.fragmentos, sob_demanda=args.sob_demanda, paralelismo=args.paralelismo,
+                      processos=args.processos)
+    if args.limite_lento is not None:
+        petshop.metricas.limite_lento = args.limite_lento / 1000
 
     print(f"(Arquivo de dados: {petshop.data_file})")
     print("Dados carregados. Iniciando aplicação...")
@@ -336,6 +1907,8 @@ def main():
     while True:
         menu_principal()
         opc = input("> ").strip()
+        if petshop.recarregar_se_alterado():
+            print("(dados atualizados com as alterações de outra estação)")
         if opc == "1":
             print("\n-- Cadastrar Tutor --")
             nome = input("Nome do tutor: ").strip()
@@ -363,7 +1936,7 @@ def main():
                 print("Idade inválida. Informe um número inteiro.")
         elif opc == "3":
             print("\n-- Agendar Serviço --")
-            nome_animal = input("Nome do animal: ").strip()
+            nome_animal = escolher_animal(petshop, input("Nome do animal: ").strip())
             print("Serviços disponíveis:")
             for s in petshop.servicos_catalogo.values():
                 print(f" - {s}")
@@ -379,59 +1952,144 @@ def main():
                 r = input("> ").strip()
                 if r == "1":
                     print("\n--- Todos os animais cadastrados ---")
-                    todos = petshop.listar_todos_animais()
-                    if not todos:
+                    if not imprimir_paginado(petshop.listar_todos_animais(), "- "):
                         print("(nenhum animal cadastrado)")
-                    else:
-                        for linha in todos:
-                            print("- " + linha)
                 elif r == "2":
-                    nome_animal = input("Nome do animal para ver serviços: ").strip()
+                    nome_animal = escolher_animal(petshop, input("Nome do animal para ver serviços: ").strip())
                     servs = petshop.listar_servicos_do_animal(nome_animal)
                     if not servs:
                         print(f"(nenhum serviço registrado para '{nome_animal}' ou animal não encontrado)")
                     else:
                         print(f"\n--- Serviços realizados por {nome_animal} ---")
-                        for s in servs:
-                            print(f"- {s}")
+                        imprimir_paginado(servs, "- ")
                 elif r == "3":
                     print("\n--- Tutores e seus respectivos animais ---")
-                    linhas = petshop.listar_tutores_e_animais()
-                    if not linhas:
+                    if not imprimir_paginado(petshop.listar_tutores_e_animais()):
                         print("(nenhum tutor cadastrado)")
-                    else:
-                        for l in linhas:
-                            print(l)
                 elif r == "4":
+                    print("\n--- Receita ---")
+                    imprimir_paginado(petshop.relatorio_receita())
+                elif r == "5":
+                    dia_raw = input("Data (AAAA-MM-DD, vazio = hoje): ").strip()
+                    try:
+                        dia = date.fromisoformat(dia_raw) if dia_raw else date.today()
+                    except ValueError:
+                        print("Data inválida.")
+                        continue
+                    agenda = petshop.agenda_do_dia(dia)
+                    print(f"\n--- Serviços em {dia.strftime('%d/%m/%Y')} ---")
+                    if not agenda:
+                        print("(nenhum serviço nesse dia)")
+                    for quando, animal, servico in agenda:
+                        print(f"- {quando.strftime('%H:%M')} {animal.nome} ({animal.id[:8]}): {servico}")
+                elif r == "6":
                     break
                 else:
                     print("Opção inválida. Tente novamente.")
         elif opc == "5":
             print("\n--- Catálogo de Serviços ---")
             for s in petshop.servicos_catalogo.values():
-                print(f"- {s}")
+                print(f"- {s} [{s.categoria}]")
         elif opc == "6":
             print("\n-- Adicionar Serviço ao Catálogo --")
             nome_serv = input("Nome do serviço: ").strip()
             preco_raw = input("Preço (ex.: 45.50): ").strip()
+            categoria = input(f"Categoria (vazio = {CATEGORIA_PADRAO}): ").strip()
             try:
                 preco = float(preco_raw)
                 if petshop.obter_servico_por_nome(nome_serv):
                     print("Serviço já existe no catálogo (use outro nome ou atualize).")
                 else:
-                    petshop.adicionar_servico_catalogo(Servico(nome_serv, preco))
+                    petshop.adicionar_servico_catalogo(Servico(nome_serv, preco, categoria))
                     print("Serviço adicionado ao catálogo.")
             except ValueError:
                 print("Preço inválido.")
         elif opc == "7":
             petshop.save_to_file()
             print(f"Dados salvos em '{petshop.data_file}'.")
-        elif opc == "8":
+        elif opc == "10":
+            while True:
+                menu_agenda()
+                r = input("> ").strip()
+                if r == "1":
+                    nome_animal = escolher_animal(petshop, input("Nome do animal: ").strip())
+                    nome_servico = input("Serviço: ").strip()
+                    horario = input("Início (AAAA-MM-DD HH:MM, vazio = próximo horário livre): ").strip()
+                    try:
+                        reserva = petshop.agendar_horario(nome_animal, nome_servico, horario or None)
+                    except ValueError as e:
+                        print(f"Horário inválido: {e}")
+                        continue
+                    if reserva:
+                        inicio = datetime.fromtimestamp(reserva["inicio"])
+                        print(f"Reservado: {reserva['servico']} em {inicio.strftime('%d/%m/%Y %H:%M')} "
+                              f"({reserva['duracao']} min, código {reserva['id'][:8]}).")
+                    else:
+                        print("Erro: animal ou serviço não encontrado, ou horário sem profissional livre.")
+                elif r == "2":
+                    nome_servico = input("Serviço: ").strip()
+                    dia = _ler_dia(input("Data (AAAA-MM-DD, vazio = hoje): ").strip())
+                    if dia is None:
+                        continue
+                    livres = petshop.horarios_livres(nome_servico, dia)
+                    print(f"\n--- Horários livres para {nome_servico} em {dia.strftime('%d/%m/%Y')} ---")
+                    print(" ".join(h.strftime("%H:%M") for h in livres) or "(nenhum horário livre)")
+                elif r == "3":
+                    dia = _ler_dia(input("Data (AAAA-MM-DD, vazio = hoje): ").strip())
+                    if dia is None:
+                        continue
+                    agenda = petshop.agendamentos_do_dia(dia)
+                    print(f"\n--- Agenda de {dia.strftime('%d/%m/%Y')} ---")
+                    if not agenda:
+                        print("(nenhum agendamento nesse dia)")
+                    for inicio, animal, reserva in agenda:
+                        print(f"- {inicio.strftime('%H:%M')} [{reserva['id'][:8]}] {reserva['servico']} "
+                              f"({reserva['duracao']} min, {reserva['recurso']} {reserva['profissional'] + 1}): {animal.nome}")
+                elif r in ("4", "5"):
+                    codigo = input("Código do agendamento: ").strip()
+                    ids = [i for i in petshop.agenda.agendamentos if codigo and i.startswith(codigo)]
+                    if len(ids) != 1:
+                        print("Agendamento não encontrado." if not ids else "Código ambíguo: informe mais caracteres.")
+                    elif r == "4" and petshop.concluir_agendamento(ids[0]):
+                        print("Atendimento concluído e registrado no histórico do animal.")
+                    elif r == "5" and petshop.cancelar_agendamento(ids[0]):
+                        print("Agendamento cancelado.")
+                    else:
+                        print("Erro: não foi possível atualizar o agendamento.")
+                elif r == "6":
+                    break
+                else:
+                    print("Opção inválida. Tente novamente.")
+        elif opc == "9":
+            while True:
+                menu_metricas(petshop)
+                r = input("> ").strip()
+                if r == "1":
+                    print("\n--- Métricas ---")
+                    for l in formatar(petshop.estatisticas()):
+                        print(l)
+                elif r == "2":
+                    petshop.metricas.ativo = not petshop.metricas.ativo
+                    print(f"Coleta {'ligada' if petshop.metricas.ativo else 'desligada'}.")
+                elif r == "3":
+                    if petshop.metricas.capturando():
+                        print(petshop.metricas.parar_captura())
+                    else:
+                        petshop.metricas.iniciar_captura()
+                        print("Captura iniciada: use o sistema normalmente e volte aqui para ver o resultado.")
+                elif r == "4":
+                    petshop.metricas.zerar()
+                    print("Métricas zeradas.")
+                elif r == "5":
+                    break
+                else:
+                    print("Opção inválida. Tente novamente.")
+        elif opc == OPCAO_SAIR:
             petshop.save_to_file()
             print("Dados salvos. Saindo... Até mais!")
             break
         else:
-            print("Opção inválida. Digite um número entre 1 e 8.")
+            print("Opção inválida. Digite um número entre 1 e 10.")
 
 
 if __name__ == "__main__":
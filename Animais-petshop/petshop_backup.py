@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from petshop_storage import TravaArquivo
+
+BACKUP_SUFIXO = ".backups"
+# pedaços definidos pelo conteúdo com um gear hash: cada byte desloca o hash de um bit, então
+# o corte depende só dos últimos JANELA bytes e vale para qualquer formato, texto ou binário;
+# inserir um registro muda só os pedaços vizinhos
+JANELA = 32
+MIN_PEDACO = 4 * 1024
+ALVO_PEDACO = 16 * 1024
+MAX_PEDACO = 128 * 1024
+# corta quando os bits altos do hash zeram, em média perto de ALVO_PEDACO
+_BITS_CORTE = (ALVO_PEDACO - MIN_PEDACO).bit_length() - 1
+_MASCARA = ((1 << _BITS_CORTE) - 1) << (JANELA - _BITS_CORTE)
+_BITS = (1 << JANELA) - 1
+# tabela fixa: mudar estes valores mudaria os cortes e perderia a deduplicação com snapshots antigos
+_GEAR = [int.from_bytes(hashlib.sha256(bytes([b])).digest()[:4], "big") for b in range(256)]
+
+
+def _corte(dados: bytes, inicio: int, fim: int) -> int:
+    # o hash começa JANELA bytes antes do mínimo para já estar cheio no primeiro corte possível
+    gear, mascara, bits = _GEAR, _MASCARA, _BITS
+    h = 0
+    for b in dados[inicio + MIN_PEDACO - JANELA:inicio + MIN_PEDACO]:
+        h = ((h << 1) + gear[b]) & bits
+    for i, b in enumerate(dados[inicio + MIN_PEDACO:fim], inicio + MIN_PEDACO):
+        h = ((h << 1) + gear[b]) & bits
+        if not h & mascara:
+            return i + 1
+    return fim
+
+
+def pedacos(dados: bytes) -> Iterator[memoryview]:
+    mv = memoryview(dados)
+    inicio = 0
+    while len(mv) - inicio > MIN_PEDACO:
+        corte = _corte(dados, inicio, min(len(mv), inicio + MAX_PEDACO))
+        yield mv[inicio:corte]
+        inicio = corte
+    if inicio < len(mv):
+        yield mv[inicio:]
+
+
+def _sha256(dados) -> str:
+    return hashlib.sha256(dados).hexdigest()
+
+
+# Repositório de snapshots em <dados>.backups: cada pedaço é gravado uma única vez,
+# comprimido, em objetos/<2 primeiros hex>/<sha256>; um snapshot é só um manifesto
+# com a lista de pedaços de cada arquivo, então snapshots frequentes custam pouco
+class RepositorioBackup:
+    def __init__(self, diretorio: str):
+        self.diretorio = Path(diretorio)
+        self._trava: Optional[TravaArquivo] = None
+
+    def _travar(self) -> TravaArquivo:
+        # criar e podar seguram a mesma trava (entre threads e entre processos): sem ela a poda
+        # apagaria um pedaço que um criar concorrente acabou de achar já gravado
+        if self._trava is None:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            self._trava = TravaArquivo(str(self.diretorio / "trava"))
+        return self._trava
+
+    @property
+    def _objetos(self) -> Path:
+        return self.diretorio / "objetos"
+
+    @property
+    def _snapshots(self) -> Path:
+        return self.diretorio / "snapshots"
+
+    def _caminho_objeto(self, digest: str) -> Path:
+        return self._objetos / digest[:2] / digest
+
+    def _gravar_objeto(self, pedaco: memoryview) -> Tuple[str, int]:
+        digest = _sha256(pedaco)
+        caminho = self._caminho_objeto(digest)
+        if caminho.exists():
+            return digest, 0
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        conteudo = zlib.compress(pedaco, 1)
+        tmp = caminho.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, caminho)
+        return digest, len(conteudo)
+
+    def _ler_objeto(self, digest: str) -> bytes:
+        with open(self._caminho_objeto(digest), "rb") as f:
+            dados = zlib.decompress(f.read())
+        if _sha256(dados) != digest:
+            raise ValueError(f"pedaço {digest[:12]} corrompido")
+        return dados
+
+    def criar(self, arquivos: Dict[str, bytes], descricao: str = "") -> Dict[str, Any]:
+        with self._travar():
+            return self._criar(arquivos, descricao)
+
+    def _criar(self, arquivos: Dict[str, bytes], descricao: str) -> Dict[str, Any]:
+        self._snapshots.mkdir(parents=True, exist_ok=True)
+        manifesto: Dict[str, Any] = {"criado_em": time.time(), "descricao": descricao, "arquivos": {},
+                                     "bytes_novos": 0, "pedacos_novos": 0}
+        for nome, dados in arquivos.items():
+            lista = []
+            for pedaco in pedacos(dados):
+                digest, gravados = self._gravar_objeto(pedaco)
+                lista.append(digest)
+                if gravados:
+                    manifesto["bytes_novos"] += gravados
+                    manifesto["pedacos_novos"] += 1
+            manifesto["arquivos"][nome] = {"tamanho": len(dados), "sha256": _sha256(dados), "pedacos": lista}
+        conteudo = json.dumps(manifesto, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        # o id ordena cronologicamente e termina no hash do manifesto
+        manifesto["id"] = time.strftime("%Y%m%d-%H%M%S", time.localtime(manifesto["criado_em"])) + \
+            "-" + _sha256(conteudo)[:8]
+        tmp = self._snapshots / f"{manifesto['id']}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._snapshots / f"{manifesto['id']}.json")
+        return manifesto
+
+    def listar(self) -> List[Dict[str, Any]]:
+        if not self._snapshots.is_dir():
+            return []
+        manifestos = []
+        for caminho in sorted(self._snapshots.glob("*.json")):
+            manifesto = self._ler_manifesto(caminho)
+            if manifesto is not None:
+                manifestos.append(manifesto)
+        return manifestos
+
+    def _ler_manifesto(self, caminho: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(caminho, "rb") as f:
+                manifesto = json.loads(f.read())
+        except (OSError, ValueError) as e:
+            print(f"Aviso: snapshot '{caminho.name}' ilegível: {e}")
+            return None
+        manifesto["id"] = caminho.stem
+        return manifesto
+
+    def obter(self, snapshot_id: str) -> Optional[Dict[str, Any]]:
+        # aceita o id completo ou um prefixo único (o mais recente com "ultimo")
+        ids = sorted(p.stem for p in self._snapshots.glob("*.json")) if self._snapshots.is_dir() else []
+        if snapshot_id == "ultimo":
+            encontrados = ids[-1:]
+        else:
+            encontrados = [i for i in ids if i.startswith(snapshot_id)]
+        if len(encontrados) != 1:
+            return None
+        return self._ler_manifesto(self._snapshots / f"{encontrados[0]}.json")
+
+    def ler(self, manifesto: Dict[str, Any]) -> Dict[str, bytes]:
+        arquivos = {}
+        for nome, info in manifesto["arquivos"].items():
+            dados = b"".join(self._ler_objeto(d) for d in info["pedacos"])
+            if len(dados) != info["tamanho"] or _sha256(dados) != info["sha256"]:
+                raise ValueError(f"arquivo '{nome}' do snapshot {manifesto['id']} não confere com o manifesto")
+            arquivos[nome] = dados
+        return arquivos
+
+    def verificar(self, manifestos: List[Dict[str, Any]] = None) -> List[str]:
+        # cada pedaço é descomprimido e conferido contra o próprio hash uma única vez,
+        # mesmo que vários snapshots o usem; o tamanho de cada arquivo fecha a conta
+        problemas = []
+        tamanhos: Dict[str, int] = {}
+        erros: Dict[str, str] = {}
+        for manifesto in self.listar() if manifestos is None else manifestos:
+            for nome, info in manifesto["arquivos"].items():
+                total = 0
+                for digest in info["pedacos"]:
+                    if digest not in tamanhos and digest not in erros:
+                        try:
+                            tamanhos[digest] = len(self._ler_objeto(digest))
+                        except (OSError, ValueError, zlib.error) as e:
+                            erros[digest] = str(e)
+                    if digest in erros:
+                        problemas.append(f"{manifesto['id']}/{nome}: pedaço {digest[:12]}: {erros[digest]}")
+                        total = None
+                        break
+                    total += tamanhos[digest]
+                if total is not None and total != info["tamanho"]:
+                    problemas.append(f"{manifesto['id']}/{nome}: tamanho não confere com o manifesto")
+        return problemas
+
+    def podar(self, manter: int) -> Dict[str, int]:
+        with self._travar():
+            return self._podar(manter)
+
+    def _podar(self, manter: int) -> Dict[str, int]:
+        # remove os snapshots mais antigos e os pedaços que nenhum snapshot restante usa
+        manifestos = self.listar()
+        removidos = 0
+        for manifesto in manifestos[:max(0, len(manifestos) - manter)]:
+            (self._snapshots / f"{manifesto['id']}.json").unlink()
+            removidos += 1
+        usados = {d for m in manifestos[removidos:] for info in m["arquivos"].values() for d in info["pedacos"]}
+        objetos = 0
+        if self._objetos.is_dir():
+            for caminho in self._objetos.glob("*/*"):
+                if caminho.name not in usados:
+                    caminho.unlink()
+                    objetos += 1
+        return {"snapshots": removidos, "pedacos": objetos}
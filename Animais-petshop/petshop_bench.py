@@ -0,0 +1,176 @@
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Any, Callable
+
+from petshop_backend import PetShop
+from petshop_storage import FORMATOS_ARQUIVO
+
+# (tutores, animais, serviços por animal)
+ESCALAS = {
+    "pequena": (100, 300, 5),
+    "media": (2000, 6000, 10),
+    "grande": (20000, 60000, 20),
+}
+ESPECIES = (("Cachorro", "cachorro"), ("Gato", "gato"), ("OutroAnimal", "outro"))
+RACAS = ("SRD", "Poodle", "Labrador", "Siamês", "Persa", "Calopsita", "Shih-tzu", "Maine Coon")
+CATALOGO = (("Banho", 40.0), ("Tosa", 60.0), ("Consulta", 80.0), ("Vacina", 95.0), ("Hidratação", 55.0))
+# referência fixa para as datas geradas: a mesma semente gera sempre o mesmo arquivo
+AGORA_BASE = 1_700_000_000.0
+
+
+def gerar_dados(n_tutores: int, n_animais: int, servicos_por_animal: int, semente: int = 42) -> Dict[str, Any]:
+    rnd = random.Random(semente)
+    catalogo = [{"nome": nome, "preco": preco} for nome, preco in CATALOGO]
+    tutores = [{"nome": f"Tutor {i}", "cpf": f"{i:011d}", "telefone": f"(11) 9{rnd.randrange(10**8):08d}"}
+               for i in range(n_tutores)]
+    animais = []
+    for i in range(n_animais):
+        datas = sorted(AGORA_BASE - rnd.random() * 365 * 86400 for _ in range(servicos_por_animal))
+        classe, especie = ESPECIES[rnd.randrange(len(ESPECIES))]
+        animais.append({
+            "class": classe,
+            "id": f"bench-{i}",
+            "nome": f"Animal {i}",
+            "especie": especie,
+            "raca": RACAS[rnd.randrange(len(RACAS))],
+            "idade": rnd.randrange(1, 18),
+            "tutor_cpf": tutores[rnd.randrange(n_tutores)]["cpf"],
+            "servicos_realizados": [dict(catalogo[rnd.randrange(len(catalogo))], realizado_em=quando) for quando in datas],
+        })
+    return {"tutores": tutores, "animais": animais, "servicos_catalogo": catalogo}
+
+
+def _medir(func: Callable[[int], Any], repeticoes: int) -> List[float]:
+    amostras = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        func(i)
+        amostras.append(time.perf_counter() - inicio)
+    return amostras
+
+
+def resumo(amostras: List[float]) -> Dict[str, float]:
+    ordenadas = sorted(amostras)
+
+    def percentil(p: float) -> float:
+        return ordenadas[min(len(ordenadas) - 1, int(round(p * (len(ordenadas) - 1))))]
+
+    return {
+        "n": len(ordenadas),
+        "media_ms": statistics.fmean(ordenadas) * 1000,
+        "p50_ms": percentil(0.50) * 1000,
+        "p95_ms": percentil(0.95) * 1000,
+        "p99_ms": percentil(0.99) * 1000,
+    }
+
+
+def _pico_memoria(func: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def executar_escala(nome: str, diretorio: Path, repeticoes: int, formato: str = None, journal: bool = False,
+                    semente: int = 42) -> Dict[str, Dict[str, float]]:
+    n_tutores, n_animais, n_servicos = ESCALAS[nome]
+    caminho = diretorio / f"bench_{nome}.json"
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(gerar_dados(n_tutores, n_animais, n_servicos, semente), f, ensure_ascii=False)
+
+    def abrir() -> PetShop:
+        return PetShop(str(caminho), journal=journal, formato=formato)
+
+    petshop = abrir()
+    petshop.save_to_file()  # regrava no formato configurado antes de medir a carga
+    rnd = random.Random(semente)
+    leves = max(repeticoes * 100, 1000)
+    resultados: Dict[str, Dict[str, float]] = {}
+    resultados["load_from_file"] = resumo(_medir(lambda i: petshop.load_from_file(), repeticoes))
+    resultados["save_to_file"] = resumo(_medir(lambda i: petshop.save_to_file(), repeticoes))
+    cpfs = list(petshop.tutores)
+    resultados["cadastrar_animal"] = resumo(_medir(
+        lambda i: petshop.cadastrar_animal(f"Novo {i}", "gato", "SRD", 2, cpfs[rnd.randrange(len(cpfs))]), repeticoes * 4))
+    nomes = [a.nome for a in petshop.animais[:n_animais]]
+    resultados["agendar_servico_para_animal"] = resumo(_medir(
+        lambda i: petshop.agendar_servico_para_animal(nomes[rnd.randrange(len(nomes))], "Banho"), repeticoes * 4))
+    resultados["encontrar_animal_por_nome"] = resumo(_medir(
+        lambda i: petshop.encontrar_animal_por_nome(nomes[rnd.randrange(len(nomes))]), leves))
+    # sem cache: limpa os relatórios a cada repetição para medir a geração, não o acerto de cache
+    resultados["listar_tutores_e_animais"] = resumo(_medir(
+        lambda i: (petshop.relatorios.limpar(), petshop.listar_tutores_e_animais()), repeticoes))
+    resultados["listar_tutores_e_animais_cache"] = resumo(_medir(lambda i: petshop.listar_tutores_e_animais(), repeticoes))
+    petshop.fechar()
+    resultados["load_from_file"]["pico_memoria_mb"] = _pico_memoria(lambda: abrir().fechar()) / 1e6
+    return resultados
+
+
+def comparar(resultados: Dict[str, Any], base: Dict[str, Any], tolerancia: float) -> List[str]:
+    regressoes = []
+    for escala, operacoes in resultados.items():
+        for op, r in operacoes.items():
+            ref = base.get(escala, {}).get(op)
+            if not ref:
+                continue
+            for metrica in ("p50_ms", "p95_ms", "pico_memoria_mb"):
+                if metrica in r and ref.get(metrica) and r[metrica] > ref[metrica] * (1 + tolerancia):
+                    regressoes.append(f"{escala}/{op} {metrica}: {ref[metrica]:.3f} -> {r[metrica]:.3f} "
+                                      f"(+{(r[metrica] / ref[metrica] - 1) * 100:.0f}%)")
+    return regressoes
+
+
+def imprimir(resultados: Dict[str, Any]):
+    for escala, operacoes in resultados.items():
+        t, a, s = ESCALAS[escala]
+        print(f"\n== escala {escala}: {t} tutores, {a} animais, {s} serviços/animal ==")
+        print(f"{'operação':<34}{'n':>6}{'média ms':>12}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}{'pico MB':>10}")
+        for op, r in operacoes.items():
+            pico = f"{r['pico_memoria_mb']:.1f}" if "pico_memoria_mb" in r else "-"
+            print(f"{op:<34}{r['n']:>6}{r['media_ms']:>12.3f}{r['p50_ms']:>12.3f}{r['p95_ms']:>12.3f}"
+                  f"{r['p99_ms']:>12.3f}{pico:>10}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks das operações críticas do PetShop.")
+    parser.add_argument("--escalas", nargs="+", choices=list(ESCALAS), default=["pequena", "media"])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--formato", choices=FORMATOS_ARQUIVO)
+    parser.add_argument("--journal", action="store_true")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="grava os resultados em JSON (pode servir de base)")
+    parser.add_argument("--base", help="compara com resultados gravados anteriormente")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="aumento relativo aceito antes de acusar regressão")
+    args = parser.parse_args(argv)
+
+    resultados: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="petshop_bench_") as tmp:
+        for escala in args.escalas:
+            resultados[escala] = executar_escala(escala, Path(tmp), args.repeticoes, args.formato, args.journal,
+                                                 args.semente)
+    imprimir(resultados)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    if args.base:
+        with open(args.base, "r", encoding="utf-8") as f:
+            regressoes = comparar(resultados, json.load(f), args.tolerancia)
+        if regressoes:
+            print("\nRegressões em relação à base:")
+            for r in regressoes:
+                print(f"  - {r}")
+            return 1
+        print("\nSem regressões em relação à base.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
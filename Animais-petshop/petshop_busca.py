@@ -0,0 +1,151 @@
+import heapq
+import re
+import unicodedata
+from functools import lru_cache
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Hashable, Iterable, Optional, Set, Tuple
+
+_SEPARADORES = re.compile(r"[^0-9a-z]+")
+# pontuação por tipo de casamento; o peso do campo multiplica o resultado
+EXATO = 3.0
+PREFIXO = 2.0
+APROXIMADO = 1.0
+SIMILARIDADE_MINIMA = 0.35
+MAX_EXPANSOES = 256
+
+
+def normalizar(texto: str) -> str:
+    if texto.isascii():
+        return texto.lower()
+    decomposto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=4096)
+def termos(texto: str) -> Tuple[str, ...]:
+    # raças e espécies se repetem muito: o cache evita renormalizar o mesmo texto
+    return tuple(t for t in _SEPARADORES.split(normalizar(texto)) if t)
+
+
+def _trigramas(termo: str) -> Set[str]:
+    marcado = f"  {termo} "
+    return {marcado[i:i + 3] for i in range(len(marcado) - 2)}
+
+
+# Índice invertido em memória: termos ordenados para prefixo (bisect) e
+# trigramas para tolerar erros de digitação; acentos e caixa são ignorados
+class IndiceBusca:
+    def __init__(self):
+        self._termos: List[str] = []
+        self._docs: Dict[str, Dict[Hashable, float]] = {}
+        self._trigramas: Dict[str, Set[str]] = {}
+        self._termos_do_doc: Dict[Hashable, Dict[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._termos_do_doc)
+
+    @classmethod
+    def construir(cls, documentos: Iterable[Tuple[Hashable, Iterable[Tuple[str, float]]]]) -> "IndiceBusca":
+        indice = cls()
+        for doc, campos in documentos:
+            indice._adicionar(doc, campos, ordenar=False)
+        indice._termos.sort()
+        return indice
+
+    def adicionar(self, doc: Hashable, campos: Iterable[Tuple[str, float]]):
+        self.remover(doc)
+        self._adicionar(doc, campos, ordenar=True)
+
+    def _adicionar(self, doc: Hashable, campos: Iterable[Tuple[str, float]], ordenar: bool):
+        pesos: Dict[str, float] = {}
+        for texto, peso in campos:
+            for t in termos(texto or ""):
+                if peso > pesos.get(t, 0.0):
+                    pesos[t] = peso
+        if not pesos:
+            return
+        self._termos_do_doc[doc] = pesos
+        for t, peso in pesos.items():
+            docs = self._docs.get(t)
+            if docs is None:
+                docs = self._docs[t] = {}
+                if ordenar:
+                    insort(self._termos, t)
+                else:
+                    self._termos.append(t)
+                if not t.isdigit():
+                    for tri in _trigramas(t):
+                        self._trigramas.setdefault(tri, set()).add(t)
+            docs[doc] = peso
+
+    def remover(self, doc: Hashable):
+        pesos = self._termos_do_doc.pop(doc, None)
+        if not pesos:
+            return
+        for t in pesos:
+            docs = self._docs[t]
+            del docs[doc]
+            if docs:
+                continue
+            del self._docs[t]
+            del self._termos[bisect_left(self._termos, t)]
+            if t.isdigit():
+                continue
+            for tri in _trigramas(t):
+                grupo = self._trigramas[tri]
+                grupo.discard(t)
+                if not grupo:
+                    del self._trigramas[tri]
+
+    def _casamentos(self, consulta: str, aproximado: bool) -> Dict[str, float]:
+        encontrados: Dict[str, float] = {}
+        if consulta in self._docs:
+            encontrados[consulta] = EXATO
+        i = bisect_left(self._termos, consulta)
+        fim = min(len(self._termos), i + MAX_EXPANSOES)
+        while i < fim and self._termos[i].startswith(consulta):
+            t = self._termos[i]
+            if t != consulta:
+                # prefixos que cobrem mais do termo valem mais
+                encontrados[t] = PREFIXO * (0.5 + 0.5 * len(consulta) / len(t))
+            i += 1
+        # números (CPF, telefone) só casam por prefixo: trigramas de dígitos geram ruído
+        if aproximado and len(consulta) >= 3 and not consulta.isdigit() and len(encontrados) < MAX_EXPANSOES:
+            tris = _trigramas(consulta)
+            contagem: Dict[str, int] = {}
+            for tri in tris:
+                for t in self._trigramas.get(tri, ()):
+                    contagem[t] = contagem.get(t, 0) + 1
+            for t, comuns in contagem.items():
+                if t in encontrados:
+                    continue
+                similaridade = comuns / (len(tris) + len(t) + 1 - comuns)
+                if similaridade >= SIMILARIDADE_MINIMA:
+                    encontrados[t] = APROXIMADO * similaridade
+        return encontrados
+
+    def buscar(self, texto: str, limite: Optional[int] = 20, aproximado: bool = True,
+               aceitar: Callable[[Hashable], bool] = None) -> List[Tuple[Hashable, float]]:
+        # todos os termos da consulta precisam casar (E lógico); a nota é a soma do melhor casamento de cada um
+        casamentos = [self._casamentos(consulta, aproximado) for consulta in termos(texto)]
+        if not casamentos:
+            return []
+        # começa pelo termo mais seletivo; os demais só são conferidos nos documentos que restaram
+        casamentos.sort(key=lambda c: sum(len(self._docs[t]) for t in c))
+        notas: Dict[Hashable, float] = {}
+        for t, nota in casamentos[0].items():
+            for doc, peso in self._docs[t].items():
+                if nota * peso > notas.get(doc, 0.0) and (aceitar is None or aceitar(doc)):
+                    notas[doc] = nota * peso
+        for c in casamentos[1:]:
+            if not notas:
+                return []
+            restantes: Dict[Hashable, float] = {}
+            for doc, n in notas.items():
+                melhor = max((c[t] * peso for t, peso in self._termos_do_doc[doc].items() if t in c), default=0.0)
+                if melhor:
+                    restantes[doc] = n + melhor
+            notas = restantes
+        if limite is None:
+            return sorted(notas.items(), key=lambda item: -item[1])
+        return heapq.nlargest(limite, notas.items(), key=lambda item: item[1])
@@ -0,0 +1,77 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+
+MAX_BYTES = 16 * 1024 * 1024
+MAX_ENTRADAS = 512
+
+
+def _tamanho(linhas: Tuple[str, ...]) -> int:
+    return sys.getsizeof(linhas) + sum(sys.getsizeof(l) for l in linhas)
+
+
+# Relatórios já renderizados, do menos para o mais recentemente usado. Cada entrada
+# guarda o carimbo das versões dos domínios de que depende (tutores, animais, o
+# histórico de um animal...); uma mutação só incrementa a versão dos domínios que
+# afeta, e a entrada cujo carimbo não confere é gerada de novo na próxima consulta
+class CacheRelatorios:
+    def __init__(self, max_bytes: int = MAX_BYTES, max_entradas: int = MAX_ENTRADAS):
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self._mutex = threading.Lock()
+        self._entradas: "OrderedDict[Hashable, Tuple[Tuple[int, ...], Tuple[str, ...], int]]" = OrderedDict()
+        self._versoes: Dict[Hashable, int] = {}
+        # muda a cada recarga completa: invalida tudo sem percorrer as entradas
+        self._epoca = 0
+        self.bytes = 0
+        self.acertos = 0
+        self.faltas = 0
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def _carimbo(self, dominios: Iterable[Hashable]) -> Tuple[int, ...]:
+        return (self._epoca, *(self._versoes.get(d, 0) for d in dominios))
+
+    def invalidar(self, *dominios: Hashable):
+        with self._mutex:
+            for d in dominios:
+                self._versoes[d] = self._versoes.get(d, 0) + 1
+
+    def limpar(self):
+        with self._mutex:
+            self._epoca += 1
+            self._entradas.clear()
+            self._versoes.clear()
+            self.bytes = 0
+
+    def obter(self, chave: Hashable, dominios: Iterable[Hashable], gerar: Callable[[], Iterable[str]]) -> List[str]:
+        # devolve uma cópia: quem recebe a lista pode alterá-la sem estragar o cache
+        dominios = tuple(dominios)
+        with self._mutex:
+            carimbo = self._carimbo(dominios)
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[0] == carimbo:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return list(entrada[1])
+            self.faltas += 1
+        linhas = tuple(gerar())
+        tamanho = _tamanho(linhas)
+        with self._mutex:
+            anterior = self._entradas.pop(chave, None)
+            if anterior is not None:
+                self.bytes -= anterior[2]
+            # relatório maior que o cache inteiro não expulsa todos os outros
+            if tamanho <= self.max_bytes:
+                self._entradas[chave] = (carimbo, linhas, tamanho)
+                self.bytes += tamanho
+                while self.bytes > self.max_bytes or len(self._entradas) > self.max_entradas:
+                    _, (_, _, removido) = self._entradas.popitem(last=False)
+                    self.bytes -= removido
+        return list(linhas)
+
+    def resumo(self) -> Dict[str, Any]:
+        with self._mutex:
+            return {"entradas": len(self._entradas), "bytes": self.bytes, "acertos": self.acertos, "faltas": self.faltas}
@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from petshop_backend import PetShop
+from petshop_bench import ESCALAS, resumo, gerar_dados
+from petshop_server import ServidorPetShop
+
+
+class Cliente:
+    def __init__(self, host: str, porta: int):
+        self.host = host
+        self.porta = porta
+        self._reader = None
+        self._writer = None
+
+    async def conectar(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.porta)
+
+    async def pedir(self, metodo: str, caminho: str, corpo: Dict[str, Any] = None) -> Tuple[int, Any]:
+        dados = json.dumps(corpo).encode("utf-8") if corpo is not None else b""
+        self._writer.write(f"{metodo} {caminho} HTTP/1.1\r\nHost: {self.host}\r\n"
+                           f"Content-Type: application/json\r\nContent-Length: {len(dados)}\r\n\r\n".encode("latin-1") + dados)
+        await self._writer.drain()
+        status = int((await self._reader.readline()).split()[1])
+        tamanho = 0
+        while True:
+            linha = await self._reader.readline()
+            if linha in (b"\r\n", b""):
+                break
+            chave, _, valor = linha.decode("latin-1").partition(":")
+            if chave.strip().lower() == "content-length":
+                tamanho = int(valor)
+        return status, json.loads(await self._reader.readexactly(tamanho))
+
+    async def fechar(self):
+        if self._writer:
+            self._writer.close()
+            await self._writer.wait_closed()
+
+
+async def _sessao(host: str, porta: int, requisicoes: int, escrita: float, amostras: Dict[str, List[float]],
+                  erros: List[str], ids: List[str], cpfs: List[str], rnd: random.Random):
+    cliente = Cliente(host, porta)
+    await cliente.conectar()
+    try:
+        for i in range(requisicoes):
+            if rnd.random() < escrita:
+                if rnd.random() < 0.8:
+                    tipo, metodo, caminho, corpo = "agendar", "POST", f"/animais/{rnd.choice(ids)}/servicos", {"servico": "Banho"}
+                else:
+                    tipo, metodo, caminho, corpo = "cadastrar_animal", "POST", "/animais", {
+                        "nome": f"Carga {i}", "especie": "gato", "raca": "SRD", "idade": 2, "tutor_cpf": rnd.choice(cpfs)}
+            else:
+                tipo, metodo, caminho, corpo = rnd.choice((
+                    ("animal", "GET", f"/animais/{rnd.choice(ids)}", None),
+                    ("listar_animais", "GET", f"/animais?pagina={rnd.randrange(1, 20)}&tamanho=50", None),
+                    ("busca", "GET", f"/busca?q=animal%20{rnd.randrange(1000)}", None),
+                    ("tutor", "GET", f"/tutores/{rnd.choice(cpfs)}", None),
+                ))
+            inicio = time.perf_counter()
+            status, resposta = await cliente.pedir(metodo, caminho, corpo)
+            amostras.setdefault(tipo, []).append(time.perf_counter() - inicio)
+            if status >= 400:
+                erros.append(f"{metodo} {caminho}: {status} {resposta.get('erro')}")
+    finally:
+        await cliente.fechar()
+
+
+async def executar_carga(host: str, porta: int, conexoes: int, requisicoes: int, escrita: float,
+                         semente: int = 42) -> Dict[str, Any]:
+    rnd = random.Random(semente)
+    cliente = Cliente(host, porta)
+    await cliente.conectar()
+    _, pagina = await cliente.pedir("GET", "/animais?tamanho=500")
+    ids = [a["id"] for a in pagina["itens"]]
+    _, pagina = await cliente.pedir("GET", "/tutores?tamanho=500")
+    cpfs = [t["cpf"] for t in pagina["itens"]]
+    await cliente.fechar()
+    if not ids or not cpfs:
+        raise SystemExit("A base precisa ter tutores e animais cadastrados para o teste de carga.")
+
+    amostras: Dict[str, List[float]] = {}
+    erros: List[str] = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_sessao(host, porta, requisicoes, escrita, amostras, erros, ids, cpfs,
+                                   random.Random(rnd.random())) for _ in range(conexoes)))
+    duracao = time.perf_counter() - inicio
+    total = sum(len(a) for a in amostras.values())
+    resultados = {tipo: resumo(a) for tipo, a in sorted(amostras.items())}
+    resultados["total"] = dict(resumo([x for a in amostras.values() for x in a]), req_por_s=total / duracao)
+    return {"resultados": resultados, "erros": erros, "duracao_s": duracao}
+
+
+def imprimir(relatorio: Dict[str, Any]):
+    print(f"{'operação':<20}{'n':>8}{'média ms':>12}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+    for tipo, r in relatorio["resultados"].items():
+        print(f"{tipo:<20}{r['n']:>8}{r['media_ms']:>12.3f}{r['p50_ms']:>12.3f}{r['p95_ms']:>12.3f}{r['p99_ms']:>12.3f}")
+    total = relatorio["resultados"]["total"]
+    print(f"\n{total['n']} requisições em {relatorio['duracao_s']:.2f} s ({total['req_por_s']:.0f} req/s), "
+          f"{len(relatorio['erros'])} erros")
+    for erro in relatorio["erros"][:10]:
+        print(f"  - {erro}")
+
+
+async def _carga_local(escala: str, args) -> Dict[str, Any]:
+    # sobe um servidor temporário com dados sintéticos na mesma event loop
+    with tempfile.TemporaryDirectory(prefix="petshop_carga_") as tmp:
+        caminho = Path(tmp) / "carga.json"
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(gerar_dados(*ESCALAS[escala], args.semente), f, ensure_ascii=False)
+        servidor = ServidorPetShop(PetShop(str(caminho), journal=args.journal, historico_preguicoso=True))
+        tcp = await servidor.iniciar("127.0.0.1", 0)
+        porta = tcp.sockets[0].getsockname()[1]
+        try:
+            return await executar_carga("127.0.0.1", porta, args.conexoes, args.requisicoes, args.escrita, args.semente)
+        finally:
+            tcp.close()
+            await tcp.wait_closed()
+            await servidor.encerrar()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga da API HTTP do PetShop.")
+    parser.add_argument("--url", help="servidor já em execução (host:porta); sem isso sobe um servidor temporário")
+    parser.add_argument("--escala", choices=list(ESCALAS), default="pequena", help="dados do servidor temporário")
+    parser.add_argument("--journal", action="store_true", help="servidor temporário grava em journal")
+    parser.add_argument("--conexoes", type=int, default=16)
+    parser.add_argument("--requisicoes", type=int, default=200, help="requisições por conexão")
+    parser.add_argument("--escrita", type=float, default=0.1, help="fração de requisições que alteram dados")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        host, _, porta = args.url.rpartition(":")
+        relatorio = asyncio.run(executar_carga(host or "127.0.0.1", int(porta), args.conexoes, args.requisicoes,
+                                               args.escrita, args.semente))
+    else:
+        relatorio = asyncio.run(_carga_local(args.escala, args))
+    imprimir(relatorio)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    return 1 if relatorio["erros"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
+import queue
 import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 try:
     from petshop_backend import PetShop, Servico
@@ -8,20 +11,250 @@ except Exception:
     messagebox.showerror("Import error", "Não foi possível importar petshop_backend.Por favor, coloque o backend no mesmo diretório.")
     raise
 
+LIMITE_SERVICOS_DIALOGO = 200
+
+# Treeview que só mantém no widget as linhas visíveis, identificadas por chave estável:
+# atualizar a lista aplica apenas a diferença na janela exibida
+class TabelaVirtual:
+    ALTURA_LINHA_PADRAO = 20
+
+    def __init__(self, parent, colunas: List[Tuple[str, str]], largura: int = 120):
+        frame = ttk.Frame(parent)
+        frame.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        self.tree = ttk.Treeview(frame, columns=[c for c, _ in colunas], show="headings", height=10)
+        for col, titulo in colunas:
+            self.tree.heading(col, text=titulo)
+            self.tree.column(col, width=largura, anchor=tk.CENTER)
+        self.scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self._rolar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.chaves: List[str] = []
+        self.valores: Callable[[str], tuple] = lambda chave: ()
+        self.inicio = 0
+        self.linhas = 10
+        self._renderizadas: Dict[str, tuple] = {}
+        self.tree.bind("<Configure>", self._ao_redimensionar)
+        self.tree.bind("<MouseWheel>", lambda e: self._rolar("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self._rolar("scroll", -1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self._rolar("scroll", 1, "units"))
+
+    def definir(self, chaves: List[str], valores: Callable[[str], tuple]):
+        self.chaves = chaves
+        self.valores = valores
+        self._renderizar()
+
+    def atualizar(self, chave: str):
+        if chave in self._renderizadas:
+            self._renderizar()
+
+    def _ao_redimensionar(self, event):
+        altura = ttk.Style().lookup("Treeview", "rowheight") or self.ALTURA_LINHA_PADRAO
+        linhas = max(1, int(event.height) // int(altura) - 1)
+        if linhas != self.linhas:
+            self.linhas = linhas
+            self._renderizar()
+
+    def _rolar(self, acao: str, quantidade, unidade: str = None):
+        total = len(self.chaves)
+        if acao == "moveto":
+            inicio = int(float(quantidade) * total)
+        else:
+            passo = self.linhas if unidade == "pages" else 3
+            inicio = self.inicio + int(quantidade) * passo
+        inicio = max(0, min(inicio, max(0, total - self.linhas)))
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self._renderizar()
+        return "break"
+
+    def _renderizar(self):
+        total = len(self.chaves)
+        self.inicio = max(0, min(self.inicio, max(0, total - self.linhas)))
+        janela = self.chaves[self.inicio:self.inicio + self.linhas]
+        visiveis = set(janela)
+        for chave in [c for c in self._renderizadas if c not in visiveis]:
+            self.tree.delete(chave)
+            del self._renderizadas[chave]
+        for pos, chave in enumerate(janela):
+            vals = tuple(self.valores(chave))
+            atual = self._renderizadas.get(chave)
+            if atual is None:
+                self.tree.insert("", pos, chave, values=vals)
+            else:
+                if atual != vals:
+                    self.tree.item(chave, values=vals)
+                if self.tree.index(chave) != pos:
+                    self.tree.move(chave, "", pos)
+            self._renderizadas[chave] = vals
+        if total:
+            self.scrollbar.set(self.inicio / total, min(1.0, (self.inicio + len(janela)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+
+# Um único thread de I/O: cargas e gravações rodam fora do loop do Tk, na ordem em que
+# foram enviadas e sem se sobrepor; os resultados voltam ao loop via after()
+class ExecutorIO:
+    INTERVALO_MS = 50
+
+    def __init__(self, raiz: tk.Misc, ao_mudar: Callable[[Optional[str]], None]):
+        self.raiz = raiz
+        self.ao_mudar = ao_mudar
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="petshop-io")
+        self._concluidas: "queue.Queue[Tuple[Future, Callable, Callable]]" = queue.Queue()
+        self._descricoes: List[str] = []
+        self.raiz.after(self.INTERVALO_MS, self._drenar)
+
+    @property
+    def ocupado(self) -> bool:
+        return bool(self._descricoes)
+
+    def enviar(self, tarefa: Callable[[], Any], descricao: str, ao_concluir: Callable[[Any], None] = None,
+               ao_falhar: Callable[[BaseException], None] = None):
+        self._descricoes.append(descricao)
+        self.ao_mudar(self._descricao_atual())
+        futuro = self._executor.submit(tarefa)
+        futuro.add_done_callback(lambda f: self._concluidas.put((f, ao_concluir, ao_falhar)))
+
+    def _descricao_atual(self) -> Optional[str]:
+        # tarefas sem descrição (verificações periódicas) não acendem o indicador de progresso
+        return next((d for d in self._descricoes if d), None)
+
+    def _drenar(self):
+        while True:
+            try:
+                futuro, ao_concluir, ao_falhar = self._concluidas.get_nowait()
+            except queue.Empty:
+                break
+            self._descricoes.pop(0)
+            self.ao_mudar(self._descricao_atual())
+            erro = futuro.exception()
+            if erro is None:
+                if ao_concluir:
+                    ao_concluir(futuro.result())
+            elif ao_falhar:
+                ao_falhar(erro)
+            else:
+                messagebox.showerror("Erro", f"Falha em operação de arquivo:\n{erro}")
+        self.raiz.after(self.INTERVALO_MS, self._drenar)
+
+    def encerrar(self):
+        self._executor.shutdown(wait=True)
+
+
 class PetShopGUI(tk.Tk):
+    LIMITE_BUSCA = 200
+    ATRASO_BUSCA_MS = 150
+    INTERVALO_VERIFICACAO_MS = 10000
+
     def __init__(self):
         super().__init__()
         self.title("PetShop - Interface Gráfica")
         self.geometry("800x500")
         self.resizable(True, True)
 
-        self.petshop = PetShop()  
-
+        self._fechando = False
+        self._busca_agendada = None
         self.create_widgets()
+        self.io = ExecutorIO(self, self._status_io)
+        # começa vazio e carrega o arquivo no thread de I/O
+        self.petshop = self._abrir_petshop(carregar=False)
+        self.carregar_dados()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(self.INTERVALO_VERIFICACAO_MS, self._verificar_alteracoes)
+
+    def _abrir_petshop(self, carregar: bool = True) -> PetShop:
+        return PetShop(historico_preguicoso=True, carregar=carregar, agendar_flush=self._agendar_flush, cache=True)
+
+    def _agendar_flush(self):
+        petshop = self.petshop
+        self.io.enviar(petshop.flush, "Salvando alterações...", lambda _: self._mostrar_conflitos(petshop))
+
+    def _mostrar_conflitos(self, petshop: PetShop):
+        conflitos = petshop.consumir_conflitos()
+        if not conflitos or petshop is not self.petshop:
+            return
+        # a gravação foi mesclada com a de outra estação: as listas mudaram por baixo
         self.refresh_animais()
+        self.refresh_tutores()
         self.refresh_servicos()
+        messagebox.showwarning("Alterações descartadas",
+                               "Outra estação alterou os dados ao mesmo tempo:\n- " + "\n- ".join(conflitos[:10]))
+
+    def _verificar_alteracoes(self):
+        # consulta barata (contador de versão) no thread de I/O; só recarrega se outra estação gravou
+        if not self._fechando and not self.io.ocupado:
+            petshop = self.petshop
+
+            def concluir(alterado: bool):
+                if alterado and petshop is self.petshop and not self._fechando and not self.io.ocupado:
+                    self.carregar_dados()
+
+            self.io.enviar(petshop.armazenamento.alterado, "", concluir, lambda e: None)
+        self.after(self.INTERVALO_VERIFICACAO_MS, self._verificar_alteracoes)
+
+    def carregar_dados(self, ao_concluir: Callable[[], None] = None):
+        antigo = self.petshop
+
+        def tarefa() -> PetShop:
+            antigo.flush()
+            novo = self._abrir_petshop()
+            novo.preparar_busca()  # monta o índice de busca aqui, fora do loop do Tk
+            return novo
+
+        def concluir(novo: PetShop):
+            # troca a instância inteira: a tela nunca enxerga um estado carregado pela metade
+            self.petshop = novo
+            self.io.enviar(antigo.armazenamento.fechar, "Fechando arquivo anterior...")
+            if self._fechando:
+                self.io.enviar(novo.fechar, "Fechando...")
+                return
+            self._bloquear(False)
+            self.refresh_animais()
+            self.refresh_tutores()
+            self.refresh_servicos()
+            if ao_concluir:
+                ao_concluir()
+
+        def falhar(erro: BaseException):
+            if self._fechando:
+                return
+            self._bloquear(False)
+            messagebox.showerror("Erro", f"Falha ao carregar os dados:\n{erro}")
+
+        self._bloquear(True)
+        self.io.enviar(tarefa, "Carregando dados...", concluir, falhar)
+
+    def _bloquear(self, bloquear: bool):
+        pilha = list(self.winfo_children())
+        while pilha:
+            w = pilha.pop()
+            pilha.extend(w.winfo_children())
+            if isinstance(w, ttk.Button):
+                w.state(["disabled"] if bloquear else ["!disabled"])
+
+    def _status_io(self, descricao: Optional[str]):
+        if descricao:
+            self.status_var.set(descricao)
+            if not self._progresso_ativo:
+                self.progresso.pack(side=tk.RIGHT, padx=6)
+                self.progresso.start(15)
+                self._progresso_ativo = True
+        else:
+            self.status_var.set("Pronto")
+            if self._progresso_ativo:
+                self.progresso.stop()
+                self.progresso.pack_forget()
+                self._progresso_ativo = False
 
     def create_widgets(self):
+        status = ttk.Frame(self)
+        status.pack(side=tk.BOTTOM, fill=tk.X, padx=8, pady=(0, 6))
+        self.status_var = tk.StringVar(value="Pronto")
+        ttk.Label(status, textvariable=self.status_var).pack(side=tk.LEFT)
+        self.progresso = ttk.Progressbar(status, mode="indeterminate", length=140)
+        self._progresso_ativo = False
+
         sidebar = ttk.Frame(self)
         sidebar.pack(side=tk.LEFT, fill=tk.Y, padx=8, pady=8)
 
@@ -35,40 +268,41 @@ class PetShopGUI(tk.Tk):
         main = ttk.Frame(self)
         main.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=8, pady=8)
 
+        busca_frame = ttk.Frame(main)
+        busca_frame.pack(fill=tk.X, pady=(0, 6))
+        ttk.Label(busca_frame, text="Buscar:").pack(side=tk.LEFT)
+        self.busca_var = tk.StringVar()
+        self.busca_var.trace_add("write", self._agendar_busca)
+        self.entry_busca = ttk.Entry(busca_frame, textvariable=self.busca_var)
+        self.entry_busca.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=6)
+        ttk.Button(busca_frame, text="Limpar", command=lambda: self.busca_var.set("")).pack(side=tk.LEFT)
+
         self.notebook = ttk.Notebook(main)
         self.notebook.pack(fill=tk.BOTH, expand=True)
 
         self.tab_animais = ttk.Frame(self.notebook)
         self.notebook.add(self.tab_animais, text="Animais")
 
-        self.tree_animais = ttk.Treeview(self.tab_animais, columns=("Especie","Raca","Idade","TutorCPF"), show="headings")
-        for col,title in [("Especie","Espécie"),("Raca","Raça"),("Idade","Idade"),("TutorCPF","CPF Tutor")]:
-            self.tree_animais.heading(col, text=title)
-            self.tree_animais.column(col, width=120, anchor=tk.CENTER)
-        self.tree_animais.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        self.tabela_animais = TabelaVirtual(self.tab_animais, [("Nome","Nome"),("Especie","Espécie"),("Raca","Raça"),("Idade","Idade"),("TutorCPF","CPF Tutor")])
+        self.tree_animais = self.tabela_animais.tree
 
         detalhe_frame = ttk.Frame(self.tab_animais)
         detalhe_frame.pack(fill=tk.X, padx=6, pady=6)
         ttk.Button(detalhe_frame, text="Ver Serviços do Animal", command=self.ver_servicos_animal).pack(side=tk.LEFT)
-        ttk.Button(detalhe_frame, text="Remover animal (não implementado)", command=lambda: messagebox.showinfo("Info","Remoção não implementada")).pack(side=tk.LEFT, padx=6)
+        ttk.Button(detalhe_frame, text="Remover animal", command=self.remover_animal).pack(side=tk.LEFT, padx=6)
 
         self.tab_tutores = ttk.Frame(self.notebook)
         self.notebook.add(self.tab_tutores, text="Tutores")
-        self.tree_tutores = ttk.Treeview(self.tab_tutores, columns=("Nome","CPF","Tel"), show="headings")
-        for col,title in [("Nome","Nome"),("CPF","CPF"),("Tel","Telefone")]:
-            self.tree_tutores.heading(col, text=title)
-            self.tree_tutores.column(col, width=160, anchor=tk.CENTER)
-        self.tree_tutores.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        self.tabela_tutores = TabelaVirtual(self.tab_tutores, [("Nome","Nome"),("CPF","CPF"),("Tel","Telefone")], largura=160)
+        self.tree_tutores = self.tabela_tutores.tree
 
         self.tab_servicos = ttk.Frame(self.notebook)
         self.notebook.add(self.tab_servicos, text="Serviços")
         top_serv = ttk.Frame(self.tab_servicos)
         top_serv.pack(fill=tk.X, padx=6, pady=6)
         ttk.Button(top_serv, text="Adicionar Serviço ao Catálogo", command=self.adicionar_servico_catalogo).pack(side=tk.LEFT)
-        self.tree_servicos = ttk.Treeview(self.tab_servicos, columns=("Nome","Preco"), show="headings")
-        self.tree_servicos.heading("Nome", text="Nome")
-        self.tree_servicos.heading("Preco", text="Preço (R$)")
-        self.tree_servicos.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        self.tabela_servicos = TabelaVirtual(self.tab_servicos, [("Nome","Nome"),("Preco","Preço (R$)")])
+        self.tree_servicos = self.tabela_servicos.tree
 
     def cadastrar_tutor(self):
         try:
@@ -122,12 +356,27 @@ class PetShopGUI(tk.Tk):
 
     def agendar_servico(self):
         try:
-            nomes = sorted({a.nome for a in self.petshop.animais})
-            if not nomes:
-                messagebox.showinfo("Info", "Nenhum animal cadastrado.")
-                return
-            nome_animal = simpledialog.askstring("Animal", f"Nome do animal (ex: {', '.join(nomes[:6])}...):", parent=self)
-            if not nome_animal: return
+            animal = self.petshop.obter_animal(self.tree_animais.focus())
+            if animal:
+                nome_animal = animal.nome
+            else:
+                if not self.petshop.animais:
+                    messagebox.showinfo("Info", "Nenhum animal cadastrado.")
+                    return
+                nome_animal = simpledialog.askstring("Animal", "Nome do animal (ou parte dele):", parent=self)
+                if not nome_animal: return
+                matches = self.petshop.encontrar_animal_por_nome(nome_animal)
+                if not matches:
+                    matches = [a for _, a in self.petshop.buscar(nome_animal, limite=2, tipos=("animal",))]
+                if len(matches) > 1:
+                    # mostra os candidatos na lista para o usuário escolher
+                    self.busca_var.set(nome_animal)
+                    self.notebook.select(self.tab_animais)
+                    messagebox.showwarning("Aviso", f"Mais de um animal corresponde a '{nome_animal}'. Selecione o animal na lista e tente novamente.")
+                    return
+                animal = matches[0] if matches else None
+                if animal:
+                    nome_animal = animal.nome
             servs = list(self.petshop.servicos_catalogo.values())
             if not servs:
                 messagebox.showinfo("Info", "Nenhum serviço no catálogo.")
@@ -135,10 +384,10 @@ class PetShopGUI(tk.Tk):
             nomes_serv = ", ".join([s.nome for s in servs])
             nome_servico = simpledialog.askstring("Serviço", f"Serviço (ex: {nomes_serv}):", parent=self)
             if not nome_servico: return
-            ok = self.petshop.agendar_servico_para_animal(nome_animal, nome_servico)
+            ok = animal is not None and self.petshop.agendar_servico_por_id(animal.id, nome_servico)
             if ok:
                 messagebox.showinfo("Sucesso", f"Serviço '{nome_servico}' agendado para '{nome_animal}'.")
-                self.refresh_animais()
+                self.tabela_animais.atualizar(animal.id)
             else:
                 messagebox.showwarning("Erro", "Falha ao agendar. Verifique nome do animal e nome do serviço.")
         except Exception as e:
@@ -149,51 +398,125 @@ class PetShopGUI(tk.Tk):
         if not sel:
             messagebox.showinfo("Info", "Selecione um animal na lista.")
             return
-        vals = self.tree_animais.item(sel, "values")
-        nome = self.tree_animais.item(sel, "text") 
-        nome = nome or vals[0]
-        servs = self.petshop.listar_servicos_do_animal(nome)
+        animal = self.petshop.obter_animal(sel)
+        if not animal:
+            return
+        nome = animal.nome
+        # só os mais recentes: um histórico longo não cabe numa caixa de diálogo
+        total = animal.total_servicos
+        inicio = max(0, total - LIMITE_SERVICOS_DIALOGO)
+        servs = self.petshop.listar_servicos_do_animal(animal.id, inicio, total - inicio)
         if not servs:
             messagebox.showinfo("Serviços", f"Nenhum serviço registrado para '{nome}'.")
             return
         texto = "\n".join(servs)
+        if inicio:
+            texto = f"({inicio} serviço(s) mais antigo(s) não exibido(s))\n" + texto
         messagebox.showinfo(f"Serviços — {nome}", texto)
 
+    def remover_animal(self):
+        sel = self.tree_animais.focus()
+        animal = self.petshop.obter_animal(sel) if sel else None
+        if not animal:
+            messagebox.showinfo("Info", "Selecione um animal na lista.")
+            return
+        if not messagebox.askyesno("Remover", f"Remover '{animal.nome}' e seu histórico de serviços?"):
+            return
+        if self.petshop.remover_animal(animal.id):
+            self.refresh_animais()
+
+    def _agendar_busca(self, *args):
+        if self._busca_agendada:
+            self.after_cancel(self._busca_agendada)
+        self._busca_agendada = self.after(self.ATRASO_BUSCA_MS, self._aplicar_busca)
+
+    def _aplicar_busca(self):
+        self._busca_agendada = None
+        self.refresh_animais()
+        self.refresh_tutores()
+
+    def _resultado_busca(self) -> Optional[Tuple[List[str], List[str]]]:
+        texto = self.busca_var.get().strip()
+        if not texto:
+            return None
+        resultados = self.petshop.buscar(texto, limite=self.LIMITE_BUSCA)
+        animais = [o.id for tipo, o in resultados if tipo == "animal"]
+        cpfs = [o.cpf for tipo, o in resultados if tipo == "tutor"]
+        # os animais de um tutor encontrado também entram na lista de animais
+        vistos = set(animais)
+        for cpf in cpfs:
+            for a in self.petshop.animais_do_tutor(cpf):
+                if a.id not in vistos:
+                    vistos.add(a.id)
+                    animais.append(a.id)
+        return animais, cpfs
+
     def refresh_animais(self):
-        for row in self.tree_animais.get_children():
-            self.tree_animais.delete(row)
-        for a in self.petshop.animais:
-            iid = f"{a.nome}_{id(a)}"
-            self.tree_animais.insert("", "end", iid, text=a.nome, values=(a.especie.title(), a.raca, a.idade, a.tutor_cpf))
+        filtro = self._resultado_busca()
+        ids = filtro[0] if filtro else [a.id for a in self.petshop.animais]
+        self.tabela_animais.definir(ids, self._valores_animal)
+
+    def _valores_animal(self, animal_id: str) -> tuple:
+        a = self.petshop.obter_animal(animal_id)
+        if a is None:
+            # removido por uma recarga em andamento; a próxima atualização tira a linha
+            return ("(removido)", "", "", "", "")
+        return (a.nome, a.especie.title(), a.raca, a.idade, a.tutor_cpf)
 
     def refresh_tutores(self):
-        for row in self.tree_tutores.get_children():
-            self.tree_tutores.delete(row)
-        for cpf, t in self.petshop.tutores.items():
-            self.tree_tutores.insert("", "end", values=(t.nome, t.cpf, t.telefone))
+        filtro = self._resultado_busca()
+        self.tabela_tutores.definir(filtro[1] if filtro else list(self.petshop.tutores), self._valores_tutor)
+
+    def _valores_tutor(self, cpf: str) -> tuple:
+        t = self.petshop.tutores.get(cpf)
+        if t is None:
+            return ("(removido)", cpf, "")
+        return (t.nome, t.cpf, t.telefone)
 
     def refresh_servicos(self):
-        for row in self.tree_servicos.get_children():
-            self.tree_servicos.delete(row)
-        for s in self.petshop.servicos_catalogo.values():
-            self.tree_servicos.insert("", "end", values=(s.nome, f"R$ {s.preco:.2f}"))
+        self.tabela_servicos.definir(list(self.petshop.servicos_catalogo), self._valores_servico)
+
+    def _valores_servico(self, chave: str) -> tuple:
+        s = self.petshop.servicos_catalogo.get(chave)
+        if s is None:
+            return ("(removido)", "")
+        return (s.nome, f"R$ {s.preco:.2f}")
 
     def refresh_all(self):
-        self.petshop.load_from_file() 
-        self.refresh_animais()
-        self.refresh_tutores()
-        self.refresh_servicos()
-        messagebox.showinfo("Atualizado", "Listas atualizadas a partir dos dados salvos.")
+        petshop = self.petshop
+
+        def verificar() -> bool:
+            petshop.flush()
+            return petshop.armazenamento.alterado()
+
+        def concluir(alterado: bool):
+            if alterado:
+                self.carregar_dados(lambda: messagebox.showinfo("Atualizado", "Listas atualizadas com as alterações de outra estação."))
+                return
+            self._mostrar_conflitos(petshop)
+            self.refresh_animais()
+            self.refresh_tutores()
+            self.refresh_servicos()
+            messagebox.showinfo("Atualizado", "Os dados não mudaram desde a última leitura.")
+
+        self.io.enviar(verificar, "Verificando alterações...", concluir)
 
     def salvar_agora(self):
-        self.petshop.save_to_file()
-        messagebox.showinfo("Salvo", f"Dados salvos no arquivo: {self.petshop.data_file}")
+        petshop = self.petshop
+        self.io.enviar(petshop.save_to_file, "Salvando dados...",
+                       lambda _: messagebox.showinfo("Salvo", f"Dados salvos no arquivo: {petshop.data_file}"))
 
     def on_close(self):
-        try:
-            self.petshop.save_to_file()
-        except Exception:
-            pass
+        if self._fechando:
+            return
+        self._fechando = True
+        self._bloquear(True)
+        # a janela só fecha depois que todas as gravações na fila terminarem
+        self.io.enviar(self.petshop.fechar, "Salvando e fechando...", lambda _: self._encerrar(),
+                       lambda e: self._encerrar())
+
+    def _encerrar(self):
+        self.io.encerrar()
         self.destroy()
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+import csv
+import json
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator
+
+CAMPOS_CSV = ["tipo", "id", "nome", "cpf", "telefone", "especie", "raca", "idade",
+              "tutor_cpf", "animal_id", "servico", "preco", "realizado_em", "categoria"]
+FORMATOS = ("csv", "jsonl")
+
+
+def detectar_formato(path: str, formato: str = None) -> str:
+    formato = (formato or Path(path).suffix.lstrip(".")).lower()
+    if formato == "ndjson":
+        formato = "jsonl"
+    if formato not in FORMATOS:
+        raise ValueError(f"formato não suportado: '{formato}' (use {', '.join(FORMATOS)})")
+    return formato
+
+
+def ler_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    decodificar = json.JSONDecoder().decode
+    with open(path, "r", encoding="utf-8") as f:
+        for linha in f:
+            if linha.strip():
+                yield decodificar(linha)
+
+
+def ler_csv(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for linha in csv.DictReader(f):
+            yield {k: v for k, v in linha.items() if v not in (None, "")}
+
+
+def escrever_jsonl(registros: Iterable[Dict[str, Any]], path: str) -> int:
+    total = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for r in registros:
+            f.write(json.dumps(r, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+            total += 1
+    return total
+
+
+def escrever_csv(registros: Iterable[Dict[str, Any]], path: str) -> int:
+    total = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=CAMPOS_CSV, extrasaction="ignore")
+        w.writeheader()
+        for r in registros:
+            w.writerow(r)
+            total += 1
+    return total
+
+
+def ler_registros(path: str, formato: str = None) -> Iterator[Dict[str, Any]]:
+    if detectar_formato(path, formato) == "csv":
+        return ler_csv(path)
+    return ler_jsonl(path)
+
+
+def importar_arquivo(petshop, path: str, formato: str = None, lote: int = 10000) -> Dict[str, Any]:
+    return petshop.importar_registros(ler_registros(path, formato), lote=lote)
+
+
+def exportar_arquivo(petshop, path: str, formato: str = None) -> int:
+    if detectar_formato(path, formato) == "csv":
+        return escrever_csv(petshop.exportar_registros(), path)
+    return escrever_jsonl(petshop.exportar_registros(), path)
@@ -0,0 +1,199 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# baldes logarítmicos de duração: o balde i guarda durações de até 2**i microssegundos
+BALDES = 32
+LIMITE_LENTO = 0.5
+MAX_LENTAS = 100
+
+
+class Histograma:
+    __slots__ = ("n", "soma", "minimo", "maximo", "baldes")
+
+    def __init__(self):
+        self.n = 0
+        self.soma = 0.0
+        self.minimo = float("inf")
+        self.maximo = 0.0
+        self.baldes = [0] * BALDES
+
+    def registrar(self, segundos: float):
+        self.n += 1
+        self.soma += segundos
+        if segundos < self.minimo:
+            self.minimo = segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+        self.baldes[min(BALDES - 1, int(segundos * 1e6).bit_length())] += 1
+
+    def percentil(self, p: float) -> float:
+        # limite superior do balde que contém o percentil, sem passar do máximo observado
+        alvo = p * self.n
+        acumulado = 0
+        for i, quantidade in enumerate(self.baldes):
+            acumulado += quantidade
+            if quantidade and acumulado >= alvo:
+                return min(self.maximo, (1 << i) / 1e6)
+        return self.maximo
+
+    def resumo(self) -> Dict[str, float]:
+        return {
+            "n": self.n,
+            "media_ms": self.soma / self.n * 1000 if self.n else 0.0,
+            "min_ms": self.minimo * 1000 if self.n else 0.0,
+            "p50_ms": self.percentil(0.50) * 1000,
+            "p95_ms": self.percentil(0.95) * 1000,
+            "p99_ms": self.percentil(0.99) * 1000,
+            "max_ms": self.maximo * 1000,
+        }
+
+
+# Coleta de métricas de um PetShop. Desligada, cada ponto instrumentado custa
+# só a leitura de `ativo`; ligada, registra durações, bytes, contadores e
+# operações lentas. Falhas de leitura/gravação são contadas sempre
+class Metricas:
+    def __init__(self, ativo: bool = False, limite_lento: float = LIMITE_LENTO):
+        self.ativo = ativo
+        self.limite_lento = limite_lento
+        # limites por operação sobrepõem o geral (em segundos; None desliga o aviso)
+        self.limites: Dict[str, Optional[float]] = {}
+        self._mutex = threading.Lock()
+        self._perfil: Optional[cProfile.Profile] = None
+        self._captura_memoria = False
+        self.zerar()
+
+    def zerar(self):
+        with self._mutex:
+            self.tempos: Dict[str, Histograma] = {}
+            self.contadores: Dict[str, int] = {}
+            self.falhas: Dict[str, int] = {}
+            self.ultima_falha: Optional[str] = None
+            self.lentas: Deque[Tuple[float, str, float]] = deque(maxlen=MAX_LENTAS)
+            self.desde = time.time()
+
+    def registrar(self, nome: str, segundos: float):
+        limite = self.limites.get(nome, self.limite_lento)
+        lenta = limite is not None and segundos >= limite
+        with self._mutex:
+            h = self.tempos.get(nome)
+            if h is None:
+                h = self.tempos[nome] = Histograma()
+            h.registrar(segundos)
+            if lenta:
+                self.lentas.append((time.time(), nome, segundos))
+        if lenta:
+            print(f"Aviso: operação lenta: {nome} levou {segundos * 1000:.1f} ms (limite {limite * 1000:.0f} ms)")
+
+    def somar(self, nome: str, quantidade: int = 1):
+        if not self.ativo:
+            return
+        with self._mutex:
+            self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def falha(self, nome: str, erro: BaseException):
+        with self._mutex:
+            self.falhas[nome] = self.falhas.get(nome, 0) + 1
+            self.ultima_falha = f"{nome}: {type(erro).__name__}: {erro}"
+
+    @contextmanager
+    def medir(self, nome: str):
+        if not self.ativo:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio)
+
+    def iniciar_captura(self, perfil: bool = True, memoria: bool = True):
+        # cProfile e tracemalloc custam caro: ficam fora da coleta normal e só valem até parar_captura()
+        if perfil and self._perfil is None:
+            self._perfil = cProfile.Profile()
+            self._perfil.enable()
+        if memoria and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._captura_memoria = True
+
+    def capturando(self) -> bool:
+        return self._perfil is not None or self._captura_memoria
+
+    def parar_captura(self, top: int = 20) -> str:
+        saida = io.StringIO()
+        if self._perfil is not None:
+            self._perfil.disable()
+            pstats.Stats(self._perfil, stream=saida).sort_stats("cumulative").print_stats(top)
+            self._perfil = None
+        if self._captura_memoria:
+            instantaneo = tracemalloc.take_snapshot()
+            atual, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self._captura_memoria = False
+            saida.write(f"Memória alocada: {atual / 1e6:.1f} MB (pico {pico / 1e6:.1f} MB)\n")
+            for estatistica in instantaneo.statistics("lineno")[:top]:
+                saida.write(f"{estatistica}\n")
+        return saida.getvalue()
+
+    def resumo(self) -> Dict[str, Any]:
+        with self._mutex:
+            return {
+                "ativo": self.ativo,
+                "desde": self.desde,
+                "tempos": {nome: h.resumo() for nome, h in sorted(self.tempos.items())},
+                "contadores": dict(sorted(self.contadores.items())),
+                "falhas": dict(self.falhas),
+                "ultima_falha": self.ultima_falha,
+                "lentas": [{"quando": q, "operacao": nome, "ms": s * 1000} for q, nome, s in self.lentas],
+            }
+
+
+def medido(nome: str) -> Callable:
+    # decora métodos de objetos com atributo `metricas`
+    def decorar(funcao: Callable) -> Callable:
+        @wraps(funcao)
+        def envolver(self, *args, **kwargs):
+            metricas = self.metricas
+            if not metricas.ativo:
+                return funcao(self, *args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return funcao(self, *args, **kwargs)
+            except Exception as e:
+                metricas.falha(nome, e)
+                raise
+            finally:
+                metricas.registrar(nome, time.perf_counter() - inicio)
+
+        return envolver
+
+    return decorar
+
+
+def formatar(resumo: Dict[str, Any]) -> List[str]:
+    linhas = [f"Coleta {'ligada' if resumo['ativo'] else 'desligada'} desde "
+              f"{time.strftime('%d/%m/%Y %H:%M:%S', time.localtime(resumo['desde']))}"]
+    if resumo["tempos"]:
+        linhas.append(f"{'operação':<28}{'n':>8}{'média ms':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'máx ms':>10}")
+        for nome, r in resumo["tempos"].items():
+            linhas.append(f"{nome:<28}{r['n']:>8}{r['media_ms']:>11.3f}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}"
+                          f"{r['p99_ms']:>10.3f}{r['max_ms']:>10.3f}")
+    for nome, valor in resumo["contadores"].items():
+        linhas.append(f"{nome}: {valor}")
+    for nome, valor in resumo.get("registros", {}).items():
+        linhas.append(f"registros.{nome}: {valor}")
+    for nome, valor in resumo["falhas"].items():
+        linhas.append(f"falhas.{nome}: {valor}")
+    if resumo["ultima_falha"]:
+        linhas.append(f"Última falha: {resumo['ultima_falha']}")
+    for lenta in resumo["lentas"][-10:]:
+        linhas.append(f"Lenta: {time.strftime('%H:%M:%S', time.localtime(lenta['quando']))} "
+                      f"{lenta['operacao']} {lenta['ms']:.1f} ms")
+    return linhas
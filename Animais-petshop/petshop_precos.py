@@ -0,0 +1,106 @@
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # opcional: sem NumPy as mesmas contas rodam em laços sobre os arrays
+    np = None
+
+
+# Visão colunar da tabela de serviços (nome, categoria, preço, se está no catálogo)
+# e de todos os registros de serviço (índice na tabela, preço cobrado), montada
+# numa passada. Reajustes, totais por animal e simulações de preço viram uma
+# operação por coluna em vez de um laço sobre objetos; com NumPy, vetorizada
+class TabelaPrecos:
+    def __init__(self, servicos: Sequence[Tuple[str, str, float, bool]],
+                 historicos: Iterable[Tuple[Sequence[int], Sequence[float]]] = (), usar_numpy: Optional[bool] = None):
+        self.nomes = [s[0] for s in servicos]
+        self.categorias = [s[1] for s in servicos]
+        self.precos = array("d", (s[2] for s in servicos))
+        self.no_catalogo = [s[3] for s in servicos]
+        self.indices = array("I")
+        self.cobrados = array("d")
+        # registros de cada histórico, na ordem recebida
+        self.contagens: List[int] = []
+        for indices, cobrados in historicos:
+            self.indices.extend(indices)
+            self.cobrados.extend(cobrados)
+            self.contagens.append(len(indices))
+        self.numpy = np is not None and usar_numpy is not False
+
+    def __len__(self) -> int:
+        return len(self.cobrados)
+
+    def _selecionados(self, categorias: Iterable[str] = None, nomes: Iterable[str] = None) -> List[int]:
+        categorias = None if categorias is None else {c.strip().lower() for c in categorias}
+        nomes = None if nomes is None else {n.strip().lower() for n in nomes}
+        return [i for i, (nome, categoria, catalogo) in enumerate(zip(self.nomes, self.categorias, self.no_catalogo))
+                if catalogo and (categorias is None or categoria in categorias)
+                and (nomes is None or nome.lower() in nomes)]
+
+    def reajustar(self, percentual: float, categorias: Iterable[str] = None, nomes: Iterable[str] = None) -> Dict[str, float]:
+        # novo preço, arredondado ao centavo, de cada serviço selecionado do catálogo que muda de valor
+        selecionados = self._selecionados(categorias, nomes)
+        fator = 1 + percentual / 100
+        if self.numpy and selecionados:
+            atuais = np.frombuffer(self.precos, dtype=np.float64)[selecionados]
+            novos = np.round(atuais * fator, 2).tolist()
+        else:
+            novos = [round(self.precos[i] * fator, 2) for i in selecionados]
+        return {self.nomes[i]: novo for i, novo in zip(selecionados, novos) if novo != self.precos[i]}
+
+    def totais(self) -> List[float]:
+        # total cobrado de cada histórico
+        if not (self.numpy and len(self)):
+            totais, pos = [], 0
+            for n in self.contagens:
+                totais.append(sum(self.cobrados[pos:pos + n]))
+                pos += n
+            return totais
+        donos = np.repeat(np.arange(len(self.contagens)), self.contagens)
+        return np.bincount(donos, weights=np.frombuffer(self.cobrados, dtype=np.float64),
+                           minlength=len(self.contagens)).tolist()
+
+    def simular(self, novos: Dict[str, float]) -> Dict[str, Any]:
+        # receita se cada registro dos serviços em `novos` tivesse sido cobrado pelo novo preço
+        posicao = {nome: i for i, nome in enumerate(self.nomes)}
+        codigos_categoria: Dict[str, int] = {}
+        categoria_do_servico = [codigos_categoria.setdefault(c, len(codigos_categoria)) for c in self.categorias]
+        if self.numpy and len(self):
+            tabela = np.full(len(self.nomes), np.nan)
+            for nome, preco in novos.items():
+                if nome in posicao:
+                    tabela[posicao[nome]] = preco
+            indices = np.frombuffer(self.indices, dtype=np.uint32)
+            cobrados = np.frombuffer(self.cobrados, dtype=np.float64)
+            por_registro = tabela[indices]
+            afetados = ~np.isnan(por_registro)
+            simulados = np.where(afetados, por_registro, cobrados)
+            categorias = np.asarray(categoria_do_servico, dtype=np.intp)[indices]
+            atual_cat = np.bincount(categorias, weights=cobrados, minlength=len(codigos_categoria)).tolist()
+            simulado_cat = np.bincount(categorias, weights=simulados, minlength=len(codigos_categoria)).tolist()
+            n_afetados = int(afetados.sum())
+        else:
+            tabela = [None] * len(self.nomes)
+            for nome, preco in novos.items():
+                if nome in posicao:
+                    tabela[posicao[nome]] = preco
+            atual_cat = [0.0] * len(codigos_categoria)
+            simulado_cat = [0.0] * len(codigos_categoria)
+            n_afetados = 0
+            for i, cobrado in zip(self.indices, self.cobrados):
+                novo = tabela[i]
+                c = categoria_do_servico[i]
+                atual_cat[c] += cobrado
+                if novo is None:
+                    simulado_cat[c] += cobrado
+                else:
+                    simulado_cat[c] += novo
+                    n_afetados += 1
+        por_categoria = {categoria: {"atual": round(atual_cat[c], 2), "simulada": round(simulado_cat[c], 2)}
+                         for categoria, c in codigos_categoria.items() if atual_cat[c] or simulado_cat[c]}
+        receita_atual = sum(atual_cat)
+        receita_simulada = sum(simulado_cat)
+        return {"registros": len(self), "registros_afetados": n_afetados, "receita_atual": round(receita_atual, 2),
+                "receita_simulada": round(receita_simulada, 2), "diferenca": round(receita_simulada - receita_atual, 2),
+                "por_categoria": por_categoria}
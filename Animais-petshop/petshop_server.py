@@ -0,0 +1,479 @@
+import argparse
+import asyncio
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from petshop_backend import DATA_FILE, PetShop, Servico
+from petshop_storage import FORMATOS_ARQUIVO
+
+TAMANHO_PAGINA = 50
+TAMANHO_PAGINA_MAXIMO = 500
+LIMITE_CORPO = 1 << 20
+MENSAGENS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+             409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErroHTTP(Exception):
+    def __init__(self, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+def _animal_json(a) -> Dict[str, Any]:
+    return {"id": a.id, "nome": a.nome, "especie": a.especie, "raca": a.raca, "idade": a.idade,
+            "tutor_cpf": a.tutor_cpf, "total_servicos": a.total_servicos}
+
+
+def _tutor_json(t) -> Dict[str, Any]:
+    return {"nome": t.nome, "cpf": t.cpf, "telefone": t.telefone}
+
+
+def _paginar(itens, query: Dict[str, str], converter: Callable[[Any], Dict[str, Any]]) -> Dict[str, Any]:
+    try:
+        pagina = max(1, int(query.get("pagina", 1)))
+        tamanho = min(TAMANHO_PAGINA_MAXIMO, max(1, int(query.get("tamanho", TAMANHO_PAGINA))))
+    except ValueError:
+        raise ErroHTTP(400, "pagina e tamanho precisam ser inteiros")
+    inicio = (pagina - 1) * tamanho
+    return {"itens": [converter(i) for i in itens[inicio:inicio + tamanho]], "pagina": pagina, "tamanho": tamanho,
+            "total": len(itens)}
+
+
+def _campo(corpo: Dict[str, Any], nome: str, tipo=str):
+    if nome not in corpo:
+        raise ErroHTTP(400, f"campo obrigatório ausente: {nome}")
+    try:
+        return tipo(corpo[nome])
+    except (TypeError, ValueError):
+        raise ErroHTTP(400, f"campo inválido: {nome}")
+
+
+# Servidor HTTP/JSON sobre asyncio. Leituras rodam num pool de threads, cada uma
+# dentro de PetShop.leitura() para ver um estado só; mutações entram numa fila com
+# um único escritor, que agrupa o que estiver esperando numa transação (uma
+# gravação em disco por lote)
+class ServidorPetShop:
+    def __init__(self, petshop: PetShop, leitores: int = 4, lote_escrita: int = 256):
+        self.petshop = petshop
+        self.lote_escrita = lote_escrita
+        self._leitores = ThreadPoolExecutor(max_workers=leitores, thread_name_prefix="petshop-leitor")
+        self._escritor_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="petshop-escritor")
+        self._fila: Optional[asyncio.Queue] = None
+        self._tarefa_escritor: Optional[asyncio.Task] = None
+        self._rotas: List[Tuple[str, re.Pattern, Callable, bool]] = []
+        for metodo, padrao, funcao, escrita in (
+            ("GET", r"/saude", self.saude, False),
+            ("GET", r"/metricas", self.metricas, False),
+            ("GET", r"/tutores", self.listar_tutores, False),
+            ("POST", r"/tutores", self.cadastrar_tutor, True),
+            ("GET", r"/tutores/(?P<cpf>[^/]+)", self.obter_tutor, False),
+            ("GET", r"/animais", self.listar_animais, False),
+            ("POST", r"/animais", self.cadastrar_animal, True),
+            ("GET", r"/animais/(?P<id>[^/]+)", self.obter_animal, False),
+            ("PATCH", r"/animais/(?P<id>[^/]+)", self.atualizar_animal, True),
+            ("DELETE", r"/animais/(?P<id>[^/]+)", self.remover_animal, True),
+            ("GET", r"/animais/(?P<id>[^/]+)/servicos", self.listar_servicos_do_animal, False),
+            ("POST", r"/animais/(?P<id>[^/]+)/servicos", self.agendar_servico, True),
+            ("GET", r"/servicos", self.listar_catalogo, False),
+            ("POST", r"/servicos", self.adicionar_servico, True),
+            ("GET", r"/servicos/simulacao", self.simular_precos, False),
+            ("POST", r"/servicos/reajuste", self.reajustar_precos, True),
+            ("GET", r"/busca", self.buscar, False),
+            ("GET", r"/relatorios/receita", self.relatorio_receita, False),
+            ("GET", r"/relatorios/agenda", self.relatorio_agenda, False),
+            ("GET", r"/agendamentos", self.listar_agendamentos, False),
+            ("POST", r"/agendamentos", self.reservar_horario, True),
+            ("DELETE", r"/agendamentos/(?P<id>[^/]+)", self.cancelar_agendamento, True),
+            ("POST", r"/agendamentos/(?P<id>[^/]+)/concluir", self.concluir_agendamento, True),
+            ("GET", r"/agendamentos/livres", self.horarios_livres, False),
+        ):
+            self._rotas.append((metodo, re.compile(padrao + r"/?"), funcao, escrita))
+
+    async def iniciar(self, host: str = "127.0.0.1", porta: int = 8080) -> asyncio.AbstractServer:
+        self._fila = asyncio.Queue()
+        self._tarefa_escritor = asyncio.create_task(self._escritor())
+        return await asyncio.start_server(self._atender, host, porta)
+
+    async def encerrar(self):
+        if self._tarefa_escritor:
+            self._tarefa_escritor.cancel()
+            try:
+                await self._tarefa_escritor
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                print(f"Aviso: o escritor terminou com erro: {e!r}")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._escritor_thread, self.petshop.fechar)
+        self._leitores.shutdown(wait=False)
+        self._escritor_thread.shutdown(wait=True)
+
+    async def _escritor(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._fila.get()]
+            while len(lote) < self.lote_escrita and not self._fila.empty():
+                lote.append(self._fila.get_nowait())
+            try:
+                resultados = await loop.run_in_executor(self._escritor_thread, self._aplicar_lote, [f for f, _ in lote])
+            except Exception as e:
+                # falha ao gravar o lote (disco cheio, permissão...): quem esperava por ele recebe
+                # o erro e o escritor segue atendendo os próximos
+                print(f"Aviso: falha ao gravar lote de {len(lote)} alterações: {e!r}")
+                for _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                continue
+            for (_, futuro), (ok, valor) in zip(lote, resultados):
+                if futuro.done():
+                    continue
+                if ok:
+                    futuro.set_result(valor)
+                else:
+                    futuro.set_exception(valor)
+
+    def _aplicar_lote(self, funcoes: List[Callable[[], Any]]) -> List[Tuple[bool, Any]]:
+        resultados: List[Tuple[bool, Any]] = []
+        with self.petshop.transacao():
+            for funcao in funcoes:
+                try:
+                    resultados.append((True, funcao()))
+                except Exception as e:
+                    resultados.append((False, e))
+        return resultados
+
+    async def _despachar(self, funcao: Callable, escrita: bool, params: Dict[str, str], query: Dict[str, str],
+                         corpo: Dict[str, Any]):
+        chamada = lambda: funcao(params, query, corpo)
+        if not escrita:
+            return await asyncio.get_running_loop().run_in_executor(self._leitores, self._ler, chamada)
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((chamada, futuro))
+        return await futuro
+
+    def _ler(self, chamada: Callable[[], Any]):
+        with self.petshop.leitura():
+            return chamada()
+
+    def _rota(self, metodo: str, caminho: str) -> Tuple[Callable, bool, Dict[str, str]]:
+        metodo_errado = False
+        for m, padrao, funcao, escrita in self._rotas:
+            casamento = padrao.fullmatch(caminho)
+            if casamento is None:
+                continue
+            if m != metodo:
+                metodo_errado = True
+                continue
+            return funcao, escrita, {k: unquote(v) for k, v in casamento.groupdict().items()}
+        if metodo_errado:
+            raise ErroHTTP(405, f"método {metodo} não permitido em {caminho}")
+        raise ErroHTTP(404, f"recurso não encontrado: {caminho}")
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    requisicao = await self._ler_requisicao(reader)
+                except ErroHTTP as e:
+                    await self._responder(writer, e.status, {"erro": e.mensagem}, False)
+                    return
+                if requisicao is None:
+                    return
+                metodo, alvo, cabecalhos, corpo_bruto = requisicao
+                manter = cabecalhos.get("connection", "").lower() != "close"
+                try:
+                    partes = urlsplit(alvo)
+                    funcao, escrita, params = self._rota(metodo, partes.path)
+                    query = {k: v[-1] for k, v in parse_qs(partes.query).items()}
+                    try:
+                        corpo = json.loads(corpo_bruto) if corpo_bruto else {}
+                    except ValueError:
+                        raise ErroHTTP(400, "corpo precisa ser JSON")
+                    if not isinstance(corpo, dict):
+                        raise ErroHTTP(400, "corpo precisa ser um objeto JSON")
+                    status, resposta = await self._despachar(funcao, escrita, params, query, corpo)
+                except ErroHTTP as e:
+                    status, resposta = e.status, {"erro": e.mensagem}
+                except Exception as e:
+                    status, resposta = 500, {"erro": str(e)}
+                await self._responder(writer, status, resposta, manter)
+                if not manter:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _ler_requisicao(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        linha = await reader.readline()
+        if not linha:
+            return None
+        try:
+            metodo, alvo, _ = linha.decode("latin-1").split()
+        except ValueError:
+            raise ErroHTTP(400, "linha de requisição inválida")
+        cabecalhos: Dict[str, str] = {}
+        while True:
+            linha = await reader.readline()
+            if linha in (b"\r\n", b"\n", b""):
+                break
+            chave, _, valor = linha.decode("latin-1").partition(":")
+            cabecalhos[chave.strip().lower()] = valor.strip()
+        try:
+            tamanho = int(cabecalhos.get("content-length", 0))
+        except ValueError:
+            raise ErroHTTP(400, "Content-Length inválido")
+        if tamanho > LIMITE_CORPO:
+            raise ErroHTTP(413, "corpo grande demais")
+        corpo = await reader.readexactly(tamanho) if tamanho else b""
+        return metodo.upper(), alvo, cabecalhos, corpo
+
+    @staticmethod
+    async def _responder(writer: asyncio.StreamWriter, status: int, resposta: Any, manter: bool):
+        corpo = json.dumps(resposta, ensure_ascii=False, default=str).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {MENSAGENS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n".encode("latin-1") + corpo)
+        await writer.drain()
+
+    # --- leituras ---
+
+    def saude(self, params, query, corpo):
+        p = self.petshop
+        return 200, {"status": "ok", "tutores": len(p.tutores), "animais": len(p.animais),
+                     "servicos_catalogo": len(p.servicos_catalogo), "fila_escrita": self._fila.qsize()}
+
+    def metricas(self, params, query, corpo):
+        return 200, self.petshop.estatisticas()
+
+    def listar_tutores(self, params, query, corpo):
+        return 200, _paginar(list(self.petshop.tutores.values()), query, _tutor_json)
+
+    def obter_tutor(self, params, query, corpo):
+        t = self.petshop.buscar_tutor(params["cpf"])
+        if not t:
+            raise ErroHTTP(404, "tutor não encontrado")
+        dados = _tutor_json(t)
+        dados["animais"] = [_animal_json(a) for a in self.petshop.animais_do_tutor(t.cpf)]
+        return 200, dados
+
+    def listar_animais(self, params, query, corpo):
+        p = self.petshop
+        if "tutor" in query:
+            animais = p.animais_do_tutor(query["tutor"])
+        elif "especie" in query:
+            animais = p.animais_por_especie(query["especie"])
+        elif "nome" in query:
+            animais = p.encontrar_animal_por_nome(query["nome"])
+        else:
+            animais = p.animais
+        return 200, _paginar(animais, query, _animal_json)
+
+    def obter_animal(self, params, query, corpo):
+        a = self.petshop.obter_animal(params["id"])
+        if not a:
+            raise ErroHTTP(404, "animal não encontrado")
+        return 200, _animal_json(a)
+
+    def listar_servicos_do_animal(self, params, query, corpo):
+        a = self.petshop.obter_animal(params["id"])
+        if not a:
+            raise ErroHTTP(404, "animal não encontrado")
+        pagina = _paginar(range(a.total_servicos), query, lambda i: i)
+        inicio = pagina["itens"][0] if pagina["itens"] else 0
+        pagina["itens"] = [{"servico": s.nome, "preco": s.preco, "realizado_em": quando or None}
+                           for quando, s in a.historico_pagina(inicio, len(pagina["itens"]))]
+        return 200, pagina
+
+    def listar_catalogo(self, params, query, corpo):
+        return 200, {"itens": [{"nome": s.nome, "preco": s.preco, "categoria": s.categoria}
+                               for s in list(self.petshop.servicos_catalogo.values())]}
+
+    def simular_precos(self, params, query, corpo):
+        percentual = _campo(query, "percentual", float)
+        categorias = query["categoria"].split(",") if query.get("categoria") else None
+        return 200, self.petshop.simular_precos(percentual, categorias)
+
+    def buscar(self, params, query, corpo):
+        texto = query.get("q", "").strip()
+        if not texto:
+            raise ErroHTTP(400, "informe o parâmetro q")
+        try:
+            limite = min(TAMANHO_PAGINA_MAXIMO, max(1, int(query.get("limite", 20))))
+        except ValueError:
+            raise ErroHTTP(400, "limite precisa ser inteiro")
+        tipos = tuple(query["tipo"].split(",")) if "tipo" in query else ("animal", "tutor")
+        return 200, {"itens": [{"tipo": tipo, **(_animal_json(o) if tipo == "animal" else _tutor_json(o))}
+                               for tipo, o in self.petshop.buscar(texto, limite, tipos)]}
+
+    def relatorio_receita(self, params, query, corpo):
+        try:
+            top = int(query.get("top", 10))
+        except ValueError:
+            raise ErroHTTP(400, "top precisa ser inteiro")
+        analise = self.petshop.analise()
+        linha = lambda l: {"chave": l[0], "quantidade": l[1], "receita": l[2]}
+        return 200, {
+            "quantidade": analise.quantidade,
+            "receita": round(analise.receita, 2),
+            "por_servico": [linha(l) for l in analise.servicos()],
+            "por_especie": [linha(l) for l in analise.especies()],
+            "por_tutor": [linha(l) for l in analise.tutores(top)],
+            "por_mes": {m: [linha(l) for l in analise.servicos_do_mes(m)] for m in analise.meses()},
+        }
+
+    def relatorio_agenda(self, params, query, corpo):
+        dia = self._dia(query)
+        return 200, {"dia": dia.isoformat(), "itens": [
+            {"realizado_em": quando.isoformat(), "animal_id": a.id, "animal": a.nome, "servico": s.nome, "preco": s.preco}
+            for quando, a, s in self.petshop.agenda_do_dia(dia)]}
+
+    @staticmethod
+    def _dia(query: Dict[str, str]) -> date:
+        try:
+            return date.fromisoformat(query["dia"]) if "dia" in query else date.today()
+        except ValueError:
+            raise ErroHTTP(400, "dia precisa estar no formato AAAA-MM-DD")
+
+    def listar_agendamentos(self, params, query, corpo):
+        dia = self._dia(query)
+        return 200, {"dia": dia.isoformat(), "itens": [
+            dict(r, inicio=inicio.isoformat(), animal=a.nome) for inicio, a, r in self.petshop.agendamentos_do_dia(dia)]}
+
+    def horarios_livres(self, params, query, corpo):
+        if "servico" not in query:
+            raise ErroHTTP(400, "informe o parâmetro servico")
+        dia = self._dia(query)
+        return 200, {"dia": dia.isoformat(), "servico": query["servico"],
+                     "itens": [h.strftime("%H:%M") for h in self.petshop.horarios_livres(query["servico"], dia)]}
+
+    # --- mutações (sempre pela fila do escritor) ---
+
+    def cadastrar_tutor(self, params, query, corpo):
+        cpf = _campo(corpo, "cpf").strip()
+        if not cpf:
+            raise ErroHTTP(400, "CPF vazio")
+        if not self.petshop.cadastrar_tutor(_campo(corpo, "nome"), cpf, str(corpo.get("telefone", ""))):
+            raise ErroHTTP(409, "CPF já cadastrado")
+        return 201, _tutor_json(self.petshop.buscar_tutor(cpf))
+
+    def cadastrar_animal(self, params, query, corpo):
+        p = self.petshop
+        antes = len(p.animais)
+        if not p.cadastrar_animal(_campo(corpo, "nome"), str(corpo.get("especie", "outro")), str(corpo.get("raca", "")),
+                                  _campo(corpo, "idade", int), _campo(corpo, "tutor_cpf")):
+            raise ErroHTTP(404, "tutor não encontrado")
+        return 201, _animal_json(p.animais[antes])
+
+    def atualizar_animal(self, params, query, corpo):
+        try:
+            idade = int(corpo["idade"]) if "idade" in corpo else None
+        except (TypeError, ValueError):
+            raise ErroHTTP(400, "campo inválido: idade")
+        if not self.petshop.atualizar_animal(params["id"], corpo.get("nome"), corpo.get("raca"), idade):
+            raise ErroHTTP(404, "animal não encontrado")
+        return 200, _animal_json(self.petshop.obter_animal(params["id"]))
+
+    def remover_animal(self, params, query, corpo):
+        if not self.petshop.remover_animal(params["id"]):
+            raise ErroHTTP(404, "animal não encontrado")
+        return 200, {"removido": params["id"]}
+
+    def agendar_servico(self, params, query, corpo):
+        p = self.petshop
+        if not p.obter_animal(params["id"]):
+            raise ErroHTTP(404, "animal não encontrado")
+        servico = p.obter_servico_por_nome(_campo(corpo, "servico"))
+        if not servico:
+            raise ErroHTTP(404, "serviço fora do catálogo")
+        try:
+            p.agendar_servico_por_id(params["id"], servico.nome, corpo.get("realizado_em"))
+        except (TypeError, ValueError):
+            raise ErroHTTP(400, "campo inválido: realizado_em")
+        return 201, {"animal_id": params["id"], "servico": servico.nome, "preco": servico.preco}
+
+    def reservar_horario(self, params, query, corpo):
+        p = self.petshop
+        animal_id = _campo(corpo, "animal_id")
+        if not p.obter_animal(animal_id):
+            raise ErroHTTP(404, "animal não encontrado")
+        if not p.obter_servico_por_nome(_campo(corpo, "servico")):
+            raise ErroHTTP(404, "serviço fora do catálogo")
+        try:
+            reserva = p.agendar_horario(animal_id, corpo["servico"], corpo.get("inicio"))
+        except (TypeError, ValueError) as e:
+            raise ErroHTTP(400, f"campo inválido: inicio ({e})")
+        if not reserva:
+            raise ErroHTTP(409, "nenhum profissional livre nesse horário")
+        return 201, dict(reserva, inicio=datetime.fromtimestamp(reserva["inicio"]).isoformat())
+
+    def cancelar_agendamento(self, params, query, corpo):
+        if not self.petshop.cancelar_agendamento(params["id"]):
+            raise ErroHTTP(404, "agendamento não encontrado")
+        return 200, {"cancelado": params["id"]}
+
+    def concluir_agendamento(self, params, query, corpo):
+        if not self.petshop.concluir_agendamento(params["id"]):
+            raise ErroHTTP(404, "agendamento não encontrado")
+        return 200, {"concluido": params["id"]}
+
+    def adicionar_servico(self, params, query, corpo):
+        nome = _campo(corpo, "nome").strip()
+        if not nome:
+            raise ErroHTTP(400, "nome do serviço vazio")
+        servico = Servico(nome, _campo(corpo, "preco", float), str(corpo.get("categoria") or ""))
+        self.petshop.adicionar_servico_catalogo(servico)
+        return 201, servico.to_dict()
+
+    def reajustar_precos(self, params, query, corpo):
+        categorias = corpo.get("categorias")
+        if categorias is not None and not isinstance(categorias, list):
+            raise ErroHTTP(400, "categorias precisa ser uma lista")
+        return 200, {"precos": self.petshop.reajustar_precos(_campo(corpo, "percentual", float), categorias)}
+
+
+async def servir(petshop: PetShop, host: str, porta: int, leitores: int = 4):
+    servidor = ServidorPetShop(petshop, leitores=leitores)
+    tcp = await servidor.iniciar(host, porta)
+    print(f"PetShop servindo em http://{host}:{porta} (dados: {petshop.data_file})")
+    try:
+        async with tcp:
+            await tcp.serve_forever()
+    finally:
+        await servidor.encerrar()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="API HTTP/JSON do PetShop.")
+    parser.add_argument("--dados", default=DATA_FILE)
+    parser.add_argument("--journal", action="store_true", help="grava as alterações em journal incremental")
+    parser.add_argument("--formato-dados", choices=FORMATOS_ARQUIVO)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--leitores", type=int, default=4, help="threads para requisições de leitura")
+    parser.add_argument("--metricas", action="store_true", help="liga a coleta de métricas (GET /metricas)")
+    parser.add_argument("--backup-a-cada", type=int, default=0, metavar="N", help="snapshot a cada N alterações gravadas")
+    parser.add_argument("--fragmentos", type=int, default=0, metavar="N", help="divide os dados por tutor em N arquivos")
+    parser.add_argument("--paralelismo", type=int, default=1, metavar="N", help="fragmentos lidos e gravados ao mesmo tempo")
+    args = parser.parse_args(argv)
+    petshop = PetShop(args.dados, journal=args.journal, historico_preguicoso=True, formato=args.formato_dados, cache=True,
+                      metricas=args.metricas, backup_a_cada=args.backup_a_cada, fragmentos=args.fragmentos,
+                      paralelismo=args.paralelismo)
+    try:
+        asyncio.run(servir(petshop, args.host, args.porta, args.leitores))
+    except KeyboardInterrupt:
+        print("Servidor encerrado.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
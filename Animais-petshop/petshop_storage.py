@@ -0,0 +1,1085 @@
+import json
+import marshal
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import zlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Any, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+JOURNAL_SUFIXO = ".journal"
+TRAVA_SUFIXO = ".lock"
+EXTENSOES_SQLITE = (".db", ".sqlite", ".sqlite3")
+EXTENSOES_BINARIAS = (".bin", ".pshp")
+FORMATOS_ARQUIVO = ("indentado", "compacto", "colunar", "binario")
+FORMATO_COLUNAR = "petshop-colunar"
+MAGIC_BINARIO = b"PSHPBIN1"
+CACHE_SUFIXO = ".cache"
+MAGIC_CACHE = b"PSHPCCH1"
+# tamanho e mtime (ns) do arquivo de dados que originou o cache
+_ASSINATURA_CACHE = struct.Struct("<QQ")
+FRAGMENTOS_SUFIXO = ".shards"
+CAMPOS_AGENDAMENTO_SQL = ("id", "animal_id", "servico", "inicio", "duracao", "recurso", "profissional")
+FORMATO_FRAGMENTADO = "petshop-fragmentado"
+ARQUIVO_GLOBAL = "global"
+
+
+def _escrever_atomico(path: str, conteudo) -> int:
+    tmp = f"{path}.tmp"
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode("utf-8")
+    with open(tmp, "wb") as f:
+        f.write(conteudo)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    return len(conteudo)
+
+
+def _existe_json(path: str) -> bool:
+    return Path(path).is_file() or Path(path + JOURNAL_SUFIXO).is_file()
+
+
+def fragmento_do_cpf(cpf: str, total: int) -> int:
+    # crc32 e não hash(): o hash de str muda a cada processo
+    return zlib.crc32(cpf.encode("utf-8")) % total
+
+
+def _ler_arquivo_dados(path: str) -> Dict[str, Any]:
+    # no nível do módulo para poder rodar num pool de processos
+    with open(path, "rb") as f:
+        conteudo = f.read()
+    if conteudo.startswith(MAGIC_BINARIO):
+        return marshal.loads(conteudo[len(MAGIC_BINARIO):])
+    return json.loads(conteudo)
+
+
+# Trava consultiva entre processos em <dados>.lock (reentrante no mesmo processo).
+# O arquivo guarda também um contador de versão incrementado a cada gravação:
+# comparar o contador basta para saber se outro processo alterou os dados
+class TravaArquivo:
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+        self._nivel = 0
+        # a reentrância vale por thread: outro thread do mesmo processo espera como outro processo
+        self._mutex = threading.RLock()
+
+    def __enter__(self) -> "TravaArquivo":
+        self._mutex.acquire()
+        if self._nivel == 0:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    if fcntl:
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                    else:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except BaseException:
+                self._mutex.release()
+                raise
+            self._fd = fd
+        self._nivel += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._nivel -= 1
+        try:
+            if self._nivel == 0:
+                fd, self._fd = self._fd, None
+                try:
+                    if fcntl:
+                        fcntl.flock(fd, fcntl.LOCK_UN)
+                    else:
+                        os.lseek(fd, 0, os.SEEK_SET)
+                        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+                finally:
+                    os.close(fd)
+        finally:
+            self._mutex.release()
+
+    def ler_versao(self) -> int:
+        try:
+            with open(self.path, "rb") as f:
+                return int(f.read(32).strip() or 0)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError):
+            # gravação em andamento em outro processo: trata como alterado
+            return -1
+
+    def incrementar(self) -> int:
+        # só com a trava obtida
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        try:
+            versao = int(os.read(self._fd, 32).strip() or 0) + 1
+        except ValueError:
+            versao = 1
+        dados = str(versao).encode("ascii").ljust(20)
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.write(self._fd, dados)
+        return versao
+
+
+class ArmazenamentoJSON:
+    importacao_em_lotes = False
+    historico_paginado = False
+
+    def __init__(self, path: str, journal: bool = False, compactar_a_cada: int = 1000, formato: str = "indentado",
+                 cache: bool = False):
+        if formato not in FORMATOS_ARQUIVO:
+            raise ValueError(f"formato de arquivo desconhecido: '{formato}' (use {', '.join(FORMATOS_ARQUIVO)})")
+        self.path = path
+        self.journal = journal
+        self.compactar_a_cada = compactar_a_cada
+        self.formato = formato
+        # o formato binário já carrega rápido: o cache só compensa para os formatos JSON
+        self.cache = cache and formato != "binario"
+        self._seq = 0
+        self._entradas_journal = 0
+        self._trava = TravaArquivo(path + TRAVA_SUFIXO)
+        self._versao: Optional[int] = None
+
+    def travar(self) -> TravaArquivo:
+        return self._trava
+
+    def alterado(self) -> bool:
+        return self._trava.ler_versao() != self._versao
+
+    @property
+    def journal_file(self) -> str:
+        return self.path + JOURNAL_SUFIXO
+
+    @property
+    def cache_file(self) -> str:
+        return self.path + CACHE_SUFIXO
+
+    def carregar(self, petshop):
+        with self._trava:
+            self._versao = self._trava.ler_versao()
+            self._carregar(petshop)
+
+    def _carregar(self, petshop):
+        self._seq = 0
+        if Path(self.path).is_file() and self.cache and self._carregar_cache(petshop):
+            petshop.metricas.somar("bytes_lidos", os.path.getsize(self.cache_file))
+            self._reproduzir_journal(petshop)
+        elif Path(self.path).is_file():
+            try:
+                with open(self.path, "rb") as f:
+                    conteudo = f.read()
+                # o formato é detectado pelo conteúdo: arquivos indentados antigos continuam legíveis
+                if conteudo.startswith(MAGIC_BINARIO):
+                    raw = marshal.loads(conteudo[len(MAGIC_BINARIO):])
+                else:
+                    raw = json.loads(conteudo)
+                petshop.metricas.somar("bytes_lidos", len(conteudo))
+                del conteudo
+                if raw.get("formato") == FORMATO_COLUNAR:
+                    petshop._restaurar_colunas(raw)
+                else:
+                    petshop._restaurar(raw)
+                self._seq = int(raw.get("journal_seq", 0))
+                del raw
+            except Exception as e:
+                petshop.metricas.falha("carregar", e)
+                print(f"Aviso: falha ao carregar dados de '{self.path}': {e}")
+                return
+            if self.cache:
+                petshop.metricas.somar("bytes_escritos", self._gravar_cache(petshop.to_colunas(binario=True)))
+            self._reproduzir_journal(petshop)
+        else:
+            petshop._restaurar({})
+            self._reproduzir_journal(petshop)
+
+    def salvar(self, petshop):
+        with self._trava:
+            self._salvar(petshop)
+
+    def _salvar(self, petshop):
+        try:
+            capturado = self._capturar(petshop)
+        except Exception as e:
+            petshop.metricas.falha("salvar", e)
+            print(f"Aviso: não foi possível salvar os dados em '{self.path}': {e}")
+            return
+        self._gravar_capturado(petshop, *capturado)
+
+    def _capturar(self, petshop) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]], bool]:
+        # só esta parte lê o PetShop; o que ela devolve não muda com mutações posteriores
+        if self.formato in ("colunar", "binario"):
+            dados = petshop.to_colunas(binario=self.formato == "binario")
+        else:
+            dados = petshop.to_dict()
+        com_journal = self.journal or Path(self.journal_file).is_file()
+        if com_journal:
+            dados["journal_seq"] = self._seq
+        cache = None
+        if self.cache:
+            cache = dados if self.formato == "colunar" else petshop.to_colunas(binario=True)
+            cache["journal_seq"] = self._seq
+        return dados, cache, com_journal
+
+    def _gravar_capturado(self, petshop, dados: Dict[str, Any], cache: Optional[Dict[str, Any]], com_journal: bool):
+        try:
+            petshop.metricas.somar("bytes_escritos", _escrever_atomico(self.path, self._codificar(dados)))
+            if com_journal:
+                self._truncar_journal()
+            self._versao = self._trava.incrementar()
+        except Exception as e:
+            petshop.metricas.falha("salvar", e)
+            print(f"Aviso: não foi possível salvar os dados em '{self.path}': {e}")
+            return
+        if cache is not None:
+            petshop.metricas.somar("bytes_escritos", self._gravar_cache(cache))
+
+    def _assinatura(self) -> bytes:
+        st = os.stat(self.path)
+        return _ASSINATURA_CACHE.pack(st.st_size, st.st_mtime_ns)
+
+    def _carregar_cache(self, petshop) -> bool:
+        # o cache só vale se o arquivo de dados não mudou desde que ele foi gravado
+        try:
+            with open(self.cache_file, "rb") as f:
+                cabecalho = f.read(len(MAGIC_CACHE) + _ASSINATURA_CACHE.size)
+                if cabecalho != MAGIC_CACHE + self._assinatura():
+                    return False
+                cols = marshal.loads(f.read())
+            petshop._restaurar_colunas(cols)
+            self._seq = int(cols.get("journal_seq", 0))
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"Aviso: cache '{self.cache_file}' inválido, lendo '{self.path}': {e}")
+            return False
+
+    def _gravar_cache(self, cols: Dict[str, Any]) -> int:
+        cols.setdefault("journal_seq", self._seq)
+        tmp = f"{self.cache_file}.tmp"
+        try:
+            # descartável: sem fsync, na pior hipótese a assinatura não confere e o JSON é lido
+            conteudo = MAGIC_CACHE + self._assinatura() + marshal.dumps(cols, 4)
+            with open(tmp, "wb") as f:
+                f.write(conteudo)
+            os.replace(tmp, self.cache_file)
+            return len(conteudo)
+        except Exception as e:
+            print(f"Aviso: não foi possível gravar o cache '{self.cache_file}': {e}")
+            return 0
+
+    def _codificar(self, dados: Dict[str, Any]):
+        if self.formato == "binario":
+            return MAGIC_BINARIO + marshal.dumps(dados, 4)
+        if self.formato == "indentado":
+            return json.dumps(dados, ensure_ascii=False, indent=2)
+        return json.dumps(dados, ensure_ascii=False, separators=(",", ":"))
+
+    def compactar(self, petshop):
+        self.salvar(petshop)
+
+    def registrar(self, petshop, op: str, dados: Dict[str, Any]):
+        self.registrar_lote(petshop, [(op, dados)])
+
+    def registrar_lote(self, petshop, ops: List[Tuple[str, Dict[str, Any]]]):
+        if not ops:
+            return
+        with self._trava:
+            if not self.journal:
+                self._seq += len(ops)
+                self._salvar(petshop)
+                return
+            try:
+                petshop.metricas.somar("bytes_escritos", self._anexar_journal(ops))
+                self._versao = self._trava.incrementar()
+            except Exception as e:
+                petshop.metricas.falha("journal", e)
+                print(f"Aviso: não foi possível gravar o journal '{self.journal_file}': {e}")
+                return
+            if self.compactar_a_cada and self._entradas_journal >= self.compactar_a_cada:
+                self._salvar(petshop)
+
+    def preparar_lote(self, petshop, ops: List[Tuple[str, Dict[str, Any]]]) -> Optional[Callable[[], None]]:
+        # como registrar_lote, mas sem journal só captura o estado: serializar e gravar fica para a
+        # função devolvida, que roda fora da trava do PetShop (com a trava do arquivo ainda obtida)
+        if not ops:
+            return None
+        if self.journal:
+            self.registrar_lote(petshop, ops)
+            return None
+        self._seq += len(ops)
+        try:
+            capturado = self._capturar(petshop)
+        except Exception as e:
+            petshop.metricas.falha("salvar", e)
+            print(f"Aviso: não foi possível salvar os dados em '{self.path}': {e}")
+            return None
+        return lambda: self._gravar_capturado(petshop, *capturado)
+
+    def fechar(self):
+        pass
+
+    def ler_para_backup(self) -> Dict[str, bytes]:
+        arquivos = {}
+        with self._trava:
+            for nome, caminho in (("dados", self.path), ("journal", self.journal_file)):
+                try:
+                    with open(caminho, "rb") as f:
+                        arquivos[nome] = f.read()
+                except FileNotFoundError:
+                    pass
+        return arquivos
+
+    def restaurar_backup(self, arquivos: Dict[str, bytes]):
+        with self._trava:
+            if "dados" in arquivos:
+                _escrever_atomico(self.path, arquivos["dados"])
+            elif Path(self.path).is_file():
+                os.remove(self.path)
+            # o journal atual refere-se ao arquivo substituído: vale o do snapshot ou nenhum
+            if "journal" in arquivos:
+                _escrever_atomico(self.journal_file, arquivos["journal"])
+            elif Path(self.journal_file).is_file():
+                os.remove(self.journal_file)
+            if Path(self.cache_file).is_file():
+                os.remove(self.cache_file)
+            self._trava.incrementar()
+
+    def _reproduzir_journal(self, petshop):
+        self._entradas_journal = 0
+        if not Path(self.journal_file).is_file():
+            return
+        tamanho = os.path.getsize(self.journal_file)
+        petshop.metricas.somar("bytes_lidos", tamanho)
+        validos = 0
+        with open(self.journal_file, "rb") as f:
+            for linha in f:
+                try:
+                    if not linha.endswith(b"\n"):
+                        raise ValueError("registro sem fim de linha")
+                    entrada = json.loads(linha)
+                except ValueError:
+                    # registro truncado por queda no meio da escrita: descarta o restante
+                    break
+                validos += len(linha)
+                self._entradas_journal += 1
+                if entrada["seq"] <= self._seq:
+                    continue
+                petshop._aplicar_operacao(entrada["op"], entrada["dados"])
+                self._seq = entrada["seq"]
+        if validos < tamanho:
+            # corta o registro truncado: o próximo seria anexado depois dele e se perderia na leitura
+            with open(self.journal_file, "r+b") as f:
+                f.truncate(validos)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _truncar_journal(self):
+        with open(self.journal_file, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self._entradas_journal = 0
+
+    def _anexar_journal(self, ops: List[Tuple[str, Dict[str, Any]]]) -> int:
+        linhas = []
+        seq = self._seq
+        for op, dados in ops:
+            seq += 1
+            linhas.append(json.dumps({"seq": seq, "op": op, "dados": dados}, ensure_ascii=False, separators=(",", ":")))
+        conteudo = ("\n".join(linhas) + "\n").encode("utf-8")
+        with open(self.journal_file, "ab") as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        self._seq = seq
+        self._entradas_journal += len(ops)
+        return len(conteudo)
+
+
+# Dados divididos em fragmentos por tutor (crc32 do CPF) dentro de <dados>.shards:
+# cada fragmento guarda os tutores e seus animais com histórico; catálogo e agenda,
+# que valem para todos, ficam no arquivo global. Uma gravação só reescreve os
+# fragmentos que as operações tocaram. Com paralelismo > 1, vários fragmentos
+# são lidos e gravados ao mesmo tempo: threads compensam quando o fsync domina,
+# processos (processos=True) quando o parse de fragmentos grandes domina. Com sob_demanda, só o arquivo global é lido
+# na carga e cada fragmento entra quando um tutor dele é consultado
+class ArmazenamentoFragmentado:
+    importacao_em_lotes = False
+    historico_paginado = False
+
+    def __init__(self, path: str, fragmentos: int = 16, formato: str = "compacto", paralelismo: int = 1,
+                 processos: bool = False, sob_demanda: bool = False, migrar_de: Optional[str] = None):
+        if formato not in FORMATOS_ARQUIVO or formato == "colunar":
+            raise ValueError(f"formato de fragmento inválido: '{formato}' (use indentado, compacto ou binario)")
+        self.path = path
+        self.fragmentos = fragmentos
+        self.formato = formato
+        self.paralelismo = paralelismo
+        self.processos = processos
+        self.sob_demanda = sob_demanda
+        self.migrar_de = migrar_de
+        self._trava = TravaArquivo(path + TRAVA_SUFIXO)
+        self._versao: Optional[int] = None
+        self._pool: Optional[Executor] = None
+        self._pool_escrita: Optional[Executor] = None
+        # None = todos os fragmentos em memória
+        self._carregados: Optional[Set[int]] = set() if sob_demanda else None
+        self._fragmento_do_animal: Dict[str, int] = {}
+        self._fragmento_do_cpf: Dict[str, int] = {}
+        # CPFs (tutores e donos de animais) de cada fragmento, mantidos a cada operação para que
+        # uma escrita não reagrupe o cadastro inteiro; None = remontar na próxima escrita
+        self._cpfs_do_fragmento: Optional[Dict[int, Dict[str, None]]] = None
+
+    def travar(self) -> TravaArquivo:
+        return self._trava
+
+    def alterado(self) -> bool:
+        return self._trava.ler_versao() != self._versao
+
+    def _arquivo(self, fragmento) -> str:
+        extensao = ".bin" if self.formato == "binario" else ".json"
+        nome = ARQUIVO_GLOBAL if fragmento == ARQUIVO_GLOBAL else f"fragmento-{fragmento:04d}"
+        return os.path.join(self.path, nome + extensao)
+
+    def _fragmento(self, cpf: str) -> int:
+        k = self._fragmento_do_cpf.get(cpf)
+        if k is None:
+            k = self._fragmento_do_cpf[cpf] = fragmento_do_cpf(cpf, self.fragmentos)
+        return k
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            tipo = ProcessPoolExecutor if self.processos else ThreadPoolExecutor
+            self._pool = tipo(max_workers=self.paralelismo)
+        return self._pool
+
+    def _ler_fragmentos(self, indices: List[int]) -> List[Dict[str, Any]]:
+        caminhos = [self._arquivo(k) for k in indices]
+        existentes = [c for c in caminhos if Path(c).is_file()]
+        if self.paralelismo > 1 and len(existentes) > 1:
+            lidos = dict(zip(existentes, self._executor().map(_ler_arquivo_dados, existentes)))
+        else:
+            lidos = {c: _ler_arquivo_dados(c) for c in existentes}
+        return [lidos.get(c, {}) for c in caminhos]
+
+    def carregar(self, petshop):
+        with self._trava:
+            self._versao = self._trava.ler_versao()
+            self._carregar(petshop)
+
+    def _carregar(self, petshop):
+        if not Path(self._arquivo(ARQUIVO_GLOBAL)).is_file():
+            if self.migrar_de and _existe_json(self.migrar_de):
+                # primeira carga a partir do arquivo único: reparte tudo nos fragmentos
+                ArmazenamentoJSON(self.migrar_de).carregar(petshop)
+                self._carregados = None
+                self._salvar(petshop)
+            else:
+                # diretório novo: não há fragmento em disco para carregar depois
+                petshop._restaurar({})
+                self._fragmento_do_animal = {}
+                self._cpfs_do_fragmento = None
+                self._carregados = None
+            return
+        try:
+            raw = _ler_arquivo_dados(self._arquivo(ARQUIVO_GLOBAL))
+            self.fragmentos = int(raw.get("fragmentos", self.fragmentos))
+            self._fragmento_do_cpf = {}
+            self._cpfs_do_fragmento = None
+            indices = list(range(self.fragmentos)) if self._carregados is None else sorted(self._carregados)
+            partes = self._ler_fragmentos(indices)
+        except Exception as e:
+            petshop.metricas.falha("carregar", e)
+            print(f"Aviso: falha ao carregar dados de '{self.path}': {e}")
+            return
+        petshop.metricas.somar("fragmentos_lidos", len(indices) + 1)
+        self._fragmento_do_animal = {a["id"]: k for k, parte in zip(indices, partes) for a in parte.get("animais", [])}
+        raw["tutores"] = [t for parte in partes for t in parte.get("tutores", [])]
+        raw["animais"] = [a for parte in partes for a in parte.get("animais", [])]
+        petshop._restaurar(raw)
+
+    def todos_carregados(self) -> bool:
+        return self._carregados is None
+
+    def garantir_cpf(self, petshop, cpf: str):
+        if self._carregados is not None and self._fragmento(cpf) not in self._carregados:
+            self._anexar(petshop, [self._fragmento(cpf)])
+
+    def garantir_todos(self, petshop):
+        if self._carregados is not None:
+            self._anexar(petshop, [k for k in range(self.fragmentos) if k not in self._carregados])
+
+    def _anexar(self, petshop, indices: List[int]):
+        with self._trava:
+            for k, parte in zip(indices, self._ler_fragmentos(indices)):
+                for a in parte.get("animais", []):
+                    self._fragmento_do_animal[a["id"]] = k
+                    self._agrupar_cpf(a["tutor_cpf"])
+                for t in parte.get("tutores", []):
+                    self._agrupar_cpf(t["cpf"])
+                petshop._anexar_fragmento(parte)
+                self._carregados.add(k)
+            petshop.metricas.somar("fragmentos_lidos", len(indices))
+        if len(self._carregados) >= self.fragmentos:
+            self._carregados = None
+
+    def salvar(self, petshop):
+        with self._trava:
+            self._salvar(petshop)
+
+    def _salvar(self, petshop):
+        # gravação completa (carga, importação): o que está em memória pode não ter passado por
+        # registrar_lote, então os grupos são remontados
+        self._cpfs_do_fragmento = None
+        indices = range(self.fragmentos) if self._carregados is None else sorted(self._carregados)
+        self._gravar(petshop, set(indices) | {ARQUIVO_GLOBAL})
+
+    def compactar(self, petshop):
+        self.salvar(petshop)
+
+    def registrar(self, petshop, op: str, dados: Dict[str, Any]):
+        self.registrar_lote(petshop, [(op, dados)])
+
+    def registrar_lote(self, petshop, ops: List[Tuple[str, Dict[str, Any]]]):
+        if not ops:
+            return
+        sujos: Set[Any] = set()
+        for op, dados in ops:
+            if op == "tutor":
+                sujos.add(self._agrupar_cpf(dados["cpf"]))
+            elif op == "animal":
+                k = self._fragmento_do_animal[dados["id"]] = self._agrupar_cpf(dados["tutor_cpf"])
+                sujos.add(k)
+            elif op in ("animal_atualizado", "animal_removido", "servico_realizado"):
+                animal_id = dados.get("animal_id", dados.get("id"))
+                k = self._fragmento_do_animal.get(animal_id)
+                if k is None:
+                    # animal de origem desconhecida (operação antiga por nome): regrava o que está em memória
+                    sujos.update(range(self.fragmentos) if self._carregados is None else self._carregados)
+                else:
+                    sujos.add(k)
+                if op == "animal_removido":
+                    # os agendamentos do animal saem junto, e eles ficam no arquivo global
+                    sujos.add(ARQUIVO_GLOBAL)
+                    self._fragmento_do_animal.pop(animal_id, None)
+            else:
+                sujos.add(ARQUIVO_GLOBAL)
+        with self._trava:
+            self._gravar(petshop, sujos)
+
+    def _agrupar_cpf(self, cpf: str) -> int:
+        k = self._fragmento(cpf)
+        if self._cpfs_do_fragmento is not None:
+            self._cpfs_do_fragmento.setdefault(k, {})[cpf] = None
+        return k
+
+    def _conteudo(self, petshop, fragmento, grupos: Dict[int, Dict[str, None]]) -> Dict[str, Any]:
+        if fragmento == ARQUIVO_GLOBAL:
+            return {"formato": FORMATO_FRAGMENTADO, "fragmentos": self.fragmentos,
+                    "servicos_catalogo": [s.to_dict() for s in petshop.servicos_catalogo.values()],
+                    "agendamentos": petshop.agenda.registros()}
+        cpfs = grupos.get(fragmento, [])
+        return {"tutores": [petshop.tutores[cpf].to_dict() for cpf in cpfs if cpf in petshop.tutores],
+                "animais": [a.to_dict() for cpf in cpfs for a in petshop._idx_tutor.get(cpf, [])]}
+
+    def _codificar(self, dados: Dict[str, Any]) -> bytes:
+        if self.formato == "binario":
+            return MAGIC_BINARIO + marshal.dumps(dados, 4)
+        if self.formato == "indentado":
+            return json.dumps(dados, ensure_ascii=False, indent=2).encode("utf-8")
+        return json.dumps(dados, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def _gravar(self, petshop, sujos: Iterable[Any]):
+        # nunca grava um fragmento que não está em memória: ele seria apagado
+        sujos = [k for k in sujos if k == ARQUIVO_GLOBAL or self._carregados is None or k in self._carregados]
+        if ARQUIVO_GLOBAL not in sujos and not Path(self._arquivo(ARQUIVO_GLOBAL)).is_file():
+            # é o arquivo global que marca o diretório como já gravado
+            sujos.append(ARQUIVO_GLOBAL)
+        if self._cpfs_do_fragmento is None:
+            # uma passada por todo o cadastro, só depois de carregar ou de uma gravação completa;
+            # CPFs que já saíram da memória continuam no grupo e _conteudo os ignora
+            self._cpfs_do_fragmento = {}
+            for cpf in [*petshop.tutores, *petshop._idx_tutor]:
+                self._agrupar_cpf(cpf)
+        grupos = self._cpfs_do_fragmento
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            # serializar disputa o GIL; o ganho do paralelismo está na escrita e no fsync de cada arquivo
+            tarefas = [(self._arquivo(k), self._codificar(self._conteudo(petshop, k, grupos))) for k in sujos]
+            if self.paralelismo > 1 and len(tarefas) > 1:
+                escritos = list(self._executor_escrita().map(lambda t: _escrever_atomico(*t), tarefas))
+            else:
+                escritos = [_escrever_atomico(*t) for t in tarefas]
+            self._versao = self._trava.incrementar()
+        except Exception as e:
+            petshop.metricas.falha("salvar", e)
+            print(f"Aviso: não foi possível salvar os dados em '{self.path}': {e}")
+            return
+        petshop.metricas.somar("bytes_escritos", sum(escritos))
+        petshop.metricas.somar("fragmentos_gravados", len(tarefas))
+
+    def _executor_escrita(self) -> Executor:
+        # escrever não passa por processos: os bytes já estão prontos aqui
+        if self.processos:
+            if self._pool_escrita is None:
+                self._pool_escrita = ThreadPoolExecutor(max_workers=self.paralelismo)
+            return self._pool_escrita
+        return self._executor()
+
+    def fechar(self):
+        for pool in (self._pool, self._pool_escrita):
+            if pool is not None:
+                pool.shutdown()
+        self._pool = self._pool_escrita = None
+
+    def ler_para_backup(self) -> Dict[str, bytes]:
+        arquivos = {}
+        with self._trava:
+            if not os.path.isdir(self.path):
+                return arquivos
+            for nome in sorted(os.listdir(self.path)):
+                if nome.endswith(".tmp"):
+                    continue
+                with open(os.path.join(self.path, nome), "rb") as f:
+                    arquivos[nome] = f.read()
+        return arquivos
+
+    def restaurar_backup(self, arquivos: Dict[str, bytes]):
+        with self._trava:
+            os.makedirs(self.path, exist_ok=True)
+            for nome in os.listdir(self.path):
+                if nome not in arquivos:
+                    os.remove(os.path.join(self.path, nome))
+            for nome, conteudo in arquivos.items():
+                _escrever_atomico(os.path.join(self.path, nome), conteudo)
+            self._trava.incrementar()
+
+
+class _HistoricoSQLite:
+    def __init__(self, conn: sqlite3.Connection, animal_id: str):
+        self._conn = conn
+        self._animal_id = animal_id
+
+    def __len__(self) -> int:
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM servicos_realizados WHERE animal_id = ?", (self._animal_id,)).fetchone()[0]
+
+    def __getitem__(self, fatia: slice) -> List[Dict[str, Any]]:
+        inicio = fatia.start or 0
+        limite = -1 if fatia.stop is None else max(0, fatia.stop - inicio)
+        return [
+            {"nome": nome, "preco": preco, "realizado_em": quando}
+            for nome, preco, quando in self._conn.execute(
+                "SELECT nome, preco, realizado_em FROM servicos_realizados WHERE animal_id = ? "
+                "ORDER BY realizado_em, seq LIMIT ? OFFSET ?",
+                (self._animal_id, limite, inicio))
+        ]
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+# Banco SQLite: cada lote de operações é gravado numa transação. Gravações de outras
+# estações não obrigam a recarregar tudo: cada operação é conferida contra o banco
+# dentro da mesma transação (consultas pela chave), e só as linhas que as operações
+# rejeitadas tocavam voltam para a memória
+class ArmazenamentoSQLite:
+    importacao_em_lotes = True
+    # os históricos adiados são lidos do banco página a página na primeira consulta
+    historico_paginado = True
+    verifica_conflitos = True
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS tutores (
+            cpf TEXT PRIMARY KEY,
+            nome TEXT NOT NULL,
+            telefone TEXT NOT NULL DEFAULT ''
+        );
+        CREATE TABLE IF NOT EXISTS servicos_catalogo (
+            chave TEXT PRIMARY KEY,
+            nome TEXT NOT NULL,
+            preco REAL NOT NULL,
+            categoria TEXT NOT NULL DEFAULT ''
+        );
+        CREATE TABLE IF NOT EXISTS animais (
+            id TEXT PRIMARY KEY,
+            classe TEXT NOT NULL,
+            nome TEXT NOT NULL,
+            especie TEXT NOT NULL,
+            raca TEXT NOT NULL DEFAULT '',
+            idade INTEGER NOT NULL DEFAULT 0,
+            tutor_cpf TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS servicos_realizados (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            animal_id TEXT NOT NULL,
+            nome TEXT NOT NULL,
+            preco REAL NOT NULL,
+            realizado_em REAL NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS agendamentos (
+            id TEXT PRIMARY KEY,
+            animal_id TEXT NOT NULL,
+            servico TEXT NOT NULL,
+            inicio REAL NOT NULL,
+            duracao INTEGER NOT NULL,
+            recurso TEXT NOT NULL,
+            profissional INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_animais_tutor ON animais(tutor_cpf);
+        CREATE INDEX IF NOT EXISTS idx_animais_nome ON animais(nome COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_servicos_animal ON servicos_realizados(animal_id, seq);
+        CREATE INDEX IF NOT EXISTS idx_agendamentos_inicio ON agendamentos(inicio);
+    """
+
+    def __init__(self, path: str, migrar_de: Optional[str] = None):
+        self.path = path
+        self.migrar_de = migrar_de
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.ESQUEMA)
+        colunas = [linha[1] for linha in self._conn.execute("PRAGMA table_info(servicos_realizados)")]
+        if "realizado_em" not in colunas:
+            # banco criado antes dos registros com data: os serviços existentes ficam sem data
+            self._conn.execute("ALTER TABLE servicos_realizados ADD COLUMN realizado_em REAL NOT NULL DEFAULT 0")
+        if "categoria" not in [linha[1] for linha in self._conn.execute("PRAGMA table_info(servicos_catalogo)")]:
+            # catálogo sem categoria: vazio faz o serviço usar a categoria padrão do nome ao carregar
+            self._conn.execute("ALTER TABLE servicos_catalogo ADD COLUMN categoria TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_servicos_data ON servicos_realizados(realizado_em)")
+        self._conn.commit()
+        self._trava = TravaArquivo(path + TRAVA_SUFIXO)
+        self._versao: Optional[int] = None
+
+    def travar(self) -> TravaArquivo:
+        return self._trava
+
+    def alterado(self) -> bool:
+        # data_version só muda quando outra conexão confirma uma transação
+        return self._conn.execute("PRAGMA data_version").fetchone()[0] != self._versao
+
+    def _vazio(self) -> bool:
+        for tabela in ("tutores", "servicos_catalogo", "animais"):
+            if self._conn.execute(f"SELECT 1 FROM {tabela} LIMIT 1").fetchone():
+                return False
+        return True
+
+    def carregar(self, petshop):
+        with self._trava:
+            self._carregar(petshop)
+        self._versao = self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _carregar(self, petshop):
+        if self._vazio():
+            if self.migrar_de and _existe_json(self.migrar_de):
+                self._migrar(self.migrar_de)
+            else:
+                # banco novo: grava o catálogo básico do PetShop
+                self.gravar_tudo(petshop.to_dict())
+        try:
+            petshop._restaurar(self._ler_tudo(getattr(petshop, "historico_preguicoso", False)))
+        except sqlite3.Error as e:
+            petshop.metricas.falha("carregar", e)
+            print(f"Aviso: falha ao carregar dados de '{self.path}': {e}")
+
+    def _ler_tudo(self, preguicoso: bool = False) -> Dict[str, Any]:
+        c = self._conn
+        historicos: Dict[str, Any] = {}
+        if not preguicoso:
+            for animal_id, nome, preco, quando in c.execute(
+                    "SELECT animal_id, nome, preco, realizado_em FROM servicos_realizados ORDER BY seq"):
+                historicos.setdefault(animal_id, []).append({"nome": nome, "preco": preco, "realizado_em": quando})
+        dados: Dict[str, Any] = {
+            "tutores": [
+                {"nome": nome, "cpf": cpf, "telefone": tel}
+                for cpf, nome, tel in c.execute("SELECT cpf, nome, telefone FROM tutores ORDER BY rowid")
+            ],
+            "servicos_catalogo": [
+                {"nome": nome, "preco": preco, "categoria": categoria}
+                for nome, preco, categoria in c.execute("SELECT nome, preco, categoria FROM servicos_catalogo ORDER BY rowid")
+            ],
+            "animais": [
+                {"class": classe, "id": animal_id, "nome": nome, "especie": especie, "raca": raca,
+                 "idade": idade, "tutor_cpf": cpf,
+                 "servicos_realizados": _HistoricoSQLite(c, animal_id) if preguicoso else historicos.get(animal_id, [])}
+                for animal_id, classe, nome, especie, raca, idade, cpf in c.execute(
+                    "SELECT id, classe, nome, especie, raca, idade, tutor_cpf FROM animais ORDER BY rowid")
+            ],
+            "agendamentos": [
+                {"id": ag_id, "animal_id": animal_id, "servico": servico, "inicio": inicio, "duracao": duracao,
+                 "recurso": recurso, "profissional": profissional}
+                for ag_id, animal_id, servico, inicio, duracao, recurso, profissional in c.execute(
+                    "SELECT id, animal_id, servico, inicio, duracao, recurso, profissional FROM agendamentos ORDER BY inicio")
+            ],
+        }
+        return dados
+
+    def salvar(self, petshop):
+        # cada operação já é gravada na sua própria transação
+        try:
+            self._conn.commit()
+        except sqlite3.Error as e:
+            petshop.metricas.falha("salvar", e)
+            print(f"Aviso: não foi possível salvar os dados em '{self.path}': {e}")
+
+    def compactar(self, petshop):
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _migrar(self, json_path: str):
+        from petshop_backend import PetShop
+
+        self.gravar_tudo(PetShop(json_path).to_dict())
+
+    def gravar_tudo(self, dados: Dict[str, Any]):
+        with self._conn as c:
+            for tabela in ("tutores", "servicos_catalogo", "animais", "servicos_realizados", "agendamentos"):
+                c.execute(f"DELETE FROM {tabela}")
+            c.executemany(
+                "INSERT INTO tutores (cpf, nome, telefone) VALUES (?, ?, ?)",
+                ((t["cpf"], t["nome"], t.get("telefone", "")) for t in dados.get("tutores", [])))
+            c.executemany(
+                "INSERT OR REPLACE INTO servicos_catalogo (chave, nome, preco, categoria) VALUES (?, ?, ?, ?)",
+                ((s["nome"].strip().lower(), s["nome"], s["preco"], s.get("categoria", ""))
+                 for s in dados.get("servicos_catalogo", [])))
+            for a in dados.get("animais", []):
+                self._inserir_animal(c, a)
+            for ag in dados.get("agendamentos", []):
+                self._inserir_agendamento(c, ag)
+
+    def registrar(self, petshop, op: str, dados: Dict[str, Any]):
+        self.registrar_lote(petshop, [(op, dados)])
+
+    def registrar_lote(self, petshop, ops: List[Tuple[str, Dict[str, Any]]]):
+        try:
+            with self._conn as c:
+                for op, dados in ops:
+                    self._gravar_operacao(c, op, dados)
+        except (sqlite3.Error, ValueError) as e:
+            petshop.metricas.falha("persistir", e)
+            print(f"Aviso: não foi possível gravar {len(ops)} operação(ões) em '{self.path}': {e}")
+
+    def registrar_verificado(self, petshop, ops: List[Tuple[str, Dict[str, Any]]]
+                             ) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[Tuple[str, Dict[str, Any], str]]]:
+        # devolve as operações gravadas e as rejeitadas, cada uma com o motivo
+        aceitas = []
+        rejeitadas = []
+        try:
+            with self._conn as c:
+                # IMMEDIATE: ninguém grava entre a conferência e a escrita
+                if not c.in_transaction:
+                    c.execute("BEGIN IMMEDIATE")
+                for op, dados in ops:
+                    motivo = self._conflito(c, petshop, op, dados)
+                    if motivo:
+                        rejeitadas.append((op, dados, motivo))
+                        continue
+                    self._gravar_operacao(c, op, dados)
+                    aceitas.append((op, dados))
+        except (sqlite3.Error, ValueError) as e:
+            petshop.metricas.falha("persistir", e)
+            print(f"Aviso: não foi possível gravar {len(ops)} operação(ões) em '{self.path}': {e}")
+            return [], []
+        return aceitas, rejeitadas
+
+    @staticmethod
+    def _existe(c: sqlite3.Connection, tabela: str, coluna: str, valor: Any) -> bool:
+        return c.execute(f"SELECT 1 FROM {tabela} WHERE {coluna} = ?", (valor,)).fetchone() is not None
+
+    @staticmethod
+    def _limites_do_dia(dia: date) -> Tuple[float, float]:
+        meia_noite = datetime(dia.year, dia.month, dia.day)
+        return meia_noite.timestamp(), (meia_noite + timedelta(days=1)).timestamp()
+
+    def _agendamentos_do_dia(self, c: sqlite3.Connection, dia: date, recurso: str = None) -> List[Dict[str, Any]]:
+        inicio, fim = self._limites_do_dia(dia)
+        sql = ("SELECT id, animal_id, servico, inicio, duracao, recurso, profissional FROM agendamentos "
+               "WHERE inicio >= ? AND inicio < ?")
+        params: List[Any] = [inicio, fim]
+        if recurso is not None:
+            sql += " AND recurso = ?"
+            params.append(recurso)
+        return [dict(zip(CAMPOS_AGENDAMENTO_SQL, linha)) for linha in c.execute(sql, params)]
+
+    def _conflito(self, c: sqlite3.Connection, petshop, op: str, dados: Dict[str, Any]) -> Optional[str]:
+        # as mesmas regras de PetShop._conflito, conferidas contra o banco em vez da memória
+        animal_id = dados.get("animal_id") if op in ("servico_realizado", "agendamento") else dados.get("id")
+        if op == "tutor" and self._existe(c, "tutores", "cpf", dados["cpf"]):
+            return f"CPF {dados['cpf']} já foi cadastrado em outra estação"
+        if op == "animal":
+            if not self._existe(c, "tutores", "cpf", dados["tutor_cpf"]):
+                return f"tutor {dados['tutor_cpf']} não existe mais"
+            if self._existe(c, "animais", "id", animal_id):
+                return f"animal {animal_id} já foi cadastrado em outra estação"
+        if op in ("servico_realizado", "animal_atualizado", "animal_removido", "agendamento") and animal_id \
+                and not self._existe(c, "animais", "id", animal_id):
+            return f"animal {animal_id} foi removido em outra estação"
+        if op == "agendamento":
+            agenda = petshop.agenda.vazia()
+            agenda.carregar(self._agendamentos_do_dia(c, datetime.fromtimestamp(dados["inicio"]).date(), dados["recurso"]))
+            motivo = agenda.conflito(dados)
+            if motivo:
+                return f"agendamento de {dados['servico']}: {motivo} em outra estação"
+        if op == "agendamento_removido" and not self._existe(c, "agendamentos", "id", dados["id"]):
+            return f"agendamento {dados['id']} já foi cancelado ou concluído em outra estação"
+        return None
+
+    def ler_registros(self, cpfs: Iterable[str], animal_ids: Iterable[str], dias: Iterable[date],
+                      preguicoso: bool = False) -> Dict[str, Any]:
+        # só as linhas pedidas, no mesmo formato de _ler_tudo
+        c = self._conn
+        tutores = []
+        for cpf in cpfs:
+            linha = c.execute("SELECT nome, cpf, telefone FROM tutores WHERE cpf = ?", (cpf,)).fetchone()
+            if linha:
+                tutores.append(dict(zip(("nome", "cpf", "telefone"), linha)))
+        animais = []
+        agendamentos = []
+        for animal_id in animal_ids:
+            linha = c.execute("SELECT classe, nome, especie, raca, idade, tutor_cpf FROM animais WHERE id = ?",
+                              (animal_id,)).fetchone()
+            if linha is None:
+                continue
+            classe, nome, especie, raca, idade, cpf = linha
+            historico = _HistoricoSQLite(c, animal_id)
+            animais.append({"class": classe, "id": animal_id, "nome": nome, "especie": especie, "raca": raca,
+                            "idade": idade, "tutor_cpf": cpf,
+                            "servicos_realizados": historico if preguicoso else historico[:]})
+            agendamentos.extend(
+                dict(zip(CAMPOS_AGENDAMENTO_SQL, linha)) for linha in c.execute(
+                    "SELECT id, animal_id, servico, inicio, duracao, recurso, profissional FROM agendamentos "
+                    "WHERE animal_id = ?", (animal_id,)))
+        for dia in dias:
+            agendamentos.extend(self._agendamentos_do_dia(c, dia))
+        return {"tutores": tutores, "animais": animais, "agendamentos": agendamentos}
+
+    def _gravar_operacao(self, c: sqlite3.Connection, op: str, dados: Dict[str, Any]):
+        if op == "tutor":
+            c.execute("INSERT OR REPLACE INTO tutores (cpf, nome, telefone) VALUES (?, ?, ?)",
+                      (dados["cpf"], dados["nome"], dados.get("telefone", "")))
+        elif op == "animal":
+            self._inserir_animal(c, dados)
+        elif op == "servico_catalogo":
+            c.execute("INSERT OR REPLACE INTO servicos_catalogo (chave, nome, preco, categoria) VALUES (?, ?, ?, ?)",
+                      (dados["nome"].strip().lower(), dados["nome"], dados["preco"], dados.get("categoria", "")))
+        elif op == "animal_atualizado":
+            campos = [k for k in ("nome", "raca", "idade") if k in dados]
+            if campos:
+                c.execute(f"UPDATE animais SET {', '.join(k + ' = ?' for k in campos)} WHERE id = ?",
+                          [dados[k] for k in campos] + [dados["id"]])
+        elif op == "animal_removido":
+            c.execute("DELETE FROM servicos_realizados WHERE animal_id = ?", (dados["id"],))
+            c.execute("DELETE FROM agendamentos WHERE animal_id = ?", (dados["id"],))
+            c.execute("DELETE FROM animais WHERE id = ?", (dados["id"],))
+        elif op == "servico_realizado":
+            c.execute("INSERT INTO servicos_realizados (animal_id, nome, preco, realizado_em) VALUES (?, ?, ?, ?)",
+                      (dados["animal_id"], dados["servico"], dados["preco"], dados.get("realizado_em") or 0.0))
+        elif op == "agendamento":
+            self._inserir_agendamento(c, dados)
+        elif op == "agendamento_removido":
+            c.execute("DELETE FROM agendamentos WHERE id = ?", (dados["id"],))
+        else:
+            raise ValueError(f"operação desconhecida: {op}")
+
+    @staticmethod
+    def _inserir_animal(c: sqlite3.Connection, a: Dict[str, Any]):
+        c.execute(
+            "INSERT OR REPLACE INTO animais (id, classe, nome, especie, raca, idade, tutor_cpf) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (a["id"], a.get("class", "OutroAnimal"), a["nome"], a.get("especie", "outro"), a.get("raca", ""),
+             int(a.get("idade", 0)), a["tutor_cpf"]))
+        c.executemany(
+            "INSERT INTO servicos_realizados (animal_id, nome, preco, realizado_em) VALUES (?, ?, ?, ?)",
+            ((a["id"], s["nome"], s["preco"], s.get("realizado_em") or 0.0) for s in a.get("servicos_realizados", [])))
+
+    def ler_para_backup(self) -> Dict[str, bytes]:
+        # a API de backup do SQLite gera uma cópia consistente mesmo com o WAL ativo
+        tmp = f"{self.path}.backup.tmp"
+        try:
+            with self._trava:
+                destino = sqlite3.connect(tmp)
+                try:
+                    self._conn.backup(destino)
+                finally:
+                    destino.close()
+            with open(tmp, "rb") as f:
+                return {"dados": f.read()}
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def restaurar_backup(self, arquivos: Dict[str, bytes]):
+        tmp = f"{self.path}.backup.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(arquivos["dados"])
+            origem = sqlite3.connect(tmp)
+            try:
+                with self._trava:
+                    origem.backup(self._conn)
+            finally:
+                origem.close()
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @staticmethod
+    def _inserir_agendamento(c: sqlite3.Connection, ag: Dict[str, Any]):
+        c.execute(
+            "INSERT OR REPLACE INTO agendamentos (id, animal_id, servico, inicio, duracao, recurso, profissional) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (ag["id"], ag["animal_id"], ag["servico"], ag["inicio"], ag["duracao"], ag["recurso"], ag["profissional"]))
+
+    def fechar(self):
+        self._conn.close()
+
+
+def criar_armazenamento(path: str, journal: bool = False, compactar_a_cada: int = 1000, formato: str = None,
+                        cache: bool = False, fragmentos: int = 0, sob_demanda: bool = False, paralelismo: int = 1,
+                        processos: bool = False):
+    p = Path(path)
+    if p.suffix.lower() == FRAGMENTOS_SUFIXO or fragmentos:
+        # o número de fragmentos gravado no diretório prevalece sobre o pedido
+        diretorio = str(p.with_suffix(FRAGMENTOS_SUFIXO))
+        origem = str(p) if p.suffix.lower() != FRAGMENTOS_SUFIXO and _existe_json(str(p)) else None
+        return ArmazenamentoFragmentado(diretorio, fragmentos=fragmentos or 16, formato=formato or "compacto",
+                                        paralelismo=paralelismo, processos=processos, sob_demanda=sob_demanda,
+                                        migrar_de=origem)
+    if p.suffix.lower() in EXTENSOES_SQLITE:
+        origem = str(p.with_suffix(".json"))
+        return ArmazenamentoSQLite(path, migrar_de=origem if _existe_json(origem) else None)
+    if formato is None:
+        formato = "binario" if p.suffix.lower() in EXTENSOES_BINARIAS else "indentado"
+    return ArmazenamentoJSON(path, journal=journal, compactar_a_cada=compactar_a_cada, formato=formato, cache=cache)
+
+
+def migrar_json_para_sqlite(json_path: str, db_path: str):
+    destino = ArmazenamentoSQLite(db_path)
+    try:
+        destino._migrar(json_path)
+    finally:
+        destino.fechar()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Uso: python petshop_storage.py <origem.json> <destino.db>")
+        sys.exit(1)
+    migrar_json_para_sqlite(sys.argv[1], sys.argv[2])
+    print(f"Dados de '{sys.argv[1]}' migrados para '{sys.argv[2]}'.")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# os módulos do PetShop ficam soltos na pasta acima desta
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
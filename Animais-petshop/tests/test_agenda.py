@@ -0,0 +1,64 @@
+from datetime import date, datetime
+
+import pytest
+
+from petshop_backend import PetShop
+
+SEGUNDA = date(2024, 3, 4)
+
+
+def _petshop(tmp_path) -> PetShop:
+    petshop = PetShop(str(tmp_path / "dados.json"))
+    petshop.cadastrar_tutor("Ana", "111", "")
+    petshop.cadastrar_animal("Rex", "Cachorro", "SRD", 3, "111")
+    return petshop
+
+
+def _as(hora: int, minuto: int = 0, dia: date = SEGUNDA) -> datetime:
+    return datetime(dia.year, dia.month, dia.day, hora, minuto)
+
+
+def test_capacidade_e_conflitos_por_recurso(tmp_path):
+    petshop = _petshop(tmp_path)
+    primeiro = petshop.agendar_horario("Rex", "Banho", _as(10))
+    segundo = petshop.agendar_horario("Rex", "Banho", _as(10))
+    assert (primeiro["profissional"], segundo["profissional"]) == (0, 1)
+    # dois profissionais de banho e tosa ocupados até 11h; o veterinário é outro recurso
+    assert petshop.agendar_horario("Rex", "Tosa", _as(10, 30)) is None
+    assert petshop.agendar_horario("Rex", "Consulta", _as(10))["recurso"] == "veterinario"
+    assert petshop.agendar_horario("Rex", "Banho", _as(11))["profissional"] == 0
+    # fechamento, domingo e horário fora da grade de 15 min
+    assert petshop.agendar_horario("Rex", "Banho", _as(17, 30)) is None
+    assert petshop.agendar_horario("Rex", "Banho", _as(10, dia=date(2024, 3, 3))) is None
+    with pytest.raises(ValueError):
+        petshop.agendar_horario("Rex", "Banho", _as(14, 5))
+
+    recarregado = PetShop(str(tmp_path / "dados.json"))
+    assert len(recarregado.agendamentos_do_dia(SEGUNDA)) == 4
+    assert recarregado.agendar_horario("Rex", "Banho", _as(10, 45)) is None
+
+
+def test_horarios_livres_e_proximo_livre(tmp_path):
+    petshop = _petshop(tmp_path)
+    for hora in (10, 10, 11):
+        petshop.agendar_horario("Rex", "Banho", _as(hora))
+    livres = petshop.horarios_livres("Banho", SEGUNDA)
+    assert _as(9) in livres and _as(11) in livres and _as(17) in livres
+    assert _as(9, 15) not in livres and _as(10) not in livres and _as(17, 15) not in livres
+    # sábado 17h45 não cabe uma consulta de 30 min e domingo está fechado
+    assert petshop.proximo_horario_livre("Consulta", _as(17, 45, date(2024, 3, 2))) == _as(8)
+    assert petshop.proximo_horario_livre("Banho", _as(9, 50)) == _as(11)
+
+
+def test_cancelar_e_concluir_liberam_o_horario(tmp_path):
+    petshop = _petshop(tmp_path)
+    [rex] = petshop.animais
+    ids = [petshop.agendar_horario("Rex", "Banho", _as(10))["id"] for _ in range(2)]
+    assert _as(10) not in petshop.horarios_livres("Banho", SEGUNDA)
+    assert petshop.cancelar_agendamento(ids[0])
+    assert not petshop.cancelar_agendamento(ids[0])
+    assert _as(10) in petshop.horarios_livres("Banho", SEGUNDA)
+    assert petshop.concluir_agendamento(ids[1])
+    assert petshop.agendamentos_do_dia(SEGUNDA) == []
+    assert [(q, s.nome) for q, _, s in petshop.servicos_entre(SEGUNDA, date(2024, 3, 5))] == [(_as(10), "Banho")]
+    assert rex.total_servicos == 1
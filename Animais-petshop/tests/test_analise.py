@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from petshop_analise import Analise
+from petshop_backend import PetShop
+
+
+def _ts(*data) -> float:
+    return datetime(*data).timestamp()
+
+
+def _petshop(tmp_path) -> PetShop:
+    petshop = PetShop(str(tmp_path / "dados.json"))
+    petshop.cadastrar_tutor("Ana", "111", "")
+    petshop.cadastrar_tutor("Bia", "222", "")
+    petshop.cadastrar_animal("Rex", "Cachorro", "SRD", 3, "111")
+    petshop.cadastrar_animal("Mia", "Gato", "Persa", 2, "222")
+    rex, mia = petshop.animais
+    petshop.agendar_servico_por_id(rex.id, "Banho", _ts(2024, 1, 10, 9))
+    petshop.agendar_servico_por_id(rex.id, "Tosa", _ts(2024, 2, 5, 14))
+    petshop.agendar_servico_por_id(mia.id, "Consulta", _ts(2024, 2, 20, 11))
+    return petshop
+
+
+def _visao(analise: Analise):
+    return (analise.quantidade, round(analise.receita, 2), analise.servicos(), analise.especies(), analise.tutores(),
+            {m: analise.servicos_do_mes(m) for m in analise.meses()})
+
+
+def test_contadores(tmp_path):
+    analise = _petshop(tmp_path).analise()
+    assert (analise.quantidade, analise.receita) == (3, 180.0)
+    assert analise.servicos() == [("Consulta", 1, 80.0), ("Tosa", 1, 60.0), ("Banho", 1, 40.0)]
+    assert analise.especies() == [("cachorro", 2, 100.0), ("gato", 1, 80.0)]
+    assert analise.tutores(1) == [("111", 2, 100.0)]
+    assert analise.meses() == ["2024-01", "2024-02"]
+    assert analise.servicos_do_mes("2024-02") == [("Consulta", 1, 80.0), ("Tosa", 1, 60.0)]
+    assert analise.ticket_medio() == 60.0
+
+
+def test_atualizacao_incremental_igual_a_reconstrucao(tmp_path):
+    petshop = _petshop(tmp_path)
+    analise = petshop.analise()
+    rex, mia = petshop.animais
+    petshop.agendar_servico_por_id(mia.id, "Banho", _ts(2024, 3, 1, 10))
+    petshop.agendar_servico_por_id(mia.id, "Banho", _ts(2024, 1, 15, 10))
+    assert petshop.remover_animal(rex.id)
+    assert petshop.analise() is analise
+    assert _visao(analise) == _visao(Analise.construir(petshop.animais))
+    assert analise.tutores() == [("222", 3, 160.0)]
+    assert analise.meses() == ["2024-01", "2024-02", "2024-03"]
+    # a receita do relatório em texto sai dos mesmos contadores
+    assert petshop.relatorio_receita()[0].startswith("Total: 3 serviço(s), R$ 160.00")
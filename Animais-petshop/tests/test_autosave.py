@@ -0,0 +1,32 @@
+import time
+
+from petshop_backend import PetShop
+
+
+def _gravados(tmp_path):
+    return set(PetShop(str(tmp_path / "dados.json")).tutores)
+
+
+def test_autosave_adia_a_gravacao_a_cada_mutacao(tmp_path):
+    petshop = PetShop(str(tmp_path / "dados.json"), autosave_intervalo=0.2)
+    petshop.cadastrar_tutor("Ana", "111", "")
+    time.sleep(0.12)
+    petshop.cadastrar_tutor("Bia", "222", "")
+    time.sleep(0.12)
+    # 0.24 s depois da primeira mutação, mas só 0.12 s depois da última: ainda não gravou
+    assert _gravados(tmp_path) == set()
+    time.sleep(0.25)
+    assert _gravados(tmp_path) == {"111", "222"}
+
+
+def test_autosave_disparado_dentro_de_transacao_nao_trava_os_proximos(tmp_path):
+    petshop = PetShop(str(tmp_path / "dados.json"), autosave_intervalo=0.05)
+    petshop.cadastrar_tutor("Ana", "111", "")
+    with petshop.transacao():
+        # transacao() grava o pendente ao entrar; o timer dispara no meio dela
+        petshop._agendar_autosave()
+        time.sleep(0.15)
+    assert petshop._timer_autosave is None
+    petshop.cadastrar_tutor("Bia", "222", "")
+    time.sleep(0.2)
+    assert _gravados(tmp_path) == {"111", "222"}
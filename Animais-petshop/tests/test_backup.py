@@ -0,0 +1,92 @@
+import os
+import random
+import threading
+
+from petshop_backend import PetShop
+from petshop_backup import MAX_PEDACO, MIN_PEDACO, RepositorioBackup, pedacos
+
+
+def _petshop_com_dados(tmp_path, nome: str = "dados.json", formato: str = None) -> PetShop:
+    petshop = PetShop(str(tmp_path / nome), formato=formato)
+    with petshop.transacao():
+        for i in range(3000):
+            petshop.cadastrar_tutor(f"Tutor {i}", f"{i:011d}", f"(11) 9{i:08d}")
+    return petshop
+
+
+def test_snapshot_alteracao_snapshot_e_restauracao(tmp_path):
+    petshop = _petshop_com_dados(tmp_path)
+    primeiro = petshop.criar_snapshot("antes")
+    petshop.cadastrar_tutor("Novo", "99999999999", "")
+    segundo = petshop.criar_snapshot("depois")
+
+    pedacos_primeiro = primeiro["arquivos"]["dados"]["pedacos"]
+    pedacos_segundo = segundo["arquivos"]["dados"]["pedacos"]
+    assert len(pedacos_primeiro) > 2
+    # só os pedaços que mudaram são gravados de novo
+    compartilhados = set(pedacos_primeiro) & set(pedacos_segundo)
+    assert compartilhados
+    assert segundo["pedacos_novos"] == len(set(pedacos_segundo) - set(pedacos_primeiro))
+    objetos = [p.name for p in (tmp_path / "dados.json.backups" / "objetos").glob("*/*")]
+    assert len(objetos) == len(set(objetos)) == len(set(pedacos_primeiro) | set(pedacos_segundo))
+
+    assert petshop.restaurar_snapshot(primeiro["id"])
+    assert "99999999999" not in petshop.tutores
+    assert len(petshop.tutores) == 3000
+    assert len(PetShop(str(tmp_path / "dados.json")).tutores) == 3000
+
+    assert petshop.restaurar_snapshot(segundo["id"])
+    assert "99999999999" in petshop.tutores
+    assert petshop.backups.verificar() == []
+
+
+def test_pedacos_de_dados_binarios_deduplicam_apos_insercao():
+    dados = random.Random(0).randbytes(1_000_000)
+    antes = [bytes(p) for p in pedacos(dados)]
+    assert b"".join(antes) == dados
+    assert all(MIN_PEDACO <= len(p) <= MAX_PEDACO for p in antes[:-1])
+    alterados = dados[:500_000] + b"registro novo" + dados[500_000:]
+    depois = [bytes(p) for p in pedacos(alterados)]
+    # só o pedaço que contém a inserção muda; os cortes voltam a coincidir logo depois dela
+    assert len(set(depois) - set(antes)) == 1
+
+
+def test_snapshot_do_formato_binario_reaproveita_pedacos(tmp_path):
+    petshop = _petshop_com_dados(tmp_path, "dados.bin", "binario")
+    primeiro = petshop.criar_snapshot("antes")
+    petshop.cadastrar_tutor("Novo", "99999999999", "")
+    segundo = petshop.criar_snapshot("depois")
+    pedacos_segundo = segundo["arquivos"]["dados"]["pedacos"]
+    assert len(primeiro["arquivos"]["dados"]["pedacos"]) > 2
+    assert 0 < segundo["pedacos_novos"] < len(pedacos_segundo)
+
+
+def test_podar_espera_o_criar_que_esta_reaproveitando_pedacos(tmp_path):
+    repo = RepositorioBackup(str(tmp_path / "repo"))
+    antigo = os.urandom(200_000)
+    repo.criar({"dados": antigo}, "antigo")
+    repo.criar({"dados": os.urandom(200_000)}, "outro")
+    achou, liberar = threading.Event(), threading.Event()
+    gravar_objeto = repo._gravar_objeto
+
+    def gravar_devagar(pedaco):
+        resultado = gravar_objeto(pedaco)
+        achou.set()
+        liberar.wait(5)
+        return resultado
+
+    repo._gravar_objeto = gravar_devagar
+    # o novo snapshot reaproveita os pedaços do antigo, que a poda removeria
+    criador = threading.Thread(target=repo.criar, args=({"dados": antigo}, "de novo"))
+    criador.start()
+    assert achou.wait(5)
+    podador = threading.Thread(target=repo.podar, args=(1,))
+    podador.start()
+    podador.join(0.3)
+    assert podador.is_alive()
+    liberar.set()
+    criador.join(5)
+    podador.join(5)
+    restantes = repo.listar()
+    assert len(restantes) == 1
+    assert repo.verificar() == []
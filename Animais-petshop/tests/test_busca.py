@@ -0,0 +1,46 @@
+from petshop_backend import PetShop
+
+
+def _nomes(resultados):
+    return [o.nome for _, o in resultados]
+
+
+def _petshop(tmp_path) -> PetShop:
+    petshop = PetShop(str(tmp_path / "dados.json"))
+    petshop.cadastrar_tutor("Joana Araújo", "123.456.789-00", "(11) 98765-4321")
+    petshop.cadastrar_animal("Bolinha", "Cachorro", "Poodle", 3, "123.456.789-00")
+    petshop.cadastrar_animal("Frajola", "Gato", "Persa", 5, "123.456.789-00")
+    petshop.preparar_busca()
+    return petshop
+
+
+def test_prefixo_acento_e_erro_de_digitacao(tmp_path):
+    petshop = _petshop(tmp_path)
+    assert _nomes(petshop.buscar("bol")) == ["Bolinha"]
+    assert _nomes(petshop.buscar("araujo", tipos=("tutor",))) == ["Joana Araújo"]
+    assert _nomes(petshop.buscar("Frajolla")) == ["Frajola"]
+    assert petshop.buscar("Frajolla", aproximado=False) == []
+    # telefone sem DDD e CPF sem pontuação
+    assert _nomes(petshop.buscar("98765-4321")) == ["Joana Araújo"]
+    assert _nomes(petshop.buscar("12345678900")) == ["Joana Araújo"]
+
+
+def test_indice_acompanha_as_edicoes(tmp_path):
+    petshop = _petshop(tmp_path)
+    [bolinha] = petshop.encontrar_animal_por_nome("Bolinha")
+    [frajola] = petshop.encontrar_animal_por_nome("Frajola")
+    assert petshop.atualizar_animal(bolinha.id, nome="Pipoca")
+    assert petshop.buscar("bolinha", aproximado=False) == []
+    assert _nomes(petshop.buscar("pipoca")) == ["Pipoca"]
+    assert _nomes(petshop.buscar("pipoka")) == ["Pipoca"]
+
+    assert petshop.remover_animal(frajola.id)
+    assert petshop.buscar("frajola") == []
+    assert petshop.buscar("persa") == []
+
+    petshop.cadastrar_tutor("Márcio Lima", "999", "")
+    petshop.cadastrar_animal("Frida", "Gato", "Persa", 1, "999")
+    assert _nomes(petshop.buscar("marcio")) == ["Márcio Lima"]
+    assert _nomes(petshop.buscar("persa")) == ["Frida"]
+    # o índice incremental responde como um montado do zero
+    assert _nomes(PetShop(str(tmp_path / "dados.json")).buscar("persa")) == ["Frida"]
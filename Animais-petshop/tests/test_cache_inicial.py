@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from petshop_backend import PetShop
+
+
+def _abrir(tmp_path) -> PetShop:
+    return PetShop(str(tmp_path / "dados.json"), cache=True)
+
+
+@pytest.fixture
+def leituras_json(monkeypatch):
+    # conta as cargas que passaram pelo JSON em vez do cache colunar
+    contagem = []
+    original = PetShop._restaurar
+    monkeypatch.setattr(PetShop, "_restaurar", lambda self, raw: (contagem.append(1), original(self, raw)))
+    return contagem
+
+
+@pytest.fixture
+def gravado(tmp_path):
+    petshop = _abrir(tmp_path)
+    petshop.cadastrar_tutor("Ana", "111", "")
+    petshop.cadastrar_animal("Rex", "cachorro", "SRD", 3, "111")
+    assert os.path.isfile(petshop.armazenamento.cache_file)
+    return tmp_path / "dados.json"
+
+
+def _editar(caminho, texto_antigo: str, texto_novo: str, mtime_ns: int = None):
+    with open(caminho, "r", encoding="utf-8") as f:
+        conteudo = f.read()
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write(conteudo.replace(texto_antigo, texto_novo))
+    if mtime_ns is not None:
+        os.utime(caminho, ns=(mtime_ns, mtime_ns))
+
+
+def test_cache_e_usado_quando_o_json_nao_mudou(tmp_path, gravado, leituras_json):
+    petshop = _abrir(tmp_path)
+    assert leituras_json == []
+    assert [a.nome for a in petshop.animais] == ["Rex"]
+
+
+def test_cache_rejeitado_quando_o_tamanho_muda(tmp_path, gravado, leituras_json):
+    _editar(gravado, '"Rex"', '"Trovão"')
+    petshop = _abrir(tmp_path)
+    assert leituras_json == [1]
+    assert [a.nome for a in petshop.animais] == ["Trovão"]
+
+
+def test_cache_rejeitado_quando_so_o_mtime_muda(tmp_path, gravado, leituras_json):
+    # mesmo tamanho, conteúdo diferente: só o mtime_ns denuncia a edição
+    st = os.stat(gravado)
+    _editar(gravado, '"Rex"', '"Max"', mtime_ns=st.st_mtime_ns + 1_000_000_000)
+    assert os.path.getsize(gravado) == st.st_size
+    petshop = _abrir(tmp_path)
+    assert leituras_json == [1]
+    assert [a.nome for a in petshop.animais] == ["Max"]
+
+
+def test_cache_regravado_depois_da_edicao_externa_volta_a_valer(tmp_path, gravado, leituras_json):
+    _editar(gravado, '"Rex"', '"Trovão"')
+    _abrir(tmp_path)
+    petshop = _abrir(tmp_path)
+    assert leituras_json == [1]
+    assert [a.nome for a in petshop.animais] == ["Trovão"]
+
+
+def test_cache_corrompido_cai_para_o_json(tmp_path, gravado, leituras_json):
+    with open(str(gravado) + ".cache", "r+b") as f:
+        f.seek(40)
+        f.write(b"\x00" * 16)
+    petshop = _abrir(tmp_path)
+    assert leituras_json == [1]
+    assert [a.nome for a in petshop.animais] == ["Rex"]
@@ -0,0 +1,72 @@
+from petshop_backend import PetShop
+from petshop_cache import CacheRelatorios
+
+
+def _gerador(chamadas, *linhas):
+    def gerar():
+        chamadas.append(linhas)
+        return linhas
+    return gerar
+
+
+def test_carimbo_invalida_so_os_dominios_afetados():
+    cache = CacheRelatorios()
+    chamadas = []
+    assert cache.obter("a", ("tutores",), _gerador(chamadas, "x")) == ["x"]
+    assert cache.obter("b", ("animais",), _gerador(chamadas, "y")) == ["y"]
+    copia = cache.obter("a", ("tutores",), _gerador(chamadas, "outro"))
+    copia.append("alterada")
+    assert cache.obter("a", ("tutores",), _gerador(chamadas, "outro")) == ["x"]
+    cache.invalidar("animais")
+    assert cache.obter("a", ("tutores",), _gerador(chamadas, "outro")) == ["x"]
+    assert cache.obter("b", ("animais",), _gerador(chamadas, "novo")) == ["novo"]
+    assert len(chamadas) == 3
+    cache.limpar()
+    assert cache.obter("a", ("tutores",), _gerador(chamadas, "depois")) == ["depois"]
+    assert (cache.acertos, cache.faltas) == (3, 4)
+
+
+def test_lru_por_entradas_e_por_bytes():
+    cache = CacheRelatorios(max_entradas=2)
+    for chave in "abc":
+        cache.obter(chave, (), lambda: [chave])
+    assert len(cache) == 2 and cache.obter("a", (), lambda: ["regerado"]) == ["regerado"]
+
+    pequeno = CacheRelatorios(max_bytes=1000)
+    pequeno.obter("enorme", (), lambda: ["x" * 2000])
+    assert len(pequeno) == 0 and pequeno.bytes == 0
+    pequeno.obter("a", (), lambda: ["x" * 300])
+    pequeno.obter("b", (), lambda: ["x" * 300])
+    pequeno.obter("a", (), lambda: [])  # acerto: "a" passa a ser o mais recente
+    pequeno.obter("c", (), lambda: ["x" * 300])
+    assert pequeno.bytes <= 1000
+    assert pequeno.obter("a", (), lambda: ["regerado"]) != ["regerado"]
+    assert pequeno.obter("b", (), lambda: ["regerado"]) == ["regerado"]
+
+
+def test_mutacoes_do_petshop_atualizam_os_relatorios(tmp_path):
+    petshop = PetShop(str(tmp_path / "dados.json"))
+    petshop.cadastrar_tutor("Ana", "111", "")
+    petshop.cadastrar_animal("Rex", "Cachorro", "SRD", 3, "111")
+    petshop.cadastrar_animal("Mia", "Gato", "SRD", 2, "111")
+    rex, mia = petshop.animais
+    petshop.listar_tutores_e_animais()
+    petshop.listar_servicos_do_animal(rex.id)
+    assert petshop.listar_servicos_do_animal(mia.id) == []
+
+    petshop.agendar_servico_por_id(mia.id, "Banho", 1_700_000_000.0)
+    faltas = petshop.relatorios.faltas
+    # o histórico do Rex e a listagem de tutores não dependem do serviço da Mia
+    petshop.listar_servicos_do_animal(rex.id)
+    petshop.listar_tutores_e_animais()
+    assert petshop.relatorios.faltas == faltas
+    [linha] = petshop.listar_servicos_do_animal(mia.id)
+    assert linha.endswith(" - Banho (R$ 40.00)")
+
+    assert petshop.atualizar_animal(rex.id, nome="Thor")
+    assert any("Thor" in l for l in petshop.listar_tutores_e_animais())
+    petshop.cadastrar_tutor("Bia", "222", "")
+    assert any("Bia" in l for l in petshop.listar_tutores_e_animais())
+    assert petshop.remover_animal(mia.id)
+    assert petshop.listar_servicos_do_animal(mia.id) == []
+    assert not any("Mia" in l for l in petshop.listar_todos_animais())
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from petshop_backend import PetShop, Servico
+from petshop_storage import FORMATO_COLUNAR, MAGIC_BINARIO
+
+
+def _preencher(petshop: PetShop):
+    petshop.adicionar_servico_catalogo(Servico("Hidratação", 45.5, "estética"))
+    with petshop.transacao():
+        for i in range(20):
+            petshop.cadastrar_tutor(f"Tutor {i}", f"{i:011d}", f"(11) 9{i:08d}")
+            petshop.cadastrar_animal(f"Bicho {i}", "Gato" if i % 3 else "Cachorro", "SRD", i % 12, f"{i:011d}")
+        for i, a in enumerate(petshop.animais):
+            for j in range(i % 4):
+                petshop.agendar_servico_por_id(a.id, ("Banho", "Tosa", "Hidratação")[j % 3], 1_700_000_000.0 + i * 3600 + j)
+
+
+@pytest.mark.parametrize("formato", ["indentado", "compacto", "colunar", "binario"])
+def test_ida_e_volta_em_cada_formato(tmp_path, formato):
+    path = str(tmp_path / "dados.json")
+    petshop = PetShop(path, formato=formato)
+    _preencher(petshop)
+    esperado = petshop.to_dict()
+    with open(path, "rb") as f:
+        conteudo = f.read()
+    assert conteudo.startswith(MAGIC_BINARIO) == (formato == "binario")
+    if formato != "binario":
+        assert (json.loads(conteudo).get("formato") == FORMATO_COLUNAR) == (formato == "colunar")
+    # a leitura detecta o formato pelo conteúdo, seja qual for o configurado
+    for leitura in (None, "indentado", "binario"):
+        assert PetShop(path, formato=leitura).to_dict() == esperado
+
+
+def test_extensao_bin_grava_binario(tmp_path):
+    path = str(tmp_path / "dados.bin")
+    petshop = PetShop(path)
+    _preencher(petshop)
+    with open(path, "rb") as f:
+        assert f.read().startswith(MAGIC_BINARIO)
+    assert PetShop(path).to_dict() == petshop.to_dict()
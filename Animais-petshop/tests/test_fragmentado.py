@@ -0,0 +1,69 @@
+import os
+
+from petshop_backend import PetShop
+from petshop_storage import fragmento_do_cpf
+
+
+def _preencher(petshop: PetShop, tutores: int = 40):
+    with petshop.transacao():
+        for i in range(tutores):
+            petshop.cadastrar_tutor(f"Tutor {i}", f"{i:011d}", "")
+            petshop.cadastrar_animal(f"Bicho {i}", "Gato", "SRD", 2, f"{i:011d}")
+        for a in petshop.animais[::3]:
+            petshop.agendar_servico_por_id(a.id, "Banho", 1_700_000_000.0)
+
+
+def _registros(petshop: PetShop):
+    # a ordem na memória segue os fragmentos lidos: compara sem ela
+    dados = petshop.to_dict()
+    return (sorted(dados["tutores"], key=lambda t: t["cpf"]), sorted(dados["animais"], key=lambda a: a["id"]),
+            dados["servicos_catalogo"], dados["agendamentos"])
+
+
+def test_migracao_do_arquivo_unico(tmp_path):
+    origem = PetShop(str(tmp_path / "dados.json"))
+    _preencher(origem)
+    fragmentado = PetShop(str(tmp_path / "dados.json"), fragmentos=4)
+    assert fragmentado.data_file == str(tmp_path / "dados.shards")
+    assert sorted(os.listdir(tmp_path / "dados.shards")) == \
+        ["fragmento-0000.json", "fragmento-0001.json", "fragmento-0002.json", "fragmento-0003.json", "global.json"]
+    assert _registros(fragmentado) == _registros(origem)
+    # depois da migração o diretório vale por si, e o número de fragmentos gravado prevalece
+    os.remove(tmp_path / "dados.json")
+    assert _registros(PetShop(str(tmp_path / "dados.shards"), fragmentos=8)) == _registros(origem)
+
+
+def test_carga_sob_demanda(tmp_path):
+    _preencher(PetShop(str(tmp_path / "dados.shards"), fragmentos=4))
+    petshop = PetShop(str(tmp_path / "dados.shards"), sob_demanda=True, metricas=True)
+    assert petshop.tutores == {}
+    cpf = f"{7:011d}"
+    assert petshop.buscar_tutor(cpf).nome == "Tutor 7"
+    assert petshop.armazenamento._carregados == {fragmento_do_cpf(cpf, 4)}
+    assert petshop.estatisticas()["contadores"]["fragmentos_lidos"] == 2
+    # gravar num fragmento carregado não apaga os outros
+    petshop.cadastrar_animal("Novo", "Cachorro", "SRD", 1, cpf)
+    assert [a.nome for a in petshop.animais_do_tutor(cpf)] == ["Bicho 7", "Novo"]
+    assert len(petshop.encontrar_animal_por_nome("Bicho 30")) == 1
+    assert petshop.armazenamento.todos_carregados()
+    completo = PetShop(str(tmp_path / "dados.shards"))
+    assert len(completo.tutores) == 40 and len(completo.animais) == 41
+    assert sum(a.total_servicos for a in completo.animais) == 14
+
+
+def test_escrita_agrupa_so_os_cpfs_das_operacoes(tmp_path, monkeypatch):
+    petshop = PetShop(str(tmp_path / "dados.json"), fragmentos=4)
+    with petshop.transacao():
+        for i in range(200):
+            petshop.cadastrar_tutor(f"Tutor {i}", f"{i:011d}", "")
+    armazenamento = petshop.armazenamento
+    agrupados = []
+    original = armazenamento._agrupar_cpf
+    monkeypatch.setattr(armazenamento, "_agrupar_cpf", lambda cpf: agrupados.append(cpf) or original(cpf))
+    petshop.cadastrar_tutor("Novo", "99999999999", "")
+    petshop.cadastrar_animal("Rex", "Cachorro", "SRD", 3, "00000000007")
+    assert agrupados == ["99999999999", "00000000007"]
+
+    recarregado = PetShop(str(tmp_path / "dados.json"), fragmentos=4)
+    assert len(recarregado.tutores) == 201
+    assert [a.nome for a in recarregado.animais] == ["Rex"]
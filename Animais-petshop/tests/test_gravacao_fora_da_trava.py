@@ -0,0 +1,30 @@
+import threading
+
+import petshop_storage
+from petshop_backend import PetShop
+
+
+def test_mutacao_nao_espera_a_gravacao_do_snapshot(tmp_path, monkeypatch):
+    petshop = PetShop(str(tmp_path / "dados.json"), agendar_flush=lambda: None)
+    gravando, liberar = threading.Event(), threading.Event()
+    original = petshop_storage._escrever_atomico
+
+    def escrever_devagar(path, dados):
+        gravando.set()
+        liberar.wait(5)
+        return original(path, dados)
+
+    monkeypatch.setattr(petshop_storage, "_escrever_atomico", escrever_devagar)
+    petshop.cadastrar_tutor("Ana", "111", "")
+    escritor = threading.Thread(target=petshop.flush)
+    escritor.start()
+    assert gravando.wait(5)
+    # a gravação está parada no meio, mas a trava do PetShop já foi solta
+    feito = threading.Event()
+    threading.Thread(target=lambda: (petshop.cadastrar_tutor("Bia", "222", ""), feito.set())).start()
+    assert feito.wait(2)
+    liberar.set()
+    escritor.join(5)
+    monkeypatch.setattr(petshop_storage, "_escrever_atomico", original)
+    petshop.flush()
+    assert set(PetShop(str(tmp_path / "dados.json")).tutores) == {"111", "222"}
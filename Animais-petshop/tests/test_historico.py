@@ -0,0 +1,46 @@
+import pytest
+
+from petshop_backend import PetShop
+
+
+def _preparar(caminho, servicos: int = 30) -> str:
+    petshop = PetShop(caminho)
+    with petshop.transacao():
+        petshop.cadastrar_tutor("Ana", "111", "")
+        petshop.cadastrar_animal("Rex", "cachorro", "SRD", 3, "111")
+        for i in range(servicos):
+            petshop.agendar_servico_para_animal("Rex", ("Banho", "Tosa", "Consulta")[i % 3], quando=1_700_000_000 + i)
+    petshop.fechar()
+    return petshop.animais[0].id
+
+
+def test_json_carrega_historico_direto_nos_arrays_mesmo_no_modo_preguicoso(tmp_path):
+    caminho = str(tmp_path / "dados.json")
+    animal_id = _preparar(caminho)
+    petshop = PetShop(caminho, historico_preguicoso=True)
+    assert not petshop.historico_preguicoso
+    animal = petshop.obter_animal(animal_id)
+    assert animal._servicos_pendentes is None
+    assert len(animal._hist_servicos) == 30
+
+
+def test_sqlite_pagina_o_historico_sob_demanda(tmp_path):
+    caminho = str(tmp_path / "dados.db")
+    animal_id = _preparar(caminho)
+    petshop = PetShop(caminho, historico_preguicoso=True)
+    assert petshop.historico_preguicoso
+    animal = petshop.obter_animal(animal_id)
+    assert animal.total_servicos == 30
+    assert [s.nome for s in animal.servicos_pagina(3, 3)] == ["Banho", "Tosa", "Consulta"]
+    assert animal._servicos_pendentes is not None
+    assert len(animal.servicos_realizados) == 30
+    assert animal._servicos_pendentes is None
+
+
+@pytest.mark.parametrize("nome", ["dados.json", "dados.db"])
+def test_servico_novo_entra_depois_do_historico_adiado(tmp_path, nome):
+    caminho = str(tmp_path / nome)
+    animal_id = _preparar(caminho, servicos=3)
+    petshop = PetShop(caminho, historico_preguicoso=True)
+    petshop.agendar_servico_por_id(animal_id, "Banho", quando=1_800_000_000)
+    assert [s.nome for s in petshop.obter_animal(animal_id).servicos_realizados] == ["Banho", "Tosa", "Consulta", "Banho"]
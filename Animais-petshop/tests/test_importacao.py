@@ -0,0 +1,63 @@
+import pytest
+
+from petshop_backend import PetShop, Servico
+from petshop_io import detectar_formato, exportar_arquivo, importar_arquivo
+
+
+def _petshop_com_dados(tmp_path) -> PetShop:
+    petshop = PetShop(str(tmp_path / "origem.json"))
+    petshop.adicionar_servico_catalogo(Servico("Hidratação", 45.5, "estética"))
+    petshop.cadastrar_tutor("Ana Souza", "111", "(11) 91234-5678")
+    petshop.cadastrar_tutor("Bia, \"a\" vizinha", "222", "")
+    petshop.cadastrar_animal("Rex", "Cachorro", "SRD", 3, "111")
+    petshop.cadastrar_animal("Mia", "Gato", "", 2, "222")
+    rex, mia = petshop.animais
+    petshop.agendar_servico_por_id(rex.id, "Banho", 1_700_000_000.0)
+    petshop.agendar_servico_por_id(rex.id, "Hidratação", 1_700_086_400.0)
+    petshop.agendar_servico_por_id(mia.id, "Consulta", 1_700_172_800.0)
+    return petshop
+
+
+@pytest.mark.parametrize("arquivo", ["dados.csv", "dados.jsonl"])
+def test_exportar_e_importar_preserva_os_registros(tmp_path, arquivo):
+    origem = _petshop_com_dados(tmp_path)
+    assert exportar_arquivo(origem, str(tmp_path / arquivo)) == 4 + 2 + 2 + 3  # catálogo, tutores, animais, serviços
+    destino = PetShop(str(tmp_path / "destino.json"))
+    resultado = importar_arquivo(destino, str(tmp_path / arquivo))
+    assert resultado["rejeitados"] == 0
+    assert (resultado["tutor"], resultado["animal"], resultado["servico"]) == (2, 2, 3)
+    assert list(destino.exportar_registros()) == list(origem.exportar_registros())
+    assert list(PetShop(str(tmp_path / "destino.json")).exportar_registros()) == list(origem.exportar_registros())
+
+
+def test_importacao_rejeita_registros_invalidos(tmp_path):
+    petshop = PetShop(str(tmp_path / "dados.json"))
+    petshop.cadastrar_tutor("Ana", "111", "")
+    resultado = petshop.importar_registros([
+        {"tipo": "tutor", "nome": "Ana de novo", "cpf": "111"},
+        {"tipo": "tutor", "nome": "Sem CPF", "cpf": "  "},
+        {"tipo": "animal", "nome": "Rex", "tutor_cpf": "999", "idade": 1},
+        {"tipo": "animal", "nome": "Rex", "tutor_cpf": "111", "idade": "três"},
+        {"tipo": "animal", "id": "a1", "nome": "Rex", "tutor_cpf": "111", "idade": 3},
+        {"tipo": "animal", "id": "a1", "nome": "Rex 2", "tutor_cpf": "111", "idade": 3},
+        {"tipo": "servico", "animal_id": "a1", "servico": "Massagem"},
+        {"tipo": "servico", "animal_id": "nenhum", "servico": "Banho"},
+        {"tipo": "catalogo", "nome": "", "preco": 10},
+        {"tipo": "catalogo", "nome": "Tosa", "preco": "caro"},
+        {"tipo": "vacina"},
+        {"tipo": "servico", "animal_id": "a1", "servico": "banho"},
+    ])
+    assert resultado["rejeitados"] == 10
+    assert (resultado["animal"], resultado["servico"]) == (1, 1)
+    assert len(resultado["erros"]) == 10
+    assert petshop.tutores["111"].nome == "Ana"
+    assert [a.id for a in petshop.animais] == ["a1"]
+    assert petshop.obter_animal("a1").total_servicos == 1
+
+
+def test_formato_pelo_sufixo_ou_explicito():
+    assert detectar_formato("x.CSV") == "csv"
+    assert detectar_formato("x.ndjson") == "jsonl"
+    assert detectar_formato("x.txt", "jsonl") == "jsonl"
+    with pytest.raises(ValueError):
+        detectar_formato("x.xml")
@@ -0,0 +1,54 @@
+from petshop_backend import PetShop
+
+
+def _petshop(tmp_path) -> PetShop:
+    petshop = PetShop(str(tmp_path / "dados.json"))
+    petshop.cadastrar_tutor("Ana", "111", "")
+    petshop.cadastrar_tutor("Bia", "222", "")
+    petshop.cadastrar_animal("Rex", "Cachorro", "SRD", 3, "111")
+    petshop.cadastrar_animal("Mia", "Gato", "Siamês", 2, "222")
+    return petshop
+
+
+def _id(petshop: PetShop, nome: str) -> str:
+    [animal] = petshop.encontrar_animal_por_nome(nome)
+    return animal.id
+
+
+def test_indices_acompanham_atualizacao_e_remocao(tmp_path):
+    petshop = _petshop(tmp_path)
+    rex = _id(petshop, "rex")
+    assert petshop.atualizar_animal(rex, nome="Thor")
+    assert petshop.encontrar_animal_por_nome("Rex") == []
+    assert [a.id for a in petshop.encontrar_animal_por_nome("  THOR ")] == [rex]
+    assert [a.nome for a in petshop.animais_do_tutor("111")] == ["Thor"]
+    assert [a.nome for a in petshop.animais_por_especie("cachorro")] == ["Thor"]
+
+    assert petshop.remover_animal(rex)
+    assert petshop.obter_animal(rex) is None
+    assert petshop.encontrar_animal_por_nome("Thor") == []
+    assert petshop.animais_do_tutor("111") == []
+    assert petshop.animais_por_especie("Cachorro") == []
+    assert [a.nome for a in petshop.animais_por_especie("Gato")] == ["Mia"]
+
+
+def test_ids_sobrevivem_a_recarga(tmp_path):
+    petshop = _petshop(tmp_path)
+    mia = _id(petshop, "Mia")
+    recarregado = PetShop(str(tmp_path / "dados.json"))
+    assert recarregado.obter_animal(mia).nome == "Mia"
+    assert recarregado.animais_do_tutor("222")[0].id == mia
+
+
+def test_nome_repetido_exige_o_id(tmp_path):
+    petshop = _petshop(tmp_path)
+    petshop.cadastrar_animal("Rex", "Cachorro", "Poodle", 5, "222")
+    assert len(petshop.encontrar_animal_por_nome("Rex")) == 2
+    assert not petshop.agendar_servico_para_animal("Rex", "Banho")
+    assert not petshop.atualizar_animal("Rex", idade=4)
+    assert all(a.total_servicos == 0 for a in petshop.animais)
+
+    poodle = next(a for a in petshop.animais if a.raca == "Poodle")
+    assert petshop.agendar_servico_para_animal(poodle.id, "Banho")
+    assert petshop.agendar_servico_para_animal("Mia", "Tosa")
+    assert [a.total_servicos for a in petshop.animais] == [0, 1, 1]
@@ -0,0 +1,39 @@
+import pytest
+
+from petshop_backend import PetShop
+
+
+def _abrir(tmp_path, **kwargs) -> PetShop:
+    return PetShop(str(tmp_path / "dados.json"), journal=True, **kwargs)
+
+
+def test_operacoes_vao_para_o_journal_e_sao_reproduzidas(tmp_path):
+    petshop = _abrir(tmp_path, compactar_a_cada=0)
+    petshop.cadastrar_tutor("Ana", "111", "")
+    petshop.cadastrar_animal("Rex", "cachorro", "SRD", 3, "111")
+    with open(petshop.armazenamento.journal_file, "rb") as f:
+        assert len(f.read().splitlines()) == 2
+
+    depois = _abrir(tmp_path)
+    assert list(depois.tutores) == ["111"]
+    assert [a.nome for a in depois.animais] == ["Rex"]
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_journal_reproduzido_apos_queda_no_meio_de_um_registro(tmp_path, cache):
+    petshop = _abrir(tmp_path, cache=cache)
+    petshop.cadastrar_tutor("Ana", "111", "11 98888-0000")
+    petshop.cadastrar_animal("Rex", "cachorro", "SRD", 3, "111")
+    petshop.agendar_servico_para_animal("Rex", "Banho")
+    journal = petshop.armazenamento.journal_file
+    # a queda interrompe a gravação do próximo registro no meio da linha
+    with open(journal, "ab") as f:
+        f.write(b'{"seq":4,"op":"tutor","dados":{"nome":"Bi')
+
+    depois = _abrir(tmp_path, cache=cache)
+    assert list(depois.tutores) == ["111"]
+    assert [s.nome for s in depois.encontrar_animal_por_nome("Rex")[0].servicos_realizados] == ["Banho"]
+
+    # o que for gravado depois da queda também tem que sobreviver à próxima carga
+    depois.cadastrar_tutor("Bia", "222", "")
+    assert set(_abrir(tmp_path, cache=cache).tutores) == {"111", "222"}
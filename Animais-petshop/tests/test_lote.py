@@ -0,0 +1,51 @@
+import io
+import json
+
+from petshop_backend import PetShop, executar_lote
+
+SCRIPT = """
+# comentário e linha vazia são ignorados
+
+tutor "Ana Souza" 111 "(11) 91234-5678"
+animal Rex Cachorro SRD 3 111
+animal Mia Gato SRD 2 999
+voar Rex
+animal Thor Cachorro SRD tres 111
+servico Rex Banho --quando 2024-03-04T10:00
+tutor -h
+listar tutores
+"""
+
+
+def _executar(tmp_path, atomico: bool):
+    petshop = PetShop(str(tmp_path / "dados.json"))
+    saida = io.StringIO()
+    resumo = executar_lote(petshop, SCRIPT.splitlines(), saida, atomico=atomico)
+    registros = [json.loads(l) for l in saida.getvalue().splitlines()]
+    return petshop, resumo, registros
+
+
+def test_lote_continua_apos_falhas_e_reporta_cada_linha(tmp_path):
+    petshop, resumo, registros = _executar(tmp_path, atomico=False)
+    linhas = {r["linha"]: r for r in registros if "linha" in r}
+    assert [(n, r["comando"], r["ok"]) for n, r in sorted(linhas.items())] == [
+        (4, "tutor", True), (5, "animal", True), (6, "animal", False), (7, "invalido", False),
+        (8, "animal", False), (9, "servico", True), (10, "tutor", False), (11, "listar", True)]
+    assert "erro" not in linhas[6]
+    assert "voar" in linhas[7]["erro"] and "tres" in linhas[8]["erro"]
+    assert linhas[10]["erro"]
+    assert linhas[11]["resultado"][:2] == ["Ana Souza (CPF: 111, Tel: (11) 91234-5678)", "  - Rex (Cachorro, SRD, 3 anos)"]
+    assert registros[-1] == {"resumo": resumo}
+    assert (resumo["comandos"], resumo["ok"], resumo["falhas"], resumo["abortado"]) == (8, 4, 4, False)
+    assert set(resumo["por_comando"]) == {"tutor", "animal", "invalido", "servico", "listar"}
+    recarregado = PetShop(str(tmp_path / "dados.json"))
+    assert [a.nome for a in recarregado.animais] == ["Rex"] and recarregado.animais[0].total_servicos == 1
+
+
+def test_lote_atomico_desfaz_tudo_na_primeira_falha(tmp_path):
+    petshop, resumo, registros = _executar(tmp_path, atomico=True)
+    assert [r["linha"] for r in registros if "linha" in r] == [4, 5, 6]
+    assert resumo["abortado"] and resumo["erro"] == "linha 6: ação não realizada"
+    assert (resumo["comandos"], resumo["ok"], resumo["falhas"]) == (3, 2, 1)
+    assert petshop.tutores == {} and petshop.animais == []
+    assert PetShop(str(tmp_path / "dados.json")).tutores == {}
@@ -0,0 +1,10 @@
+import re
+
+from petshop_backend import menu_principal
+
+
+def test_menu_principal_lista_as_opcoes_em_ordem(capsys):
+    menu_principal()
+    numeros = [int(n) for n in re.findall(r"^(\d+) - ", capsys.readouterr().out, re.M)]
+    # a mensagem de opção inválida pede um número entre 1 e 10
+    assert numeros == list(range(1, 11))
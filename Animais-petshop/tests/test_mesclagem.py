@@ -0,0 +1,45 @@
+import pytest
+
+from petshop_backend import PetShop
+
+
+def _abrir(tmp_path, **kwargs) -> PetShop:
+    return PetShop(str(tmp_path / "dados.json"), **kwargs)
+
+
+@pytest.mark.parametrize("journal", [False, True])
+def test_alteracoes_de_duas_instancias_sao_mescladas(tmp_path, journal):
+    a = _abrir(tmp_path, journal=journal)
+    a.cadastrar_tutor("Ana", "111", "")
+    a.cadastrar_animal("Rex", "cachorro", "SRD", 3, "111")
+    b = _abrir(tmp_path, journal=journal)
+
+    assert a.cadastrar_tutor("Bia", "222", "")
+    # b não viu o cadastro de a: a gravação dele mescla em vez de sobrescrever
+    assert b.cadastrar_tutor("Caio", "333", "")
+    assert set(b.tutores) == {"111", "222", "333"}
+    assert b.conflitos == []
+    assert set(_abrir(tmp_path, journal=journal).tutores) == {"111", "222", "333"}
+
+
+def test_mescla_descarta_operacao_sobre_animal_removido_em_outra_instancia(tmp_path):
+    a = _abrir(tmp_path)
+    a.cadastrar_tutor("Ana", "111", "")
+    a.cadastrar_animal("Rex", "cachorro", "SRD", 3, "111")
+    animal_id = a.animais[0].id
+    b = _abrir(tmp_path)
+
+    assert a.remover_animal(animal_id)
+    b.agendar_servico_por_id(animal_id, "Banho")
+    assert b.obter_animal(animal_id) is None
+    assert len(b.consumir_conflitos()) == 1
+    assert _abrir(tmp_path).animais == []
+
+
+def test_recarregar_se_alterado_traz_gravacoes_de_outra_instancia(tmp_path):
+    a = _abrir(tmp_path)
+    b = _abrir(tmp_path)
+    assert not b.recarregar_se_alterado()
+    a.cadastrar_tutor("Ana", "111", "")
+    assert b.recarregar_se_alterado()
+    assert list(b.tutores) == ["111"]
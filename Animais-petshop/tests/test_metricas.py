@@ -0,0 +1,53 @@
+import pytest
+
+from petshop_backend import PetShop
+from petshop_metricas import Histograma, Metricas, formatar
+
+
+def test_desligadas_nao_coletam(tmp_path):
+    petshop = PetShop(str(tmp_path / "dados.json"))
+    petshop.cadastrar_tutor("Ana", "111", "")
+    resumo = petshop.estatisticas()
+    assert (resumo["ativo"], resumo["tempos"], resumo["contadores"]) == (False, {}, {})
+    assert resumo["registros"]["tutores"] == 1
+
+
+def test_ligadas_medem_operacoes_bytes_e_contadores(tmp_path):
+    petshop = PetShop(str(tmp_path / "dados.json"), metricas=True)
+    petshop.cadastrar_tutor("Ana", "111", "")
+    petshop.cadastrar_tutor("Bia", "222", "")
+    petshop.cadastrar_tutor("Ana", "111", "")
+    resumo = petshop.estatisticas()
+    assert resumo["tempos"]["cadastrar_tutor"]["n"] == 3
+    assert resumo["contadores"]["operacoes.tutor"] == 2
+    assert resumo["contadores"]["operacoes_gravadas"] == 2
+    assert resumo["contadores"]["bytes_escritos"] > 0
+    assert any(linha.startswith("cadastrar_tutor") for linha in formatar(resumo))
+    petshop.metricas.zerar()
+    assert petshop.estatisticas()["tempos"] == {}
+
+
+def test_falha_e_operacao_lenta(tmp_path, capsys):
+    petshop = PetShop(str(tmp_path / "dados.json"), metricas=True)
+    with pytest.raises(AttributeError):
+        petshop.cadastrar_animal("Rex", "Cachorro", "SRD", 3, None)
+    assert petshop.metricas.falhas == {"cadastrar_animal": 1}
+    assert petshop.metricas.ultima_falha.startswith("cadastrar_animal: AttributeError")
+
+    petshop.metricas.limites["buscar"] = 0.0
+    petshop.metricas.limites["cadastrar_tutor"] = None
+    petshop.cadastrar_tutor("Ana", "111", "")
+    petshop.buscar("ana")
+    assert [nome for _, nome, _ in petshop.metricas.lentas] == ["buscar"]
+    assert "Aviso: operação lenta: buscar" in capsys.readouterr().out
+
+
+def test_histograma_percentis_limitados_ao_maximo():
+    h = Histograma()
+    for ms in [1] * 98 + [50, 200]:
+        h.registrar(ms / 1000)
+    resumo = h.resumo()
+    assert resumo["n"] == 100 and resumo["max_ms"] == 200
+    assert 1 <= resumo["p50_ms"] <= 2
+    assert 50 <= resumo["p99_ms"] <= 200
+    assert Metricas().resumo()["tempos"] == {}
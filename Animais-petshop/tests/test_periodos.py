@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+from petshop_backend import PetShop
+
+
+def _petshop(tmp_path) -> PetShop:
+    petshop = PetShop(str(tmp_path / "dados.json"))
+    petshop.cadastrar_tutor("Ana", "111", "")
+    petshop.cadastrar_animal("Rex", "Cachorro", "SRD", 3, "111")
+    petshop.cadastrar_animal("Mia", "Gato", "Persa", 2, "111")
+    rex, mia = petshop.animais
+    petshop.agendar_servico_por_id(rex.id, "Tosa", datetime(2024, 3, 2, 10))
+    petshop.agendar_servico_por_id(mia.id, "Banho", datetime(2024, 3, 1, 0, 0))
+    # fora de ordem: entra antes dos registros já existentes
+    petshop.agendar_servico_por_id(rex.id, "Banho", "2024-03-01T16:30")
+    petshop.agendar_servico_por_id(mia.id, "Consulta", datetime(2024, 3, 3, 0, 0))
+    petshop.agendar_servico_por_id(rex.id, "Consulta", datetime(2024, 2, 29, 23, 59))
+    return petshop
+
+
+def _linhas(registros):
+    return [(quando, a.nome, s.nome) for quando, a, s in registros]
+
+
+def test_periodo_inclui_o_inicio_e_exclui_o_fim(tmp_path):
+    petshop = _petshop(tmp_path)
+    assert _linhas(petshop.servicos_entre(date(2024, 3, 1), date(2024, 3, 3))) == [
+        (datetime(2024, 3, 1, 0, 0), "Mia", "Banho"),
+        (datetime(2024, 3, 1, 16, 30), "Rex", "Banho"),
+        (datetime(2024, 3, 2, 10), "Rex", "Tosa"),
+    ]
+    assert _linhas(petshop.agenda_do_dia(date(2024, 3, 3))) == [(datetime(2024, 3, 3), "Mia", "Consulta")]
+    assert petshop.servicos_entre(date(2024, 3, 4), date(2024, 4, 1)) == []
+    assert petshop.receita_entre(date(2024, 3, 1), date(2024, 3, 3)) == [("Banho", 2, 80.0), ("Tosa", 1, 60.0)]
+
+
+def test_periodo_de_um_animal_e_depois_de_edicoes(tmp_path):
+    petshop = _petshop(tmp_path)
+    rex, mia = petshop.animais
+    assert [s.nome for _, _, s in petshop.servicos_entre(date(2024, 2, 1), date(2024, 4, 1), rex.id)] == \
+        ["Consulta", "Banho", "Tosa"]
+    assert petshop.servicos_entre(date(2024, 2, 1), date(2024, 4, 1), "inexistente") == []
+    # monta a linha do tempo antes das edições, que então a atualizam em vez de reconstruí-la
+    petshop.servicos_entre(date(2024, 1, 1), date(2025, 1, 1))
+    assert petshop.remover_animal(rex.id)
+    petshop.agendar_servico_por_id(mia.id, "Tosa", datetime(2024, 3, 2, 9))
+    assert _linhas(petshop.agenda_do_dia(date(2024, 3, 2))) == [(datetime(2024, 3, 2, 9), "Mia", "Tosa")]
+    recarregado = PetShop(str(tmp_path / "dados.json"))
+    assert _linhas(recarregado.servicos_entre(date(2024, 1, 1), date(2025, 1, 1))) == \
+        _linhas(petshop.servicos_entre(date(2024, 1, 1), date(2025, 1, 1)))
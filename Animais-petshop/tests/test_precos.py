@@ -0,0 +1,66 @@
+import pytest
+
+import petshop_precos
+from petshop_backend import PetShop, Servico
+from petshop_precos import TabelaPrecos
+
+
+def _petshop(tmp_path) -> PetShop:
+    petshop = PetShop(str(tmp_path / "dados.json"))
+    petshop.adicionar_servico_catalogo(Servico("Vacina", 33.33))
+    petshop.cadastrar_tutor("Ana", "111", "")
+    petshop.cadastrar_animal("Rex", "Cachorro", "SRD", 3, "111")
+    petshop.cadastrar_animal("Mia", "Gato", "SRD", 2, "111")
+    rex, mia = petshop.animais
+    for animal, servico in ((rex, "Banho"), (rex, "Banho"), (rex, "Consulta"), (mia, "Tosa"), (mia, "Vacina")):
+        petshop.agendar_servico_por_id(animal.id, servico, 1_700_000_000.0)
+    return petshop
+
+
+def test_tabela_precos_nao_insere_na_tabela_compartilhada(tmp_path):
+    petshop = PetShop(str(tmp_path / "dados.json"))
+    tabela = petshop._tabela_servicos
+    tamanho = len(tabela)
+    # serviço que só existe no catálogo, sem linha na tabela dos históricos
+    petshop.servicos_catalogo["hidratação"] = Servico("Hidratação", 40.0, "estética")
+    precos = petshop.tabela_precos(com_historico=False)
+    assert len(tabela) == tamanho
+    assert "Hidratação" not in tabela.indice
+    assert precos.nomes[-1] == "Hidratação" and precos.no_catalogo[-1]
+    assert precos.reajustar(10, nomes=["Hidratação"]) == {"Hidratação": 44.0}
+
+
+def test_reajuste_por_categoria_e_por_nome(tmp_path):
+    petshop = _petshop(tmp_path)
+    assert petshop.reajustar_precos(10, categorias=["Estetica"]) == {"Banho": 44.0, "Tosa": 66.0}
+    assert petshop.reajustar_precos(-10, servicos=["vacina"]) == {"Vacina": 30.0}
+    # 0% não muda nada e não grava operação
+    assert petshop.reajustar_precos(0) == {}
+    precos = {s.nome: s.preco for s in PetShop(str(tmp_path / "dados.json")).servicos_catalogo.values()}
+    assert precos == {"Banho": 44.0, "Tosa": 66.0, "Consulta": 80.0, "Vacina": 30.0}
+    # o histórico guarda o preço cobrado na época
+    rex, mia = petshop.animais
+    assert petshop.faturamento_por_animal() == {rex.id: 160.0, mia.id: 93.33}
+
+
+@pytest.mark.parametrize("usar_numpy", [False, True])
+def test_simulacao_nao_altera_e_soma_por_categoria(tmp_path, monkeypatch, usar_numpy):
+    if usar_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(petshop_precos, "np", None)
+    petshop = _petshop(tmp_path)
+    simulacao = petshop.simular_precos(50, categorias=["estetica"])
+    assert simulacao["precos"] == {"Banho": 60.0, "Tosa": 90.0}
+    assert (simulacao["registros"], simulacao["registros_afetados"]) == (5, 3)
+    assert (simulacao["receita_atual"], simulacao["receita_simulada"], simulacao["diferenca"]) == (253.33, 323.33, 70.0)
+    assert simulacao["por_categoria"] == {"estetica": {"atual": 140.0, "simulada": 210.0},
+                                          "veterinario": {"atual": 113.33, "simulada": 113.33}}
+    assert petshop.obter_servico_por_nome("Banho").preco == 40.0
+
+
+def test_tabela_sem_historicos():
+    tabela = TabelaPrecos([("Banho", "estetica", 40.0, True), ("Antigo", "estetica", 10.0, False)], usar_numpy=False)
+    assert len(tabela) == 0 and tabela.totais() == []
+    # serviços fora do catálogo só existem nos históricos e não são reajustados
+    assert tabela.reajustar(10) == {"Banho": 44.0}
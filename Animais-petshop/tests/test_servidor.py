@@ -0,0 +1,116 @@
+import asyncio
+import json
+import threading
+
+from petshop_backend import PetShop
+from petshop_server import ServidorPetShop
+
+
+def test_leitura_nao_roda_no_meio_de_uma_mutacao(tmp_path):
+    petshop = PetShop(str(tmp_path / "dados.json"))
+    servidor = ServidorPetShop(petshop)
+    rota = servidor.listar_tutores
+    dentro, sair = threading.Event(), threading.Event()
+
+    def mutacao():
+        with petshop.transacao():
+            petshop.cadastrar_tutor("Ana", "111", "")
+            dentro.set()
+            sair.wait(5)
+            petshop.cadastrar_tutor("Bia", "222", "")
+
+    async def cenario():
+        escritor = threading.Thread(target=mutacao)
+        escritor.start()
+        assert dentro.wait(5)
+        leitura = asyncio.ensure_future(servidor._despachar(rota, False, {}, {}, {}))
+        await asyncio.sleep(0.2)
+        assert not leitura.done()
+        sair.set()
+        status, pagina = await leitura
+        escritor.join(5)
+        return status, pagina
+
+    status, pagina = asyncio.run(cenario())
+    assert status == 200
+    # os dois tutores da mutação, nunca só o primeiro
+    assert pagina["total"] == 2
+
+
+async def _requisitar(porta: int, metodo: str, alvo: str, corpo=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+    dados = b"" if corpo is None else (corpo if isinstance(corpo, bytes) else json.dumps(corpo).encode("utf-8"))
+    writer.write(f"{metodo} {alvo} HTTP/1.1\r\nHost: x\r\nConnection: close\r\n"
+                 f"Content-Length: {len(dados)}\r\n\r\n".encode("latin-1") + dados)
+    await writer.drain()
+    resposta = await reader.read()
+    writer.close()
+    cabecalho, _, conteudo = resposta.partition(b"\r\n\r\n")
+    return int(cabecalho.split()[1]), json.loads(conteudo)
+
+
+def _com_servidor(tmp_path, cenario):
+    petshop = PetShop(str(tmp_path / "dados.json"))
+
+    async def rodar():
+        servidor = ServidorPetShop(petshop)
+        tcp = await servidor.iniciar("127.0.0.1", 0)
+        try:
+            return await cenario(tcp.sockets[0].getsockname()[1])
+        finally:
+            tcp.close()
+            await servidor.encerrar()
+
+    return asyncio.run(rodar())
+
+
+def test_rotas_de_tutores_animais_e_servicos(tmp_path):
+    async def cenario(porta):
+        r = lambda *args: _requisitar(porta, *args)
+        assert await r("POST", "/tutores", {"nome": "Ana", "cpf": "111"}) == \
+            (201, {"nome": "Ana", "cpf": "111", "telefone": ""})
+        assert (await r("POST", "/tutores", {"nome": "Ana", "cpf": "111"}))[0] == 409
+        assert (await r("POST", "/animais", {"nome": "Rex", "idade": 3, "tutor_cpf": "999"}))[0] == 404
+        status, rex = await r("POST", "/animais", {"nome": "Rex", "especie": "Cachorro", "idade": 3, "tutor_cpf": "111"})
+        assert status == 201
+        for _ in range(3):
+            assert (await r("POST", f"/animais/{rex['id']}/servicos", {"servico": "banho"}))[0] == 201
+        assert (await r("POST", f"/animais/{rex['id']}/servicos", {"servico": "Massagem"}))[0] == 404
+        assert (await r("PATCH", f"/animais/{rex['id']}", {"nome": "Thor"}))[1]["nome"] == "Thor"
+        status, pagina = await r("GET", f"/animais/{rex['id']}/servicos?pagina=2&tamanho=2")
+        assert (status, pagina["total"], [s["servico"] for s in pagina["itens"]]) == (200, 3, ["Banho"])
+        status, tutor = await r("GET", "/tutores/111")
+        assert [a["nome"] for a in tutor["animais"]] == ["Thor"]
+        assert (await r("GET", "/animais?especie=cachorro"))[1]["total"] == 1
+        assert (await r("DELETE", f"/animais/{rex['id']}"))[0] == 200
+        assert (await r("GET", f"/animais/{rex['id']}"))[0] == 404
+        return await r("GET", "/saude")
+
+    status, saude = _com_servidor(tmp_path, cenario)
+    assert (status, saude["tutores"], saude["animais"]) == (200, 1, 0)
+    assert list(PetShop(str(tmp_path / "dados.json")).tutores) == ["111"]
+
+
+def test_erros_de_requisicao(tmp_path):
+    async def cenario(porta):
+        return [
+            (await _requisitar(porta, "GET", "/nada"))[0],
+            (await _requisitar(porta, "PUT", "/tutores"))[0],
+            (await _requisitar(porta, "POST", "/tutores", b"{nao e json"))[0],
+            (await _requisitar(porta, "POST", "/tutores", [1, 2]))[0],
+            (await _requisitar(porta, "POST", "/tutores", {"nome": "Sem CPF"}))[0],
+            (await _requisitar(porta, "GET", "/tutores?pagina=x"))[0],
+            (await _requisitar(porta, "GET", "/agendamentos?dia=ontem"))[0],
+        ]
+
+    assert _com_servidor(tmp_path, cenario) == [404, 405, 400, 400, 400, 400, 400]
+
+
+def test_mutacoes_concorrentes_sao_todas_gravadas(tmp_path):
+    async def cenario(porta):
+        respostas = await asyncio.gather(*(
+            _requisitar(porta, "POST", "/tutores", {"nome": f"Tutor {i}", "cpf": f"{i:03d}"}) for i in range(40)))
+        return [status for status, _ in respostas]
+
+    assert _com_servidor(tmp_path, cenario) == [201] * 40
+    assert len(PetShop(str(tmp_path / "dados.json")).tutores) == 40
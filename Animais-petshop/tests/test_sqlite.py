@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from petshop_backend import PetShop
+
+
+def _abrir(tmp_path) -> PetShop:
+    return PetShop(str(tmp_path / "dados.db"))
+
+
+def _segunda_as_dez() -> datetime:
+    hoje = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+    return hoje + timedelta(days=7 - hoje.weekday())
+
+
+def test_gravacao_de_outra_estacao_nao_recarrega_tudo(tmp_path, monkeypatch):
+    a = _abrir(tmp_path)
+    a.cadastrar_tutor("Ana", "111", "")
+    b = _abrir(tmp_path)
+    a.cadastrar_tutor("Bia", "222", "")
+    monkeypatch.setattr(PetShop, "_mesclar", lambda self, ops: (_ for _ in ()).throw(AssertionError("recarga completa")))
+    assert b.cadastrar_tutor("Caio", "333", "")
+    assert b.conflitos == []
+    assert set(_abrir(tmp_path).tutores) == {"111", "222", "333"}
+
+
+def test_operacao_sobre_animal_removido_em_outra_estacao_e_rejeitada(tmp_path):
+    a = _abrir(tmp_path)
+    a.cadastrar_tutor("Ana", "111", "")
+    a.cadastrar_animal("Rex", "cachorro", "SRD", 3, "111")
+    animal_id = a.animais[0].id
+    b = _abrir(tmp_path)
+
+    assert a.remover_animal(animal_id)
+    assert not b.agendar_servico_por_id(animal_id, "Banho")
+    assert len(b.consumir_conflitos()) == 1
+    # a linha rejeitada foi relida do banco: o animal sumiu também da memória de b
+    assert b.obter_animal(animal_id) is None
+    assert b.encontrar_animal_por_nome("Rex") == []
+    assert _abrir(tmp_path).animais == []
+
+
+def test_cpf_cadastrado_em_outra_estacao_vem_do_banco(tmp_path):
+    a = _abrir(tmp_path)
+    b = _abrir(tmp_path)
+    a.cadastrar_tutor("Ana", "111", "1111")
+    assert not b.cadastrar_tutor("Outra Ana", "111", "2222")
+    assert b.buscar_tutor("111").nome == "Ana"
+
+
+def test_horario_reservado_em_outra_estacao_e_rejeitado(tmp_path):
+    a = _abrir(tmp_path)
+    a.cadastrar_tutor("Ana", "111", "")
+    a.cadastrar_animal("Rex", "cachorro", "SRD", 3, "111")
+    a.cadastrar_animal("Mia", "gato", "SRD", 2, "111")
+    b = _abrir(tmp_path)
+    inicio = _segunda_as_dez()
+    capacidade = a.agenda.profissionais(inicio.date(), a.agenda.duracao("Consulta")[1])
+    for _ in range(capacidade):
+        assert a.agendar_horario("Rex", "Consulta", inicio)
+    assert b.agendar_horario("Mia", "Consulta", inicio) is None
+    assert len(b.consumir_conflitos()) == 1
+    assert len(_abrir(tmp_path).agenda) == capacidade
+    # a agenda do dia foi relida: b já enxerga o horário ocupado
+    assert inicio not in b.horarios_livres("Consulta", inicio.date())
@@ -0,0 +1,48 @@
+import pytest
+
+from petshop_backend import PetShop
+
+
+def _abrir(tmp_path, **kwargs) -> PetShop:
+    return PetShop(str(tmp_path / "dados.json"), **kwargs)
+
+
+def test_transacao_grava_uma_vez_no_fim(tmp_path):
+    petshop = _abrir(tmp_path)
+    with petshop.transacao():
+        petshop.cadastrar_tutor("Ana", "111", "")
+        petshop.cadastrar_tutor("Bia", "222", "")
+        # dentro da transação nada foi gravado ainda
+        assert _abrir(tmp_path).tutores == {}
+    assert set(_abrir(tmp_path).tutores) == {"111", "222"}
+
+
+def test_transacao_desfeita_por_excecao_restaura_o_estado(tmp_path):
+    petshop = _abrir(tmp_path)
+    petshop.cadastrar_tutor("Ana", "111", "")
+    petshop.cadastrar_animal("Rex", "cachorro", "SRD", 3, "111")
+
+    with pytest.raises(RuntimeError):
+        with petshop.transacao():
+            petshop.cadastrar_tutor("Bia", "222", "")
+            petshop.atualizar_animal(petshop.animais[0].id, nome="Thor")
+            raise RuntimeError("falha no meio do lote")
+
+    assert list(petshop.tutores) == ["111"]
+    assert [a.nome for a in petshop.animais] == ["Rex"]
+    assert petshop.encontrar_animal_por_nome("Thor") == []
+    assert list(_abrir(tmp_path).tutores) == ["111"]
+
+
+def test_transacao_aninhada_desfaz_so_ate_o_ponto_de_salvamento(tmp_path):
+    petshop = _abrir(tmp_path)
+    with petshop.transacao():
+        petshop.cadastrar_tutor("Ana", "111", "")
+        with pytest.raises(ValueError):
+            with petshop.transacao():
+                petshop.cadastrar_tutor("Bia", "222", "")
+                raise ValueError("desfaz só a interna")
+        petshop.cadastrar_tutor("Caio", "333", "")
+
+    assert set(petshop.tutores) == {"111", "333"}
+    assert set(_abrir(tmp_path).tutores) == {"111", "333"}